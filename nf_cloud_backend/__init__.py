@@ -1,23 +1,25 @@
 # std importd
+import hmac
 import json
-from threading import Thread
 import traceback
 from typing import Optional, Tuple
 
 # 3rd party imports
 import eventlet
-from flask import Flask, g as request_store, request, Request
+from flask import Flask, request, Request
 from flask_caching import Cache
 from flask_cors import CORS
 from flask_login import LoginManager
 from flask_socketio import SocketIO
 import jwt
 from oauthlib.oauth2 import WebApplicationClient
-from playhouse.flask_utils import FlaskDB
+from psycogreen.eventlet import patch_psycopg
+import redis
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.exceptions import HTTPException
 
 # internal imports
+from nf_cloud_backend.authorization.token_cache import TokenCache
 from nf_cloud_backend.constants import (
     ACCESS_TOKEN_HEADER, 
     ONE_TIME_USE_ACCESS_TOKEN_PARAM_NAME,
@@ -25,7 +27,10 @@ from nf_cloud_backend.constants import (
 )
 from nf_cloud_backend.utility.configuration import Configuration
 from nf_cloud_backend.utility.headers.cross_origin_resource_sharing import add_allow_cors_headers
-from nf_cloud_backend.utility.matomo import track_request as matomo_track_request
+from nf_cloud_backend.utility.matomo import MatomoTracker
+from nf_cloud_backend.utility.pooled_database import LazyFlaskDB, PooledPostgresDatabase
+from nf_cloud_backend.utility.progress_throttle import ProgressThrottle
+from nf_cloud_backend.utility.thread_pool import ThreadPool
 
 from nf_cloud_backend import models   # Import module only to prevent circular imports
 
@@ -66,11 +71,17 @@ cache = Cache(
 """
 cache.init_app(app)
 
+redis_client = redis.Redis.from_url(Configuration.values()["redis_url"])
+"""Redis client for data structures not covered by the cache, e.g. the sets of received upload chunks
+"""
+
 async_mode = "threading"
 """Mode for SocketIO
 """
 if not Configuration.values()["debug"]:
     eventlet.monkey_patch()
+    # Let psycopg2 yield to other green threads while waiting for the database
+    patch_psycopg()
     async_mode = "eventlet"
 
 socketio = SocketIO(
@@ -85,10 +96,45 @@ socketio = SocketIO(
 """SocketIO for bidirectional communication (events) between server and browser.
 """
 
-db_wrapper = FlaskDB(
+progress_throttle = ProgressThrottle(
+    socketio,
+    "new-progress",
+    Configuration.values()["progress_updates"]["max_per_second"]
+)
+"""Coalesces the progress events of running projects.
+"""
+
+matomo_tracker = MatomoTracker(
+    Configuration.values()["matomo"]["url"],
+    Configuration.values()["matomo"]["site_id"],
+    Configuration.values()["matomo"]["auth_token"],
+    Configuration.values()["matomo"]["queue_size"],
+    Configuration.values()["matomo"]["batch_size"],
+    Configuration.values()["matomo"]["flush_interval"],
     app,
-    Configuration.values()['database']['url']
+    Configuration.values()["debug"]
 )
+"""Sends tracked requests to Matomo in the background, started by the server
+"""
+
+thread_pool = ThreadPool(
+    Configuration.values()["thread_pool"]["size"],
+    async_mode == "eventlet"
+)
+"""Native threads for CPU heavy or blocking work, e.g. compressing archives
+"""
+
+db_wrapper = LazyFlaskDB(
+    app,
+    PooledPostgresDatabase.from_url(
+        Configuration.values()['database']['url'],
+        Configuration.values()['database']['pool_size'],
+        Configuration.values()['database']['stale_timeout'],
+        Configuration.values()['database']['pool_timeout']
+    )
+)
+"""Database with connection pool, connections are returned to the pool at the end of each request
+"""
 
 openid_clients = {
     provider: WebApplicationClient(provider_data["client_id"])
@@ -98,6 +144,13 @@ openid_clients = {
 login_manager = LoginManager()
 login_manager.init_app(app)
 
+token_cache = TokenCache(
+    Configuration.values()["token_cache"]["size"],
+    Configuration.values()["token_cache"]["ttl"]
+)
+"""Decoded authentication tokens and their users
+"""
+
 # Do not move import up, it would result in cyclic dependencies
 from nf_cloud_backend.authorization.jwt import JWT                      # pylint: disable=wrong-import-position
 
@@ -116,6 +169,16 @@ def load_user_from_request(incomming_request: Request):
     User : optional
     """
 
+    # Worker requests are authenticated by basic auth, check them before touching cache or database
+    basic_auth = incomming_request.authorization
+    if basic_auth is not None and is_worker(basic_auth.username, basic_auth.password):
+        return models.user.User(
+            id=0,
+            provider_type="local",
+            provider="local",
+            login_id="worker"
+        )
+
     # Check if access token is provided in header
     auth_header = incomming_request.headers.get(ACCESS_TOKEN_HEADER, None)
     # If the JWT token isn't found in the header, try to resolve the JWT token by an one time use token
@@ -123,18 +186,19 @@ def load_user_from_request(incomming_request: Request):
     # add the access token to the headers and the file is too large fo the usual "Download -> Blob -> Blob download"-Javascript stuff.
     if auth_header is None:
         one_time_use_token: Optional[str] = incomming_request.args.get(ONE_TIME_USE_ACCESS_TOKEN_PARAM_NAME, None)
-        one_time_use_token = f"{ONE_TIME_USE_ACCESS_TOKEN_CACHE_PREFIX}{one_time_use_token}"
-        if cache.has(one_time_use_token):
+        # Only ask the cache if a one time use token is given
+        if one_time_use_token is not None:
+            one_time_use_token = f"{ONE_TIME_USE_ACCESS_TOKEN_CACHE_PREFIX}{one_time_use_token}"
             auth_header = cache.get(one_time_use_token)
-            # Delete the one time use token from cache
-            cache.delete(one_time_use_token)
-        else:
-            auth_header = None
+            if auth_header is not None:
+                # Delete the one time use token from cache
+                cache.delete(one_time_use_token)
     if auth_header is not None:
         try:
-            user, is_unexpired = JWT.decode_auth_token_to_user(
+            user, is_unexpired = JWT.decode_auth_token_to_cached_user(
                 app.config["SECRET_KEY"],
-                auth_header
+                auth_header,
+                token_cache
             )
             if user is not None and is_unexpired:
                 return user
@@ -143,56 +207,49 @@ def load_user_from_request(incomming_request: Request):
             jwt.InvalidTokenError
         ):
             return None
-    auth_header = incomming_request.headers.get("Authorization", None)
-    if auth_header is not None:
-        basic_auth = incomming_request.authorization
-        if basic_auth.username == Configuration.values()["worker_credentials"]["username"] \
-            and basic_auth.password == Configuration.values()["worker_credentials"]["password"]:
-            return models.user.User(
-                id=0,
-                provider_type="local",
-                provider="local",
-                login_id="worker"
-            )
     return None
 
+def is_worker(username: Optional[str], password: Optional[str]) -> bool:
+    """
+    Checks the given basic auth credentials against the worker credentials in constant time.
+
+    Parameters
+    ----------
+    username : Optional[str]
+        Username
+    password : Optional[str]
+        Password
+
+    Returns
+    -------
+    bool
+        True if the credentials belong to the worker
+    """
+    worker_credentials = Configuration.values()["worker_credentials"]
+    # Evaluate both comparisons, so the duration does not reveal which one failed
+    is_username_valid = hmac.compare_digest(
+        (username or "").encode("utf-8"),
+        str(worker_credentials["username"]).encode("utf-8")
+    )
+    is_password_valid = hmac.compare_digest(
+        (password or "").encode("utf-8"),
+        str(worker_credentials["password"]).encode("utf-8")
+    )
+    return is_username_valid and is_password_valid
+
 @app.before_request
 def track_request():
     """
-    Sends a tracking request to Matomo.
+    Queues a tracking request for Matomo.
     """
     if Configuration.values()["matomo"]["enabled"]:
-        track_thread = Thread(target=matomo_track_request, args=(
+        matomo_tracker.track(
             request.headers.get("User-Agent", ""),
             request.remote_addr,
             request.headers.get("Referer", ""),
             request.headers.get("Accept-Language", ""),
-            request.headers.get("Host", ""),
-            request.full_path,
-            request.query_string,
-            request.url.startswith("https"),
-            Configuration.values()["matomo"]["url"],
-            Configuration.values()["matomo"]["site_id"],
-            Configuration.values()["matomo"]["auth_token"], 
-            app,
-            Configuration.values()["debug"]
-        ))
-        track_thread.start()
-        request_store.track_thread = track_thread 
-
-@app.teardown_appcontext
-def wait_for_track_request(exception=None): #pylint: disable=unused-argument
-    """
-    Waits for the Matomo tracking to finish.s
-
-    Parameters
-    ----------
-    exception : Any, optional
-        Required for `
-    """
-    track_thread = request_store.pop("track_thread", None)
-    if track_thread:
-        track_thread.join()
+            request.url
+        )
 
 @app.errorhandler(Exception)
 def handle_exception(e):
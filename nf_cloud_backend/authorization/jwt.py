@@ -1,11 +1,12 @@
 # std imports
 import datetime
-from typing import ClassVar, Tuple
+from typing import ClassVar, Optional, Tuple
 
 # 3rd party imports
 import jwt
 
 # internal imports
+from nf_cloud_backend.authorization.token_cache import TokenCache
 from nf_cloud_backend.models.user import User
 
 class JWT:
@@ -108,3 +109,39 @@ class JWT:
         return User.select().where(
             User.id == data["user_id"]
         ).get_or_none(), data["expires_at"] > int(datetime.datetime.utcnow().timestamp())
+
+    @classmethod
+    def decode_auth_token_to_cached_user(cls, secret_key: str, auth_token: str, token_cache: TokenCache) -> Tuple[Optional[User], bool]:
+        """
+        Same as `decode_auth_token_to_user`, but looks up the token in the given cache first
+        and caches the user of valid tokens, so repeated requests with the same token skip decoding and the database.
+
+        Parameters
+        ----------
+        secret_key : str
+            Secret key for encoding
+        auth_token : str
+            JWT token
+        token_cache : TokenCache
+            Cache of decoded tokens
+
+        Returns
+        -------
+        Tuple
+            With user and if token was unexpired
+        """
+        cached_token = token_cache.get(auth_token)
+        if cached_token is not None:
+            user, expires_at = cached_token
+        else:
+            data = cls.decode_auth_token(
+                secret_key,
+                auth_token
+            )
+            user = User.select().where(
+                User.id == data["user_id"]
+            ).get_or_none()
+            expires_at = data["expires_at"]
+            if user is not None:
+                token_cache.set(auth_token, user, expires_at)
+        return user, expires_at > int(datetime.datetime.utcnow().timestamp())
@@ -1,7 +1,11 @@
 # std imports
 import datetime
+from email.utils import parsedate_to_datetime
 import json
-from typing import Any, Dict
+import re
+import threading
+import time
+from typing import Any, ClassVar, Dict, Optional, Tuple
 
 # 3rd party imports
 from flask import Request, jsonify, redirect, Response, url_for
@@ -19,12 +23,96 @@ from nf_cloud_backend.utility.configuration import Configuration
 
 class OpenIdConnect:
     """
-    Tools to manage OpenID authentications
+    Tools to manage OpenID authentications.
+    Discovery documents are cached per provider for as long as the provider's `Cache-Control` or `Expires` header allows,
+    and all requests to a provider use the provider's session, so connections are kept alive and reused.
     """
+
+    DEFAULT_DISCOVERY_TTL: ClassVar[int] = 3600
+    """Seconds a discovery document is cached if the provider does not send caching headers
+    """
+
+    MAX_AGE_PATTERN: ClassVar[re.Pattern] = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)\"?\s*(?:,|$)", re.IGNORECASE)
+    """Matches the `max-age` directive of a `Cache-Control` header
+    """
+
+    __sessions: ClassVar[Dict[str, requests.Session]] = {}
+    """Sessions by discovery URL
+    """
+
+    __discovery_documents: ClassVar[Dict[str, Tuple[Dict[Any, Any], float]]] = {}
+    """Discovery documents and their monotonic expiration by discovery URL
+    """
+
+    __lock: ClassVar[threading.Lock] = threading.Lock()
+    """Lock for sessions and discovery documents
+    """
+
+    @classmethod
+    def get_session(cls, provider_client_config: Dict[str, Any]) -> requests.Session:
+        """
+        Returns the provider's session, created on first use.
+
+        Parameters
+        ----------
+        provider_client_config : Dict[str, Any]
+            Provider specific config from application config
+
+        Returns
+        -------
+        requests.Session
+            Session
+        """
+        with cls.__lock:
+            session = cls.__sessions.get(provider_client_config["discovery_url"])
+            if session is None:
+                session = requests.Session()
+                session.verify = provider_client_config.get("verify_ssl", True)
+                cls.__sessions[provider_client_config["discovery_url"]] = session
+            return session
+
+    @classmethod
+    def get_cache_ttl(cls, response: requests.Response) -> float:
+        """
+        Seconds the response may be cached, derived from its `Cache-Control` (`no-store`, `no-cache`, `max-age`) and `Age` headers
+        or its `Expires` header. Falls back to `DEFAULT_DISCOVERY_TTL`.
+
+        Parameters
+        ----------
+        response : requests.Response
+            Response
+
+        Returns
+        -------
+        float
+            Seconds, 0 if the response must not be cached
+        """
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            return 0
+        max_age = cls.MAX_AGE_PATTERN.search(cache_control)
+        if max_age is not None:
+            try:
+                age = int(response.headers.get("Age", 0))
+            except ValueError:
+                age = 0
+            return max(int(max_age.group(1)) - age, 0)
+        expires = response.headers.get("Expires")
+        if expires is not None:
+            try:
+                expires_at = parsedate_to_datetime(expires)
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=datetime.timezone.utc)
+                return max((expires_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0)
+            except (TypeError, ValueError):
+                # Invalid dates mean already expired
+                return 0
+        return cls.DEFAULT_DISCOVERY_TTL
+
     @classmethod
     def get_autodicovery(cls, provider_client_config: Dict[str, Any]) -> Dict[Any, Any]:
         """
-        Get the autodiscovery.
+        Get the autodiscovery, cached, see `get_cache_ttl`.
 
         Parameters
         ----------
@@ -36,10 +124,21 @@ class OpenIdConnect:
         Dict[Any, Any]
             Provider config
         """
-        return requests.get(
-            provider_client_config["discovery_url"],
-            verify=provider_client_config.get("verify_ssl", True)
-        ).json()
+        discovery_url = provider_client_config["discovery_url"]
+        with cls.__lock:
+            cached_document: Optional[Tuple[Dict[Any, Any], float]] = cls.__discovery_documents.get(discovery_url)
+        if cached_document is not None and cached_document[1] > time.monotonic():
+            return cached_document[0]
+        response = cls.get_session(provider_client_config).get(discovery_url)
+        response.raise_for_status()
+        discovery_document = response.json()
+        ttl = cls.get_cache_ttl(response)
+        with cls.__lock:
+            if ttl > 0:
+                cls.__discovery_documents[discovery_url] = (discovery_document, time.monotonic() + ttl)
+            else:
+                cls.__discovery_documents.pop(discovery_url, None)
+        return discovery_document
 
     @classmethod
     def login(cls, request: Request, provider: str):
@@ -111,15 +210,14 @@ class OpenIdConnect:
             scope=provider_client_config["scope"]
         )
 
-        auth_token_response = requests.post(
+        auth_token_response = cls.get_session(provider_client_config).post(
             token_url,
             headers=headers,
             data=body,
             auth=(
                 provider_client_config["client_id"],
                 provider_client_config["client_secret"]
-            ),
-            verify=provider_client_config.get("verify_ssl", True)
+            )
         )
 
         auth_token_data = auth_token_response.json()
@@ -135,11 +233,10 @@ class OpenIdConnect:
             provider_config["userinfo_endpoint"]
         )
 
-        userinfo = requests.get(
+        userinfo = cls.get_session(provider_client_config).get(
             uri,
             headers = headers,
-            data = body,
-            verify=provider_client_config.get("verify_ssl", True)
+            data = body
         ).json()
 
         user = User.select().where(
@@ -244,15 +341,14 @@ class OpenIdConnect:
             refresh_token = user.provider_data["refresh_token"]
         )
 
-        refreshed_data = requests.post(
+        refreshed_data = cls.get_session(provider_client_config).post(
             refresh_url,
             headers = refresh_headers,
             data = refresh_body,
             auth = (
                 provider_client_config["client_id"],
                 provider_client_config["client_secret"]
-            ),
-            verify=provider_client_config.get("verify_ssl", True)
+            )
         ).json()
 
         auth_token = JWT.create_auth_token(
@@ -0,0 +1,81 @@
+# std imports
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+class TokenCache:
+    """
+    In-process LRU cache of decoded authentication tokens and their users,
+    so authenticated requests neither decode the JWT nor query the user again.
+    Entries expire after `ttl` seconds, which bounds how long changes of a user
+    (e.g. deletion) remain unnoticed by this process.
+    The token's own expiration is returned with the user and must still be checked by the caller.
+
+    Attributes
+    ----------
+    __max_size : int
+        Maximum number of cached tokens, 0 disables the cache
+    __ttl : float
+        Seconds until an entry expires
+    __entries : OrderedDict[str, Tuple[Any, int, float]]
+        User, token expiration (UNIX timestamp) and monotonic entry expiration by token, least recently used first
+    __lock : threading.Lock
+        Lock for the entries
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.__max_size: int = max_size
+        self.__ttl: float = ttl
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Tuple[Any, int]]:
+        """
+        Parameters
+        ----------
+        token : str
+            Authentication token
+
+        Returns
+        -------
+        Optional[Tuple[Any, int]]
+            User and token expiration (UNIX timestamp) or None if not cached
+        """
+        with self.__lock:
+            entry = self.__entries.get(token)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self.__entries[token]
+                return None
+            self.__entries.move_to_end(token)
+            return entry[0], entry[1]
+
+    def set(self, token: str, user: Any, expires_at: int):
+        """
+        Caches the user of the token, evicting the least recently used token if the cache is full.
+
+        Parameters
+        ----------
+        token : str
+            Authentication token
+        user : Any
+            User
+        expires_at : int
+            Token expiration (UNIX timestamp)
+        """
+        if self.__max_size <= 0:
+            return
+        with self.__lock:
+            self.__entries[token] = (user, expires_at, time.monotonic() + self.__ttl)
+            self.__entries.move_to_end(token)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self.__lock:
+            self.__entries.clear()
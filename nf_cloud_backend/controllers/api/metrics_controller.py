@@ -0,0 +1,25 @@
+# 3rd party imports
+from flask import jsonify
+from flask_login import login_required
+
+# internal imports
+from nf_cloud_backend import app
+from nf_cloud_backend import db_wrapper as db
+
+
+class MetricsController:
+    """
+    Exposes runtime metrics of the backend process handling the request
+    """
+
+    @staticmethod
+    @app.route("/api/metrics/database-pool")
+    @login_required
+    def database_pool():
+        """
+        Returns
+        -------
+        Response
+            200 - Metrics of the database connection pool, see `PooledPostgresDatabase.metrics`
+        """
+        return jsonify(db.database.metrics())
@@ -1,20 +1,100 @@
 # std imports
 import json
+import os
+import pathlib
+import traceback
 from collections import defaultdict
 from urllib.parse import unquote
 
-import pika
-import zipstream
 # 3rd party imports
-from flask import Response, jsonify, request, send_file
+from flask import Response, jsonify, request
 from flask_login import login_required
 
 # internal imports
-from nf_cloud_backend import app, config
+from nf_cloud_backend import app
 from nf_cloud_backend import db_wrapper as db
-from nf_cloud_backend import socketio
+from nf_cloud_backend import socketio, progress_throttle, thread_pool
+from nf_cloud_backend.models.outbox_message import OutboxMessage
+from nf_cloud_backend.models.process_resource_rollup import ProcessResourceRollup
 from nf_cloud_backend.models.project import Project
+from nf_cloud_backend.models.trace_event import TraceEvent
+from nf_cloud_backend.utility.archive_response import ArchiveResponse
+from nf_cloud_backend.utility.buffered_writer import BufferedWriter
 from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.directory_listing import DirectoryListing
+from nf_cloud_backend.utility.file_response import FileResponse
+from nf_cloud_backend.utility.outbox_relay import OutboxRelay
+from nf_cloud_backend.utility.project_statistics import ProjectStatistics
+from nf_cloud_backend.utility.rabbit_mq import RabbitMQ
+from nf_cloud_backend.utility.result_archive import ResultArchive
+from nf_cloud_backend.utility.upload_session import UploadSession
+
+trace_event_writer = BufferedWriter(
+    TraceEvent.insert_batch,
+    Configuration.values()["trace_events"]["batch_size"],
+    Configuration.values()["trace_events"]["flush_interval"],
+    db.database,
+    app
+)
+"""Writes the weblog traces in batches, started by the server
+"""
+
+resource_rollup_writer = BufferedWriter(
+    ProcessResourceRollup.fold_traces,
+    Configuration.values()["trace_events"]["batch_size"],
+    Configuration.values()["trace_events"]["flush_interval"],
+    db.database,
+    app
+)
+"""Folds the traces of completed processes into the resource rollups in batches, started by the server
+"""
+
+outbox_relay = OutboxRelay(
+    Configuration.values()["outbox"]["batch_size"],
+    Configuration.values()["outbox"]["poll_interval"],
+    db.database,
+    app
+)
+"""Publishes the scheduled projects to RabbitMQ, started by the server
+"""
+
+
+def reconcile_file_index(project: Project):
+    """
+    Rebuilds the file index of the given project in a background task.
+
+    Parameters
+    ----------
+    project : Project
+        Project
+    """
+    try:
+        with db.database.connection_context():
+            project.reconcile_file_index()
+    except Exception: # pylint: disable=broad-except
+        app.logger.error(traceback.format_exc()) # pylint: disable=no-member
+
+
+def build_result_archive(project: Project):
+    """
+    Builds the archive of the project's file directory in a background task,
+    so downloads after the run are served from the cache, see `ResultArchive`.
+
+    Parameters
+    ----------
+    project : Project
+        Project
+    """
+    try:
+        archive_format = Configuration.values()["archives"]["prebuild_format"]
+        folder = project.file_directory
+        fingerprint = thread_pool.execute(ResultArchive.fingerprint, folder)
+        # The folder is walked lazily, advance the walk on the thread pool
+        entries = thread_pool.iterate(project.archive_entries([folder]), ResultArchive.ENTRIES_BATCH_SIZE)
+        stream, _ = ArchiveResponse.stream(entries, archive_format)
+        ResultArchive.store(project.id, project.file_directory, folder, archive_format, fingerprint, stream)
+    except Exception: # pylint: disable=broad-except
+        app.logger.error(traceback.format_exc()) # pylint: disable=no-member
 
 
 class ProjectsController:
@@ -27,19 +107,56 @@ class ProjectsController:
     @login_required
     def index():
         """
-        Endpoint for listing all project.
+        Endpoint for listing all project, ordered by ID.
+        Use `after` for fast paging through large lists, `offset` scans all skipped rows.
+
+        Parameters
+        ----------
+        offset : int
+            Query parameter, number of projects to skip, optional
+        after : int
+            Query parameter, ID of the last received project, optional, takes precedence over `offset`
+        limit : int
+            Query parameter, maximum number of projects, optional
+        fields : str
+            Query parameter, comma separated list of fields to return, e.g. `id,name`. The ID is always included.
 
         Returns
         -------
         Response
+            200 - with `projects` and `next`, the value for `after` to request the next page (null on the last page or without limit)
+            422 - on unknown fields
         """
-        offset = request.args.get("offset", None)
-        limit = request.args.get("limit", None)
+        offset = request.args.get("offset", None, type=int)
+        after = request.args.get("after", None, type=int)
+        limit = request.args.get("limit", None, type=int)
+        fields = request.args.get("fields", None, type=str)
+
+        field_names = Project.DICT_FIELDS
+        if fields is not None:
+            field_names = [field.strip() for field in fields.split(",") if len(field.strip()) > 0]
+            unknown_fields = [field for field in field_names if field not in Project.DICT_FIELDS]
+            if len(unknown_fields) > 0:
+                return jsonify({
+                    "errors": {
+                        "fields": [f"unknown field '{field}'" for field in unknown_fields]
+                    }
+                }), 422
+            if "id" not in field_names:
+                field_names.insert(0, "id")
+
+        # Fetch plain dictionaries, which is a lot cheaper than instantiating models
+        query = Project.select(
+            *[getattr(Project, field) for field in field_names]
+        ).order_by(Project.id)
+        if after is not None:
+            query = query.where(Project.id > after)
+        elif offset is not None:
+            query = query.offset(offset)
+        projects = list(query.limit(limit).dicts())
         return jsonify({
-            "projects": [
-                project.to_dict() 
-                for project in Project.select().offset(offset).limit(limit)
-            ]
+            "projects": projects,
+            "next": projects[-1]["id"] if limit is not None and len(projects) == limit else None
         })
 
     @staticmethod
@@ -99,6 +216,7 @@ class ProjectsController:
 
         if not len(errors):
             project = Project.create(name=name)
+            ProjectStatistics.on_created()
             return jsonify(project.to_dict())
 
         return jsonify({
@@ -157,6 +275,7 @@ class ProjectsController:
         project = Project.get(Project.id == id)
         if project:
             project.delete_instance()
+            ProjectStatistics.on_deleted(project.is_scheduled)
             return jsonify({})
         else:
             return jsonify({}), 404
@@ -173,8 +292,23 @@ class ProjectsController:
             200
         """
         return jsonify({
-            "count": Project.select().count()
+            "count": ProjectStatistics.get()["total"]
         })
+
+    @staticmethod
+    @app.route("/api/projects/statistics")
+    @login_required
+    def statistics():
+        """
+        Returns project statistics from the cached snapshot.
+
+        Returns
+        -------
+        Response
+            200 - with `total`, `scheduled`, `queued`, `running`, `workers` and `completed_processes_today`.
+                `queued`, `running` and `workers` are null if RabbitMQ is not reachable.
+        """
+        return jsonify(ProjectStatistics.get())
     
 
     @staticmethod
@@ -188,12 +322,27 @@ class ProjectsController:
         ----------
         id : int
             Project ID
+        dir : str
+            Query parameter, directory within the project directory
+        mode : str
+            Query parameter, `detailed` to list entries with type, size and mtime, sorted and paginated server side, optional
+        sort : str
+            Query parameter, detailed mode only, sort key `name`, `size` or `mtime`, by default `name`
+        order : str
+            Query parameter, detailed mode only, `asc` or `desc`, by default `asc`. Folders are always listed first.
+        limit : int
+            Query parameter, detailed mode only, page size, at least 1, larger pages than 10000 are capped, optional
+        cursor : str
+            Query parameter, detailed mode only, `next` of the previous page, optional
 
         Returns
         -------
         Reponse
-            200 - on success
+            200 - on success, with `folders` and `files` or in detailed mode with `entries` and `next`.
+                Contains a weak ETag derived from the directory's modification time.
+            304 - when the directory was not modified since the ETag given by `If-None-Match`
             404 - when project was not found
+            422 - on invalid sort key, cursor or limit
         """
         project = Project.get(Project.id == id)
         if project is None:
@@ -206,19 +355,59 @@ class ProjectsController:
             unquote(request.args.get('dir', "", type=str))
         )
         if directory.is_dir() and project.in_file_director:
-            files = []
-            folders = []
-            for entry in directory.iterdir():
-                if entry.is_dir():
-                    folders.append(entry.name)
-                else:
-                    files.append(entry.name)
-
-            folders.sort()
-            files.sort()
+            etag = DirectoryListing.etag(directory)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            if request.args.get("mode", None, type=str) == "detailed":
+                limit = request.args.get("limit", None, type=int)
+                if limit is not None:
+                    # Larger pages are capped, too small ones are rejected by the listing
+                    limit = min(limit, DirectoryListing.MAX_LIMIT)
+                try:
+                    entries, next_cursor = DirectoryListing.list(
+                        directory,
+                        request.args.get("sort", "name", type=str),
+                        request.args.get("order", "asc", type=str) == "desc",
+                        request.args.get("cursor", None, type=str),
+                        limit
+                    )
+                except ValueError as error:
+                    return jsonify({
+                        "errors": {
+                            "general": str(error)
+                        }
+                    }), 422
+                response = jsonify({
+                    "entries": entries,
+                    "next": next_cursor
+                })
+            else:
+                files = []
+                folders = []
+                # scandir provides the entry type without an additional stat
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            folders.append(entry.name)
+                        else:
+                            files.append(entry.name)
+
+                folders.sort()
+                files.sort()
+                response = jsonify({
+                    "folders": folders,
+                    "files": files
+                })
+            response.set_etag(etag, weak=True)
+            return response
+        elif directory == project.file_directory:
+            # File directory is created lazily on the first write
             return jsonify({
-                "folders": folders,
-                "files": files
+                "folders": [],
+                "files": []
             })
         return jsonify({
             "errors": {
@@ -227,6 +416,57 @@ class ProjectsController:
         }), 404
 
 
+    @staticmethod
+    @app.route("/api/projects/<int:id>/search")
+    @login_required
+    def search(id: int):
+        """
+        Searches files and folders by glob, answered from the file index instead of walking the disk.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+        glob : str
+            Query parameter, glob relative to the project directory, e.g. `results/**/*.bam`.
+            `**/` matches any number of folders, `*` and `?` do not match `/`.
+        after : str
+            Query parameter, `next` of the previous page, optional
+        limit : int
+            Query parameter, page size (1 - 1000), by default 100
+
+        Returns
+        -------
+        Response
+            200 - with `paths` (`path`, `is_directory`, `size`, `mtime`) ordered by path and `next` (null on the last page)
+            404 - when project was not found
+            422 - when glob is missing
+        """
+        glob = request.args.get("glob", None, type=str)
+        if glob is None or len(glob) == 0:
+            return jsonify({
+                "errors": {
+                    "glob": ["cannot be empty"]
+                }
+            }), 422
+        project = Project.get_or_none(Project.id == id)
+        if project is None:
+            return jsonify({
+                "errors": {
+                    "general": "project not found"
+                }
+            }), 404
+        limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+        paths = project.search_files(
+            unquote(glob),
+            request.args.get("after", None, type=str),
+            limit
+        )
+        return jsonify({
+            "paths": paths,
+            "next": paths[-1]["path"] if len(paths) == limit else None
+        })
+
     @staticmethod
     @app.route("/api/projects/<int:id>/upload-file", methods=["POST"])
     @login_required
@@ -245,6 +485,8 @@ class ProjectsController:
             200 - on success
             422 - on error
         """
+        # Do not hold a database connection while the body is received
+        db.release_connection()
         errors = defaultdict(list)
 
         if not "file" in request.files:
@@ -266,12 +508,276 @@ class ProjectsController:
         project = Project.get(Project.id == id)
         if project is None:
             return "", 404
-        project.add_file(directory, new_file.filename, new_file.read())
+        try:
+            # Copy the spooled upload in chunks instead of reading it into memory
+            project.add_file(directory, new_file.filename, new_file.stream)
+        except ValueError as error:
+            return jsonify({
+                "errors": {
+                    "file": [str(error)]
+                }
+            }), 422
         return jsonify({
             "directory": directory,
             "file": new_file.filename
         })
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/upload-stream", methods=["PUT"])
+    @login_required
+    def upload_stream(id: int):
+        """
+        Upload a file by sending its content as raw request body. The body is written
+        to disk in chunks while it is received, so neither the whole file is kept in memory
+        nor spooled to a temporary file first, as it is done for multipart uploads.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+
+        Returns
+        -------
+        Response
+            200 - on success
+            422 - on error
+        """
+        errors = defaultdict(list)
+
+        directory = request.args.get("directory", None)
+        if directory is None:
+            errors["directory"].append("cannot be empty")
+
+        filename = request.args.get("filename", None)
+        if filename is None or len(filename) == 0:
+            errors["filename"].append("cannot be empty")
+
+        if len(errors) > 0:
+            return jsonify({
+                "errors": errors
+            }), 422
+
+        project = Project.get(Project.id == id)
+        if project is None:
+            return "", 404
+        # Do not hold a database connection while the body is received
+        db.release_connection()
+        try:
+            project.add_file(directory, filename, request.stream)
+        except ValueError as error:
+            return jsonify({
+                "errors": {
+                    "filename": [str(error)]
+                }
+            }), 422
+        return jsonify({
+            "directory": directory,
+            "file": filename
+        })
     
+    @staticmethod
+    @app.route("/api/projects/<int:id>/uploads", methods=["POST"])
+    @login_required
+    def create_upload(id: int):
+        """
+        Creates a resumable upload session.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+
+        Returns
+        -------
+        Response
+            200 - on success
+            422 - on error
+        """
+        errors = defaultdict(list)
+        data = request.json
+
+        directory = data.get("directory", None)
+        if directory is None:
+            errors["directory"].append("cannot be empty")
+        elif not isinstance(directory, str):
+            errors["directory"].append("is not type string")
+
+        filename = data.get("filename", None)
+        if filename is None:
+            errors["filename"].append("cannot be empty")
+        elif not isinstance(filename, str):
+            errors["filename"].append("is not type string")
+
+        size = data.get("size", None)
+        if size is None:
+            errors["size"].append("cannot be empty")
+        elif not isinstance(size, int) or isinstance(size, bool):
+            errors["size"].append("is not type integer")
+
+        if len(errors) > 0:
+            return jsonify({
+                "errors": errors
+            }), 422
+
+        project = Project.get(Project.id == id)
+        if project is None:
+            return "", 404
+        try:
+            session = UploadSession.create(project, directory, filename, size)
+        except ValueError as error:
+            return jsonify({
+                "errors": {
+                    "upload": [str(error)]
+                }
+            }), 422
+        return jsonify({
+            "upload": UploadSession.to_dict(session)
+        })
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/uploads/<string:upload_id>", methods=["GET"])
+    @login_required
+    def show_upload(id: int, upload_id: str):
+        """
+        Returns the upload session and the received byte ranges, e.g. to resume an interrupted upload.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        Response
+            200 - on success
+            404 - if session does not exist or is expired
+        """
+        session = UploadSession.get(id, upload_id)
+        if session is None:
+            return "", 404
+        return jsonify({
+            "upload": UploadSession.to_dict(session),
+            "received": UploadSession.received_ranges(session)
+        })
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/uploads/<string:upload_id>/<int:offset>", methods=["PUT"])
+    @login_required
+    def upload_chunk(id: int, upload_id: str, offset: int):
+        """
+        Receives the chunk at the given offset as raw request body.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+        upload_id : str
+            Upload ID
+        offset : int
+            Chunk offset
+
+        Returns
+        -------
+        Response
+            200 - on success
+            404 - if session does not exist or is expired
+            422 - on error
+        """
+        session = UploadSession.get(id, upload_id)
+        if session is None:
+            return "", 404
+        # Do not hold a database connection while the body is received
+        db.release_connection()
+        try:
+            UploadSession.write_chunk(session, offset, request.stream)
+        except FileNotFoundError:
+            # Aborted in the meantime
+            return "", 404
+        except ValueError as error:
+            return jsonify({
+                "errors": {
+                    "chunk": [str(error)]
+                }
+            }), 422
+        return "", 200
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/uploads/<string:upload_id>/finalize", methods=["POST"])
+    @login_required
+    def finalize_upload(id: int, upload_id: str):
+        """
+        Moves the completely uploaded file to its target directory.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        Response
+            200 - on success
+            404 - if session does not exist or is expired
+            409 - if the upload is already being finalized
+            422 - if chunks are missing
+        """
+        session = UploadSession.get(id, upload_id)
+        if session is None:
+            return "", 404
+        project = Project.get(Project.id == id)
+        if project is None:
+            return "", 404
+        try:
+            file_path = UploadSession.finalize(project, session)
+        except FileNotFoundError:
+            return "", 404
+        except ValueError as error:
+            return jsonify({
+                "errors": {
+                    "upload": [str(error)]
+                }
+            }), 422
+        if file_path is None:
+            return jsonify({
+                "errors": {
+                    "upload": ["is already being finalized"]
+                }
+            }), 409
+        return jsonify({
+            "directory": session["directory"],
+            "file": session["filename"]
+        })
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/uploads/<string:upload_id>", methods=["DELETE"])
+    @login_required
+    def abort_upload(id: int, upload_id: str):
+        """
+        Aborts the upload and removes the received chunks.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        Response
+            200 - on success
+            404 - if session does not exist or is expired
+        """
+        session = UploadSession.get(id, upload_id)
+        if session is None:
+            return "", 404
+        UploadSession.abort(session)
+        return "", 200
+
     @staticmethod
     @app.route("/api/projects/<int:id>/delete-path", methods=["POST"])
     @login_required
@@ -371,32 +877,37 @@ class ProjectsController:
             200 - successfull
             422 - errors
         """
-        errors = defaultdict(list)
         project = Project.get(Project.id == id)
         if project is None:
             return "", 404
         if project and not project.is_scheduled:
-            for arg_name, arg_definition in project.workflow_arguments.items():
-                if not "value" in arg_definition or "value" in arg_definition and arg_definition["value"] is None:
-                    errors[arg_name].append("cannot be empty")
+            errors = project.validate_workflow_arguments()
             if len(errors) > 0:
                 return jsonify({
                     "errors": errors
                 }), 422
-            with db.database.atomic() as transaction:
-                project.is_scheduled = True
-                project.save()
-                try:
-                    connection = pika.BlockingConnection(pika.URLParameters(Configuration.values()['rabbit_mq']['url']))
-                    channel = connection.channel()
-                    channel.basic_publish(exchange='', routing_key=Configuration.values()['rabbit_mq']['project_workflow_queue'], body=project.get_queue_represenation())
-                    connection.close()
-                except BaseException as exception:
-                    transaction.rollback()
-                    raise exception
+            project.create_file_directory()
+            with db.database.atomic():
+                scheduled_projects = Project.mark_scheduled([project.id])
+                if project.id in scheduled_projects:
+                    project.is_scheduled = True
+                    project.started_at = None
+                    project.scheduled_at, project.queue_sequence = scheduled_projects[project.id]
+                    # Published by the relay after commit
+                    OutboxMessage.create(
+                        queue=Configuration.values()['rabbit_mq']['project_workflow_queue'],
+                        body=project.get_queue_represenation()
+                    )
+            if project.id not in scheduled_projects:
+                # Scheduled concurrently
                 return jsonify({
-                    "is_scheduled": project.is_scheduled
+                    "is_scheduled": True
                 })
+            outbox_relay.notify()
+            ProjectStatistics.on_scheduled()
+            return jsonify({
+                "is_scheduled": project.is_scheduled
+            })
         else:
             return jsonify({
                     "errors": {
@@ -404,6 +915,127 @@ class ProjectsController:
                     }
                 }), 422
 
+    @staticmethod
+    @app.route("/api/projects/schedule", methods=["POST"])
+    @login_required
+    def bulk_schedule():
+        """
+        Endpoint to schedule many projects at once.
+        The projects are loaded with one query, scheduled with one UPDATE and their messages are inserted
+        into the outbox with one INSERT, so the relay publishes them in batches over its channel.
+
+        Returns
+        -------
+        Response
+            200 - results by project ID, each either `{"is_scheduled": true}` or `{"errors": {...}}`
+            422 - errors
+        """
+        data = request.json
+        errors = defaultdict(list)
+        if not isinstance(data, dict) or not isinstance(data.get("ids"), list) or len(data["ids"]) == 0:
+            errors["ids"].append("must be a non-empty list")
+        elif not all(isinstance(project_id, int) and not isinstance(project_id, bool) for project_id in data["ids"]):
+            errors["ids"].append("must only contain integers")
+        if len(errors) > 0:
+            return jsonify({
+                "errors": errors
+            }), 422
+
+        results = {}
+        schedulable_projects = {}
+        projects = {project.id: project for project in Project.select().where(Project.id.in_(data["ids"]))}
+        for project_id in dict.fromkeys(data["ids"]):
+            project = projects.get(project_id)
+            if project is None:
+                results[project_id] = {"errors": {"general": ["project not found"]}}
+            elif project.is_scheduled:
+                results[project_id] = {"errors": {"general": ["project is already scheduled"]}}
+            else:
+                project_errors = project.validate_workflow_arguments()
+                if len(project_errors) > 0:
+                    results[project_id] = {"errors": project_errors}
+                else:
+                    schedulable_projects[project_id] = project
+
+        if len(schedulable_projects) > 0:
+            for project in schedulable_projects.values():
+                project.create_file_directory()
+            queue = Configuration.values()['rabbit_mq']['project_workflow_queue']
+            with db.database.atomic():
+                # Only projects which were not scheduled concurrently in the meantime
+                scheduled_projects = Project.mark_scheduled(list(schedulable_projects.keys()))
+                scheduled_ids = set(scheduled_projects.keys())
+                for project_id, (scheduled_at, queue_sequence) in scheduled_projects.items():
+                    project = schedulable_projects[project_id]
+                    project.is_scheduled = True
+                    project.started_at = None
+                    project.scheduled_at = scheduled_at
+                    project.queue_sequence = queue_sequence
+                if len(scheduled_ids) > 0:
+                    # Published by the relay after commit, ordered by queue sequence
+                    OutboxMessage.insert_many([
+                        {
+                            "queue": queue,
+                            "body": schedulable_projects[project_id].get_queue_represenation()
+                        }
+                        for project_id in sorted(scheduled_ids, key=lambda project_id: scheduled_projects[project_id][1])
+                    ]).execute()
+            if len(scheduled_ids) > 0:
+                outbox_relay.notify()
+                ProjectStatistics.on_scheduled(len(scheduled_ids))
+            for project_id in schedulable_projects:
+                if project_id in scheduled_ids:
+                    results[project_id] = {"is_scheduled": True}
+                else:
+                    results[project_id] = {"errors": {"general": ["project is already scheduled"]}}
+
+        return jsonify({
+            "results": results
+        })
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/queue-position")
+    @login_required
+    def queue_position(id: int):
+        """
+        Estimates the project's position in the queue and the time until it starts.
+        Besides one counting query, only cached values are used (queue statistics and average run duration),
+        so it is cheap enough to poll.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+
+        Returns
+        -------
+        Response
+            200 - Position and estimate, see API docs
+            404 - Project not found
+        """
+        project = Project.get(Project.id == id)
+        if project is None:
+            return "", 404
+        position, running = project.get_queue_position()
+        workers, queued = ProjectStatistics.get_queue_statistics()
+        average_run_duration = ProjectStatistics.get_average_run_duration()
+        estimated_start_in = None
+        if position is not None and workers and average_run_duration is not None:
+            # Runs which have to start or finish before a worker is free for this project
+            runs_ahead = running + position - 1
+            estimated_start_in = (runs_ahead // workers) * average_run_duration if runs_ahead >= workers else 0
+        return jsonify({
+            "is_scheduled": project.is_scheduled,
+            "is_running": project.is_scheduled and project.started_at is not None,
+            "scheduled_at": project.scheduled_at.isoformat() if project.scheduled_at is not None else None,
+            "position": position,
+            "running": running,
+            "queued": queued,
+            "workers": workers,
+            "average_run_duration": average_run_duration,
+            "estimated_start_in": estimated_start_in
+        })
+
     @staticmethod
     @app.route("/api/projects/<int:id>/finished", methods=["POST"])
     @login_required
@@ -424,10 +1056,13 @@ class ProjectsController:
         project = Project.get(Project.id == id)
         if project is None:
             return "", 404
-        project.is_scheduled = False
-        project.submitted_processes = 0
-        project.completed_processes = 0
-        project.save()
+        if project.is_scheduled:
+            ProjectStatistics.on_finished()
+        project.mark_finished()
+        socketio.start_background_task(reconcile_file_index, project)
+        if Configuration.values()["archives"]["prebuild"]:
+            socketio.start_background_task(build_result_archive, project)
+        progress_throttle.discard(f"project{project.id}")
         socketio.emit("finished-project", {}, to=f"project{project.id}")
         return "", 200
 
@@ -463,35 +1098,128 @@ class ProjectsController:
             }), 422
 
         if "event" in workflow_log and "trace" in workflow_log:
-            project = Project.get(Project.id == id)
-            if project is None:
-                return jsonify({
-                    "errors": {
-                        "general": "project not found"
+            submitted = 1 if workflow_log["event"] == "process_submitted" else 0
+            completed = 1 if workflow_log["event"] == "process_completed" else 0
+            if submitted or completed:
+                # Atomic increment, so concurrent events do not override each other
+                process_counters = Project.increment_process_counters(id, submitted, completed)
+                if process_counters is None:
+                    return jsonify({
+                        "errors": {
+                            "general": "project not found"
+                        }
+                    }),  404
+                progress_throttle.emit(
+                    f"project{id}",
+                    {
+                        "submitted_processes": process_counters[0],
+                        "completed_processes": process_counters[1]
                     }
-                }),  404
-            if workflow_log["event"] == "process_submitted":
-                project.submitted_processes += 1
-            if workflow_log["event"] == "process_completed":
-                project.completed_processes += 1
-            project.save()
-            socketio.emit(
-                "new-progress", 
-                {
-                    "submitted_processes": project.submitted_processes,
-                    "completed_processes": project.completed_processes
-                }, 
-                to=f"project{project.id}"
-            )
+                )
+            elif workflow_log["event"] in TraceEvent.WEBLOG_EVENTS:
+                if not Project.select(Project.id).where(Project.id == id).exists():
+                    return jsonify({
+                        "errors": {
+                            "general": "project not found"
+                        }
+                    }),  404
+            if workflow_log["event"] in TraceEvent.WEBLOG_EVENTS:
+                trace_event_writer.add(TraceEvent.from_weblog(id, workflow_log))
+            if completed:
+                resource_rollup_writer.add((id, workflow_log["trace"]))
+                ProjectStatistics.on_process_completed()
         return "", 200
 
+    @staticmethod
+    @app.route("/api/projects/<int:id>/trace-events")
+    @login_required
+    def trace_events(id: int):
+        """
+        Pages through the stored trace events of a project, ordered by ID.
+        Traces are written in batches, so the latest events may appear with a short delay.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+        after : int
+            Query parameter, ID of the last received event, by default 0
+        limit : int
+            Query parameter, number of events (1 - 1000), by default 100
+        event : str
+            Query parameter, optional filter for the event type, e.g. `process_completed`
+
+        Returns
+        -------
+        Response
+            200 - with `trace_events` and `next`, the value for `after` to request the next page (null on the last page)
+            404 - when project was not found
+        """
+        if not Project.select(Project.id).where(Project.id == id).exists():
+            return jsonify({
+                "errors": {
+                    "general": "project not found"
+                }
+            }), 404
+        after = request.args.get("after", 0, type=int)
+        limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+        event = request.args.get("event", None, type=str)
+
+        query = TraceEvent.select().where(
+            TraceEvent.project_id == id,
+            TraceEvent.id > after
+        )
+        if event is not None:
+            query = query.where(TraceEvent.event == event)
+        trace_events = [
+            trace_event.to_dict()
+            for trace_event in query.order_by(TraceEvent.id).limit(limit)
+        ]
+        return jsonify({
+            "trace_events": trace_events,
+            "next": trace_events[-1]["id"] if len(trace_events) == limit else None
+        })
+
+    @staticmethod
+    @app.route("/api/projects/<int:id>/resource-summary")
+    @login_required
+    def resource_summary(id: int):
+        """
+        Resource usage per process, aggregated from the traces of completed tasks.
+        Answered from the rollups, so it does not scan the stored trace events.
+
+        Parameters
+        ----------
+        id : int
+            Project ID
+
+        Returns
+        -------
+        Response
+            200 - with `processes`, a dictionary of process name -> metric (`realtime`, `%cpu`, `peak_rss`, `read_bytes`, `write_bytes`)
+                -> `count`, `sum`, `min`, `max`, `mean`, `p50` & `p95`
+            404 - when project was not found
+        """
+        if not Project.select(Project.id).where(Project.id == id).exists():
+            return jsonify({
+                "errors": {
+                    "general": "project not found"
+                }
+            }), 404
+        return jsonify({
+            "processes": ProcessResourceRollup.summary(id)
+        })
+
     @staticmethod
     @app.route("/api/projects/<int:w_id>/download")
     @login_required
     def download(w_id: int):
         """
         Downloads a file or folder.
-        If path is a folder the response is a zip package.
+        If path is a folder the response is an archive, see `ArchiveResponse`,
+        which is served from the cache if it was pre-built, see `ResultArchive`.
+        File downloads support conditional and range requests, see `FileResponse`.
+        If `downloads.accel_redirect_location` is set, files are sent by NginX.
 
         Parameters
         ----------
@@ -499,28 +1227,124 @@ class ProjectsController:
             Project ID
         path : strs
             Path to folder or file.
+        format : str
+            Archive format for folders, `zip` (default), `tar` or `tar.zst`
         """
         project = Project.get(Project.id == w_id)
         if project is None:
             return "", 404
         path = unquote(request.args.get('path', "", type=str))
+        archive_format = request.args.get("format", "zip", type=str)
+        if archive_format not in ArchiveResponse.FORMATS:
+            return jsonify({
+                "errors": {
+                    "format": [f"must be one of {', '.join(ArchiveResponse.FORMATS)}"]
+                }
+            }), 422
         path_to_download = project.get_path(path)
         if not path_to_download.exists():
             return "", 404
         elif path_to_download.is_file():
-            return send_file(path_to_download, as_attachment=True)
+            accel_redirect_location = Configuration.values()["downloads"]["accel_redirect_location"]
+            if accel_redirect_location is not None:
+                return FileResponse.accel_redirect(
+                    path_to_download,
+                    pathlib.Path(Configuration.values()["upload_path"]).absolute(),
+                    accel_redirect_location
+                )
+            return FileResponse.build(request, path_to_download, Configuration.values()["downloads"]["chunk_size"])
         else:
-            def build_stream():
-                    stream = zipstream.ZipFile(mode='w', compression=zipstream.ZIP_DEFLATED)
-                    project_path_len = len(str(project.file_directory))
-                    for path in path_to_download.glob("**/*"):
-                        if path.is_file():
-                            stream.write(path, arcname=str(path)[project_path_len:])    # Remove absolut path before project subfolder, including project id
-                    yield from stream
-            response = Response(build_stream(), mimetype='application/zip')
-            response.headers["Content-Disposition"] = f"attachment; filename={project.name}--{path.replace('/', '+')}.zip"
-            return response
+            # Walks the folder to check the fingerprint, which must not block the event loop
+            cached_archive = thread_pool.execute(
+                ResultArchive.get,
+                project.id,
+                project.file_directory,
+                path_to_download,
+                archive_format
+            )
+            if cached_archive is not None:
+                download_name = f"{project.name}--{path.replace('/', '+')}.{archive_format}"
+                accel_redirect_location = Configuration.values()["downloads"]["accel_redirect_location"]
+                if accel_redirect_location is not None:
+                    return FileResponse.accel_redirect(
+                        cached_archive,
+                        pathlib.Path(Configuration.values()["upload_path"]).absolute(),
+                        accel_redirect_location,
+                        download_name=download_name
+                    )
+                return FileResponse.build(
+                    request,
+                    cached_archive,
+                    Configuration.values()["downloads"]["chunk_size"],
+                    download_name=download_name
+                )
+            return ArchiveResponse.build(
+                project.archive_entries([path_to_download]),
+                archive_format,
+                f"{project.name}--{path.replace('/', '+')}"
+            )
 
+    @staticmethod
+    @app.route("/api/projects/<int:id>/download-archive", methods=["POST"])
+    @login_required
+    def download_archive(id: int):
+        """
+        Downloads multiple files and folders in a single archive.
+        Overlapping selections are included once.
 
+        Parameters
+        ----------
+        id : int
+            Project ID
 
+        Returns
+        -------
+        Response
+            200 - archive
+            404 - if project does not exist
+            422 - on error
+        """
+        errors = defaultdict(list)
+        data = request.json
+
+        paths = data.get("paths", None)
+        if paths is None or (isinstance(paths, list) and len(paths) == 0):
+            errors["paths"].append("cannot be empty")
+        elif not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            errors["paths"].append("is not a list of strings")
+
+        archive_format = data.get("format", "zip")
+        if archive_format not in ArchiveResponse.FORMATS:
+            errors["format"].append(f"must be one of {', '.join(ArchiveResponse.FORMATS)}")
+
+        if len(errors) > 0:
+            return jsonify({
+                "errors": errors
+            }), 422
 
+        project = Project.get(Project.id == id)
+        if project is None:
+            return "", 404
+
+        paths_to_download = []
+        for path in paths:
+            try:
+                path_to_download = project.get_path(path)
+            except PermissionError:
+                errors["paths"].append(f"'{path}' is not within the project directory")
+                continue
+            if not path_to_download.exists():
+                errors["paths"].append(f"'{path}' does not exist")
+                continue
+            paths_to_download.append(path_to_download)
+
+        if len(errors) > 0:
+            return jsonify({
+                "errors": errors
+            }), 422
+
+        return ArchiveResponse.build(
+            project.archive_entries(paths_to_download),
+            archive_format,
+            f"{project.name}--selection"
+        )
@@ -0,0 +1,70 @@
+"""Peewee migrations -- 004_create trace events.py.
+
+Some examples (model - class or model name)::
+
+    > Model = migrator.orm['model_name']            # Return model in current state by name
+
+    > migrator.sql(sql)                             # Run custom SQL
+    > migrator.python(func, *args, **kwargs)        # Run python code
+    > migrator.create_model(Model)                  # Create a model (could be used as decorator)
+    > migrator.remove_model(model, cascade=True)    # Remove a model
+    > migrator.add_fields(model, **fields)          # Add fields to a model
+    > migrator.change_fields(model, **fields)       # Change fields
+    > migrator.remove_fields(model, *field_names, cascade=True)
+    > migrator.rename_field(model, old_field_name, new_field_name)
+    > migrator.rename_table(model, new_table_name)
+    > migrator.add_index(model, *col_names, unique=False)
+    > migrator.drop_index(model, *col_names)
+    > migrator.add_not_null(model, *field_names)
+    > migrator.drop_not_null(model, *field_names)
+    > migrator.add_default(model, field_name, default)
+
+"""
+
+import datetime as dt
+import peewee as pw
+from decimal import ROUND_HALF_EVEN
+
+try:
+    import playhouse.postgres_ext as pw_pext
+except ImportError:
+    pass
+
+SQL = pw.SQL
+
+NUMBER_OF_PARTITIONS = 8
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+    # Partitioned by project, so paging through the events of a project
+    # and deleting a project only touches a single partition.
+    migrator.sql("""
+    create table project_trace_events (
+        id bigserial,
+        project_id bigint not null,
+        event varchar(64) not null,
+        run_id varchar(64),
+        run_name varchar(255),
+        task_id integer,
+        process varchar(512),
+        name varchar(1024),
+        status varchar(32),
+        reported_at timestamp not null,
+        trace jsonb not null default '{}'::jsonb,
+        primary key (project_id, id)
+    ) partition by hash (project_id);
+    """)
+    for remainder in range(NUMBER_OF_PARTITIONS):
+        migrator.sql(f"""
+        create table project_trace_events_{remainder} partition of project_trace_events
+            for values with (modulus {NUMBER_OF_PARTITIONS}, remainder {remainder});
+        """)
+
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+    migrator.sql("""
+    drop table project_trace_events;
+    """)
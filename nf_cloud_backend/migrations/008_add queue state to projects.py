@@ -0,0 +1,76 @@
+"""Peewee migrations -- 008_add queue state to projects.py.
+
+Some examples (model - class or model name)::
+
+    > Model = migrator.orm['model_name']            # Return model in current state by name
+
+    > migrator.sql(sql)                             # Run custom SQL
+    > migrator.python(func, *args, **kwargs)        # Run python code
+    > migrator.create_model(Model)                  # Create a model (could be used as decorator)
+    > migrator.remove_model(model, cascade=True)    # Remove a model
+    > migrator.add_fields(model, **fields)          # Add fields to a model
+    > migrator.change_fields(model, **fields)       # Change fields
+    > migrator.remove_fields(model, *field_names, cascade=True)
+    > migrator.rename_field(model, old_field_name, new_field_name)
+    > migrator.rename_table(model, new_table_name)
+    > migrator.add_index(model, *col_names, unique=False)
+    > migrator.drop_index(model, *col_names)
+    > migrator.add_not_null(model, *field_names)
+    > migrator.drop_not_null(model, *field_names)
+    > migrator.add_default(model, field_name, default)
+
+"""
+
+import datetime as dt
+import peewee as pw
+from decimal import ROUND_HALF_EVEN
+
+try:
+    import playhouse.postgres_ext as pw_pext
+except ImportError:
+    pass
+
+SQL = pw.SQL
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+    migrator.sql("""
+    create sequence project_queue_sequence;
+    """)
+    migrator.sql("""
+    alter table projects
+        add column scheduled_at timestamp,
+        add column queue_sequence bigint,
+        add column started_at timestamp,
+        add column finished_at timestamp,
+        add column last_run_duration double precision;
+    """)
+    migrator.sql("""
+    create index projects_queue_sequence_idx on projects (queue_sequence) where is_scheduled;
+    """)
+    migrator.sql("""
+    create index projects_finished_at_idx on projects (finished_at);
+    """)
+
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+    migrator.sql("""
+    drop index projects_finished_at_idx;
+    """)
+    migrator.sql("""
+    drop index projects_queue_sequence_idx;
+    """)
+    migrator.sql("""
+    alter table projects
+        drop column scheduled_at,
+        drop column queue_sequence,
+        drop column started_at,
+        drop column finished_at,
+        drop column last_run_duration;
+    """)
+    migrator.sql("""
+    drop sequence project_queue_sequence;
+    """)
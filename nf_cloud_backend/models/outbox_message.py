@@ -0,0 +1,67 @@
+# std imports
+from __future__ import annotations
+from datetime import datetime
+from typing import ClassVar, Dict, List
+
+# 3rd party imports
+from peewee import BigAutoField, \
+    CharField, \
+    DateTimeField, \
+    TextField
+
+# internal import
+from nf_cloud_backend import db_wrapper as db
+
+class OutboxMessage(db.Model):
+    """
+    Message for RabbitMQ, written in the same transaction as the change it announces
+    and published afterwards by the `OutboxRelay`.
+    """
+
+    id = BigAutoField(primary_key=True)
+    queue = CharField(max_length=255, null=False)
+    body = TextField(null=False)
+    created_at = DateTimeField(null=False, default=datetime.utcnow)
+
+    class Meta:
+        db_table="outbox_messages"
+
+    @classmethod
+    def claim_batch(cls, batch_size: int) -> List[OutboxMessage]:
+        """
+        Locks and returns the oldest messages. Messages locked by other processes are skipped,
+        so multiple relays can run in parallel. Must be called within a transaction.
+
+        Parameters
+        ----------
+        batch_size : int
+            Maximum number of messages
+
+        Returns
+        -------
+        List[OutboxMessage]
+            Messages ordered by ID
+        """
+        return list(
+            cls.select().order_by(cls.id).limit(batch_size).for_update("FOR UPDATE SKIP LOCKED")
+        )
+
+    @staticmethod
+    def group_by_queue(messages: List[OutboxMessage]) -> Dict[str, List[str]]:
+        """
+        Groups the message bodies by queue, keeping their order.
+
+        Parameters
+        ----------
+        messages : List[OutboxMessage]
+            Messages
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            Queue -> bodies
+        """
+        bodies_by_queue: Dict[str, List[str]] = {}
+        for message in messages:
+            bodies_by_queue.setdefault(message.queue, []).append(message.body)
+        return bodies_by_queue
@@ -0,0 +1,177 @@
+# std imports
+import math
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+# 3rd party imports
+from peewee import BigIntegerField, \
+    CharField, \
+    CompositeKey, \
+    DoubleField
+from playhouse.postgres_ext import BinaryJSONField
+
+# internal import
+from nf_cloud_backend import db_wrapper as db
+from nf_cloud_backend.utility.quantile_sketch import QuantileSketch
+
+class ProcessResourceRollup(db.Model):
+    """
+    Incremental aggregate of a resource metric per project and Nextflow process,
+    folded from the traces of completed tasks.
+    """
+
+    project_id = BigIntegerField(null=False)
+    process = CharField(max_length=512, null=False)
+    metric = CharField(max_length=32, null=False)
+    count = BigIntegerField(null=False, default=0)
+    sum = DoubleField(null=False, default=0)
+    min = DoubleField(null=True)
+    max = DoubleField(null=True)
+    sketch = BinaryJSONField(null=False, default={})
+
+    METRICS: ClassVar[Tuple[str, ...]] = (
+        "realtime",
+        "%cpu",
+        "peak_rss",
+        "read_bytes",
+        "write_bytes"
+    )
+    """Trace fields which are aggregated
+    """
+
+    ADVISORY_LOCK_NAMESPACE: ClassVar[int] = 1
+    """First key of the advisory lock which serializes folding per project
+    """
+
+    class Meta:
+        db_table="project_process_resources"
+        primary_key = CompositeKey("project_id", "process", "metric")
+
+    @staticmethod
+    def parse_metric(value: Any) -> Optional[float]:
+        """
+        Parses a metric value from a trace. Nextflow reports missing values as `-` or omits them.
+
+        Parameters
+        ----------
+        value : Any
+            Value from trace
+
+        Returns
+        -------
+        Optional[float]
+            Value or None if not a non-negative number
+        """
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(value) or value < 0:
+            return None
+        return value
+
+    @classmethod
+    def fold_traces(cls, traces: List[Tuple[int, Dict[str, Any]]]):
+        """
+        Folds the given traces into the rollups. The traces are aggregated in memory first,
+        so each project, process and metric results in one upserted row per call.
+        Concurrent calls for the same project are serialized by a transaction level advisory lock.
+
+        Parameters
+        ----------
+        traces : List[Tuple[int, Dict[str, Any]]]
+            Tuples of project ID and trace of a completed task
+        """
+        partials: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+        for project_id, trace in traces:
+            process = trace.get("process", None)
+            if process is None:
+                continue
+            for metric in cls.METRICS:
+                value = cls.parse_metric(trace.get(metric, None))
+                if value is None:
+                    continue
+                partial = partials.setdefault(
+                    (project_id, process, metric),
+                    {
+                        "count": 0,
+                        "sum": 0.0,
+                        "min": value,
+                        "max": value,
+                        "sketch": QuantileSketch()
+                    }
+                )
+                partial["count"] += 1
+                partial["sum"] += value
+                partial["min"] = min(partial["min"], value)
+                partial["max"] = max(partial["max"], value)
+                partial["sketch"].add(value)
+
+        if len(partials) == 0:
+            return
+
+        project_ids = sorted({key[0] for key in partials})
+        with db.database.atomic():
+            # Lock in a fixed order to prevent deadlocks
+            for project_id in project_ids:
+                db.database.execute_sql(
+                    "SELECT pg_advisory_xact_lock(%s, %s)",
+                    (cls.ADVISORY_LOCK_NAMESPACE, project_id)
+                )
+            existing_rollups = {
+                (rollup["project_id"], rollup["process"], rollup["metric"]): rollup
+                for rollup in cls.select().where(cls.project_id.in_(project_ids)).dicts()
+            }
+            rows = []
+            for key, partial in partials.items():
+                rollup = existing_rollups.get(key, None)
+                if rollup is not None:
+                    partial["sketch"].merge(QuantileSketch.from_dict(rollup["sketch"]))
+                    partial["count"] += rollup["count"]
+                    partial["sum"] += rollup["sum"]
+                    if rollup["min"] is not None:
+                        partial["min"] = min(partial["min"], rollup["min"])
+                    if rollup["max"] is not None:
+                        partial["max"] = max(partial["max"], rollup["max"])
+                rows.append({
+                    "project_id": key[0],
+                    "process": key[1],
+                    "metric": key[2],
+                    "count": partial["count"],
+                    "sum": partial["sum"],
+                    "min": partial["min"],
+                    "max": partial["max"],
+                    "sketch": partial["sketch"].to_dict()
+                })
+            cls.insert_many(rows).on_conflict(
+                conflict_target=[cls.project_id, cls.process, cls.metric],
+                preserve=[cls.count, cls.sum, cls.min, cls.max, cls.sketch]
+            ).execute()
+
+    @classmethod
+    def summary(cls, project_id: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Summary of the resource usage by process and metric.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+
+        Returns
+        -------
+        Dict[str, Dict[str, Dict[str, Any]]]
+            Process name -> metric -> count, sum, min, max, mean, p50 and p95
+        """
+        summary: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for rollup in cls.select().where(cls.project_id == project_id).dicts():
+            sketch = QuantileSketch.from_dict(rollup["sketch"])
+            summary.setdefault(rollup["process"], {})[rollup["metric"]] = {
+                "count": rollup["count"],
+                "sum": rollup["sum"],
+                "min": rollup["min"],
+                "max": rollup["max"],
+                "mean": rollup["sum"] / rollup["count"] if rollup["count"] > 0 else None,
+                "p50": sketch.quantile(0.5),
+                "p95": sketch.quantile(0.95)
+            }
+        return summary
@@ -1,21 +1,32 @@
 # std imports
 from __future__ import annotations
-import io
 import json
+import os
 import pathlib
 import shutil
-from typing import Union
+import tempfile
+from datetime import datetime
+from typing import Any, BinaryIO, ClassVar, Dict, Iterator, List, Optional, Tuple, Union
 
 # 3rd party imports
 from peewee import BigAutoField, \
+    BigIntegerField, \
     CharField, \
     BooleanField, \
-    IntegerField
+    DateTimeField, \
+    FloatField, \
+    IntegerField, \
+    fn
 from playhouse.postgres_ext import BinaryJSONField
 
 # internal import
 from nf_cloud_backend import db_wrapper as db
+from nf_cloud_backend import thread_pool
+from nf_cloud_backend.models.process_resource_rollup import ProcessResourceRollup
+from nf_cloud_backend.models.project_file import ProjectFile
+from nf_cloud_backend.models.trace_event import TraceEvent
 from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.result_archive import ResultArchive
 
 class Project(db.Model):
     id = BigAutoField(primary_key=True)
@@ -25,6 +36,27 @@ class Project(db.Model):
     is_scheduled = BooleanField(null=False, default=False)
     submitted_processes = IntegerField(null=False, default=0)
     completed_processes = IntegerField(null=False, default=0)
+    scheduled_at = DateTimeField(null=True)
+    queue_sequence = BigIntegerField(null=True)
+    started_at = DateTimeField(null=True)
+    finished_at = DateTimeField(null=True)
+    last_run_duration = FloatField(null=True)
+
+    DICT_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "id",
+        "name",
+        "workflow_arguments",
+        "workflow",
+        "submitted_processes",
+        "completed_processes",
+        "is_scheduled"
+    )
+    """Fields contained in the dictionary representation, see `to_dict`
+    """
+
+    QUEUE_SEQUENCE: ClassVar[str] = "project_queue_sequence"
+    """Database sequence numbering the scheduled projects in queue order
+    """
 
     class Meta:
         db_table="projects"
@@ -32,24 +64,33 @@ class Project(db.Model):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.__file_directory = None
-        self.__create_file_directory()
 
     @property
     def file_directory(self) -> pathlib.Path:
+        """
+        Project's file directory. Only resolved, it may not exist yet, see `create_file_directory`.
+        """
+        if self.__file_directory is None or self.__file_directory.name != str(self.id):
+            self.__file_directory = pathlib.Path(Configuration.values()["upload_path"]).joinpath(str(self.id)).absolute()
         return self.__file_directory
 
-    def __create_file_directory(self):
-        self.__file_directory = pathlib.Path(Configuration.values()["upload_path"]).joinpath(str(self.id)).absolute()
-        self.__file_directory.mkdir(parents=True, exist_ok=True)
+    def create_file_directory(self):
+        """
+        Creates the file directory if it does not exists.
+        Should only be called on write paths, as the upload directory may be on a network filesystem.
+        """
+        self.file_directory.mkdir(parents=True, exist_ok=True)
 
     def __delete_file_directory(self):
-        shutil.rmtree(self.file_directory)
+        if self.file_directory.is_dir():
+            # Large directories take a while, do not block the event loop
+            thread_pool.execute(shutil.rmtree, self.file_directory)
         self.__file_directory = None
 
     def delete_instance(self, recursive=False, delete_nullable=False):
         """
         Overrides the original delete_instance.
-        Removes the file directory if a row was deleted.
+        Removes the file directory, file index, cached archives, trace events and resource rollups if a row was deleted.
 
         Parameters
         ----------
@@ -60,9 +101,116 @@ class Project(db.Model):
         """
         deleted_rows = super().delete_instance(recursive=False, delete_nullable=False)
         if deleted_rows > 0:
+            TraceEvent.delete().where(TraceEvent.project_id == self.id).execute()
+            ProcessResourceRollup.delete().where(ProcessResourceRollup.project_id == self.id).execute()
+            ProjectFile.delete().where(ProjectFile.project_id == self.id).execute()
+            thread_pool.execute(ResultArchive.delete, self.id)
             self.__delete_file_directory()
 
 
+    @classmethod
+    def increment_process_counters(cls, project_id: int, submitted: int = 0, completed: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Increments the process counters of the given project with a single atomic UPDATE,
+        so concurrent weblog events do not override each other and no row needs to be fetched before.
+        Submitted processes also set the run's start time, if not set yet.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        submitted : int, optional
+            Number of newly submitted processes, by default 0
+        completed : int, optional
+            Number of newly completed processes, by default 0
+
+        Returns
+        -------
+        Optional[Tuple[int, int]]
+            Updated submitted and completed processes or None if the project does not exist
+        """
+        update = {
+            "submitted_processes": cls.submitted_processes + submitted,
+            "completed_processes": cls.completed_processes + completed
+        }
+        if submitted > 0:
+            # The first submitted process marks the start of the run
+            update["started_at"] = fn.COALESCE(cls.started_at, datetime.utcnow())
+        updated_counters = cls.update(update).where(
+            cls.id == project_id
+        ).returning(
+            cls.submitted_processes,
+            cls.completed_processes
+        ).tuples().execute()
+        return next(iter(updated_counters), None)
+
+    @classmethod
+    def mark_scheduled(cls, project_ids: List[int]) -> Dict[int, Tuple[datetime, int]]:
+        """
+        Schedules the given projects with a single UPDATE, skipping projects which are already scheduled.
+        Each project gets the current time and a number from the queue sequence, so its position in the queue can be estimated.
+
+        Parameters
+        ----------
+        project_ids : List[int]
+            Project IDs
+
+        Returns
+        -------
+        Dict[int, Tuple[datetime, int]]
+            Schedule time and queue sequence number by ID of the scheduled projects
+        """
+        scheduled_at = datetime.utcnow()
+        scheduled_projects = cls.update(
+            is_scheduled=True,
+            scheduled_at=scheduled_at,
+            queue_sequence=fn.nextval(cls.QUEUE_SEQUENCE),
+            started_at=None
+        ).where(
+            cls.id.in_(project_ids),
+            cls.is_scheduled == False # pylint: disable=singleton-comparison
+        ).returning(
+            cls.id,
+            cls.queue_sequence
+        ).tuples().execute()
+        return {
+            project_id: (scheduled_at, queue_sequence)
+            for project_id, queue_sequence in scheduled_projects
+        }
+
+    def mark_finished(self):
+        """
+        Resets the run state and stores the run's duration, measured from start or, if the run never started, from scheduling.
+        """
+        self.finished_at = datetime.utcnow()
+        run_start = self.started_at or self.scheduled_at
+        if self.is_scheduled and run_start is not None:
+            self.last_run_duration = (self.finished_at - run_start).total_seconds()
+        self.is_scheduled = False
+        self.submitted_processes = 0
+        self.completed_processes = 0
+        self.save()
+
+    def get_queue_position(self) -> Tuple[Optional[int], int]:
+        """
+        Counts the scheduled projects ahead of this project with one query.
+
+        Returns
+        -------
+        Tuple[Optional[int], int]
+            1-based position among the scheduled projects which were not started yet
+            (None if this project is not waiting) and number of running projects
+        """
+        is_waiting = self.is_scheduled and self.started_at is None and self.queue_sequence is not None
+        waiting_ahead = fn.COUNT(Project.id).filter(
+            Project.started_at.is_null() & (Project.queue_sequence < self.queue_sequence)
+        ) if is_waiting else fn.COUNT(None)
+        running = fn.COUNT(Project.id).filter(Project.started_at.is_null(False))
+        ahead, running = Project.select(waiting_ahead, running).where(
+            Project.is_scheduled == True # pylint: disable=singleton-comparison
+        ).tuples().get()
+        return (ahead + 1 if is_waiting else None), running
+
     def to_dict(self) -> str:
         """
         Returns
@@ -141,9 +289,9 @@ class Project(db.Model):
         else:
             raise PermissionError("Path is not within the project directory.")
 
-    def add_file(self, directory: str, filename: str, file: Union[io.BytesIO, io.StringIO]):
+    def get_new_file_path(self, directory: str, filename: str) -> pathlib.Path:
         """
-        Add file to directory
+        Returns the path for a new file in the given directory and creates the directory if necessary.
 
         Parameters
         ----------
@@ -151,14 +299,72 @@ class Project(db.Model):
             Target directory
         filename : str
             Filename
-        file : Union[io.BytesIO, io.StringIO]
-            File
+
+        Returns
+        -------
+        pathlib.Path
+            Absolute path of the new file
+
+        Raises
+        ------
+        ValueError
+            If the filename is empty or contains a path
+        PermissionError
+            If the directory is outside the project directory
         """
+        if filename in ["", ".", ".."] or pathlib.PurePath(filename).name != filename:
+            raise ValueError("filename must not be empty or contain a path")
         target_directory = self.get_path(directory)
-        if not target_directory.is_dir():
-            target_directory.mkdir(parents=True, exist_ok=True)
-        with target_directory.joinpath(filename).open("wb") as project_file:
-            project_file.write(file)
+        # Creates the file directory as well
+        target_directory.mkdir(parents=True, exist_ok=True)
+        return target_directory.joinpath(filename)
+
+    def add_file(self, directory: str, filename: str, file: Union[bytes, BinaryIO]):
+        """
+        Add file to directory. The content is written to a temporary file within the target directory,
+        which is renamed to the final filename when complete, so a failed upload never leaves a partial file.
+        Streams are copied in chunks of `uploads.chunk_size` bytes. Chunks are read in the calling thread,
+        as the stream may be a green socket, but written by the thread pool.
+
+        Parameters
+        ----------
+        directory : str
+            Target directory
+        filename : str
+            Filename
+        file : Union[bytes, BinaryIO]
+            File content or binary stream
+
+        Raises
+        ------
+        ValueError
+            If the filename is empty or contains a path
+        """
+        file_path = self.get_new_file_path(directory, filename)
+        temporary_file = tempfile.NamedTemporaryFile(
+            mode="wb",
+            dir=file_path.parent,
+            prefix=f".{filename}.",
+            suffix=".part",
+            delete=False
+        )
+        try:
+            with temporary_file:
+                if isinstance(file, bytes):
+                    thread_pool.execute(temporary_file.write, file)
+                else:
+                    chunk_size = Configuration.values()["uploads"]["chunk_size"]
+                    while True:
+                        chunk = file.read(chunk_size)
+                        if not chunk:
+                            break
+                        thread_pool.execute(temporary_file.write, chunk)
+            os.replace(temporary_file.name, file_path)
+        except BaseException:
+            pathlib.Path(temporary_file.name).unlink(missing_ok=True)
+            raise
+        ProjectFile.add_path(self.id, self.file_directory, file_path)
+        thread_pool.execute(ResultArchive.invalidate, self.id, self.file_directory, file_path)
 
     def remove_path(self, path: str) -> bool:
         """
@@ -174,13 +380,35 @@ class Project(db.Model):
         Returns true (file was deleted) or false (file does not exists) 
         """
         full_path = self.get_path(path)
-        if full_path.is_file():
-            full_path.unlink()
-            return True
-        elif full_path.is_dir():
-            shutil.rmtree(full_path)
-            return True
-        return False
+        # Large directories take a while, do not block the event loop
+        if not thread_pool.execute(self.__remove_from_file_system, full_path):
+            return False
+        ProjectFile.remove_path(self.id, self.file_directory, full_path)
+        thread_pool.execute(ResultArchive.invalidate, self.id, self.file_directory, full_path)
+        return True
+
+    @staticmethod
+    def __remove_from_file_system(path: pathlib.Path) -> bool:
+        """
+        Removes the given file or folder.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            Absolute path
+
+        Returns
+        -------
+        bool
+            True if removed, False if the path does not exist
+        """
+        if path.is_file():
+            path.unlink()
+        elif path.is_dir():
+            shutil.rmtree(path)
+        else:
+            return False
+        return True
 
     def create_folder(self, target_path: str, new_path: str) -> bool:
         """
@@ -204,10 +432,80 @@ class Project(db.Model):
         path_to_create = target_path.joinpath(new_path)
 
         if not path_to_create.is_dir():
+            # Creates the file directory as well
             path_to_create.mkdir(parents=True, exist_ok=True)
+            ProjectFile.add_path(self.id, self.file_directory, path_to_create)
             return True
         return False
 
+    def archive_entries(self, paths: List[pathlib.Path]) -> Iterator[Tuple[pathlib.Path, str]]:
+        """
+        Yields the files of the given paths for an archive. Paths within other given folders
+        and duplicates are skipped, so each file is yielded once. Folders are walked lazily.
+
+        Parameters
+        ----------
+        paths : List[pathlib.Path]
+            Absolute files or folders within the file directory, see `get_path`
+
+        Yields
+        ------
+        Iterator[Tuple[pathlib.Path, str]]
+            File and its name within the archive (relative path within the file directory)
+        """
+        selected_paths = set(paths)
+        for path in sorted(selected_paths):
+            if any(parent in selected_paths for parent in path.parents):
+                continue
+            if path.is_file():
+                yield path, path.relative_to(self.file_directory).as_posix()
+            elif path.is_dir():
+                for relative_path, is_directory, _, _ in ProjectFile.walk(path):
+                    if not is_directory:
+                        file_path = path.joinpath(relative_path)
+                        yield file_path, file_path.relative_to(self.file_directory).as_posix()
+
+    def reconcile_file_index(self):
+        """
+        Rebuilds the file index from the disk, e.g. after a run.
+        """
+        ProjectFile.reconcile(self.id, self.file_directory)
+
+    def search_files(self, glob: str, after: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Searches the file index by glob.
+
+        Parameters
+        ----------
+        glob : str
+            Glob relative to the file directory, e.g. `results/**/*.bam`
+        after : Optional[str], optional
+            Last path of the previous page, by default None
+        limit : int, optional
+            Page size, by default 100
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Matching paths with `path`, `is_directory`, `size` and `mtime`
+        """
+        return ProjectFile.search(self.id, glob, after, limit)
+
+    def validate_workflow_arguments(self) -> Dict[str, List[str]]:
+        """
+        Checks if all workflow arguments have a value.
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            Errors by argument name, empty if valid
+        """
+        errors = {}
+        for arg_name, arg_definition in self.workflow_arguments.items():
+            if arg_definition.get("value") is None:
+                errors[arg_name] = ["cannot be empty"]
+        return errors
+
     def get_queue_represenation(self) -> str:
         """
         Returns
@@ -217,5 +515,7 @@ class Project(db.Model):
         return json.dumps({
             "id": self.id,
             "workflow": self.workflow,
-            "workflow_arguments": self.workflow_arguments
+            "workflow_arguments": self.workflow_arguments,
+            "scheduled_at": self.scheduled_at.isoformat() if self.scheduled_at is not None else None,
+            "queue_sequence": self.queue_sequence
         })
\ No newline at end of file
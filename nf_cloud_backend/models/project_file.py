@@ -0,0 +1,332 @@
+# std imports
+import os
+import pathlib
+import re
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple
+
+# 3rd party imports
+from peewee import BigIntegerField, \
+    BooleanField, \
+    CharField, \
+    CompositeKey, \
+    DoubleField
+
+# internal import
+from nf_cloud_backend import db_wrapper as db
+from nf_cloud_backend import thread_pool
+from nf_cloud_backend.utility.directory_listing import DirectoryListing
+
+class ProjectFile(db.Model):
+    """
+    Index of the files and folders within a project's file directory, so searching
+    does not need to walk the disk. Paths are relative to the project's file directory.
+    The index is updated incrementally by the project's file operations
+    and reconciled with the disk after each run.
+    """
+
+    project_id = BigIntegerField(null=False)
+    path = CharField(max_length=4096, null=False)
+    is_directory = BooleanField(null=False)
+    size = BigIntegerField(null=False, default=0)
+    mtime = DoubleField(null=False)
+
+    INSERT_CHUNK_SIZE: ClassVar[int] = 1000
+    """Maximum number of rows per INSERT statement
+    """
+
+    GLOB_SPECIAL_CHARACTERS: ClassVar[re.Pattern] = re.compile(r"[\*\?\[]")
+    """Characters with special meaning in globs
+    """
+
+    class Meta:
+        db_table="project_files"
+        primary_key = CompositeKey("project_id", "path")
+
+    @staticmethod
+    def row_from_path(project_id: int, relative_path: str, absolute_path: pathlib.Path) -> Optional[Dict[str, Any]]:
+        """
+        Creates an index row for the given path.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        relative_path : str
+            Path relative to the project's file directory
+        absolute_path : pathlib.Path
+            Absolute path
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            Row or None if the path does not exist
+        """
+        try:
+            stat = absolute_path.stat()
+        except FileNotFoundError:
+            return None
+        is_directory = absolute_path.is_dir()
+        return {
+            "project_id": project_id,
+            "path": relative_path,
+            "is_directory": is_directory,
+            "size": 0 if is_directory else stat.st_size,
+            "mtime": stat.st_mtime
+        }
+
+    @classmethod
+    def upsert_rows(cls, rows: List[Dict[str, Any]]):
+        """
+        Inserts or updates the given rows.
+
+        Parameters
+        ----------
+        rows : List[Dict[str, Any]]
+            Rows as created by `row_from_path`
+        """
+        with db.database.atomic():
+            for chunk_start in range(0, len(rows), cls.INSERT_CHUNK_SIZE):
+                cls.insert_many(
+                    rows[chunk_start:chunk_start + cls.INSERT_CHUNK_SIZE]
+                ).on_conflict(
+                    conflict_target=[cls.project_id, cls.path],
+                    preserve=[cls.is_directory, cls.size, cls.mtime]
+                ).execute()
+
+    @classmethod
+    def add_path(cls, project_id: int, file_directory: pathlib.Path, absolute_path: pathlib.Path):
+        """
+        Adds or updates the given path and all its parents within the file directory.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        absolute_path : pathlib.Path
+            Absolute path within the file directory
+        """
+        try:
+            relative_path = absolute_path.relative_to(file_directory)
+        except ValueError:
+            # Not within the file directory
+            return
+        rows = []
+        for path in [relative_path] + list(relative_path.parents)[:-1]:   # last parent is '.'
+            row = cls.row_from_path(project_id, path.as_posix(), file_directory.joinpath(path))
+            if row is not None:
+                rows.append(row)
+        if len(rows) > 0:
+            cls.upsert_rows(rows)
+
+    @staticmethod
+    def __escape_like(value: str) -> str:
+        """
+        Escapes the wildcards of SQL's LIKE (case sensitive, peewee's `%` operator).
+
+        Parameters
+        ----------
+        value : str
+            Value to escape
+
+        Returns
+        -------
+        str
+            Escaped value
+        """
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @classmethod
+    def remove_path(cls, project_id: int, file_directory: pathlib.Path, absolute_path: pathlib.Path):
+        """
+        Removes the given path and, if it is a folder, its content from the index.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        absolute_path : pathlib.Path
+            Absolute path within the file directory
+        """
+        if absolute_path == file_directory:
+            cls.delete().where(cls.project_id == project_id).execute()
+            return
+        relative_path = absolute_path.relative_to(file_directory).as_posix()
+        cls.delete().where(
+            cls.project_id == project_id,
+            (cls.path == relative_path) | (cls.path % f"{cls.__escape_like(relative_path)}/%")
+        ).execute()
+
+    @staticmethod
+    def walk(file_directory: pathlib.Path) -> Iterator[Tuple[str, bool, int, float]]:
+        """
+        Walks the file directory with `os.scandir`.
+
+        Parameters
+        ----------
+        file_directory : pathlib.Path
+            Project's file directory
+
+        Yields
+        ------
+        Iterator[Tuple[str, bool, int, float]]
+            Relative path, is directory, size and mtime
+        """
+        directories = [""]
+        while len(directories) > 0:
+            relative_directory = directories.pop()
+            try:
+                with os.scandir(file_directory.joinpath(relative_directory)) as entries:
+                    for entry in entries:
+                        relative_path = f"{relative_directory}/{entry.name}" if relative_directory else entry.name
+                        stat = DirectoryListing.stat_entry(entry)
+                        if stat is None:
+                            continue
+                        is_directory = entry.is_dir()
+                        # Do not descend into linked folders, which may result in loops
+                        if is_directory and not entry.is_symlink():
+                            directories.append(relative_path)
+                        yield relative_path, is_directory, 0 if is_directory else stat.st_size, stat.st_mtime
+            except OSError:
+                # Vanished or not accessible
+                continue
+
+    @classmethod
+    def walk_chunks(cls, project_id: int, file_directory: pathlib.Path) -> List[List[Tuple[int, str, bool, int, float]]]:
+        """
+        Walks the file directory and returns the index rows in chunks of `INSERT_CHUNK_SIZE`.
+        Rows are tuples, which take less memory than dictionaries for large trees.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+
+        Returns
+        -------
+        List[List[Tuple[int, str, bool, int, float]]]
+            Chunks of project ID, relative path, is directory, size and mtime
+        """
+        chunks = []
+        rows = []
+        for path, is_directory, size, mtime in cls.walk(file_directory):
+            rows.append((project_id, path, is_directory, size, mtime))
+            if len(rows) >= cls.INSERT_CHUNK_SIZE:
+                chunks.append(rows)
+                rows = []
+        if len(rows) > 0:
+            chunks.append(rows)
+        return chunks
+
+    @classmethod
+    def reconcile(cls, project_id: int, file_directory: pathlib.Path):
+        """
+        Rebuilds the index of the project from the disk, e.g. after a run created new results.
+        The walk runs in a native thread, so large trees do not block the event loop.
+        Readers see either the old or the new index, as the rows are replaced in one transaction,
+        which is only opened after the walk.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        """
+        chunks = thread_pool.execute(cls.walk_chunks, project_id, file_directory)
+        with db.database.atomic():
+            cls.delete().where(cls.project_id == project_id).execute()
+            for rows in chunks:
+                cls.insert_many(
+                    rows,
+                    fields=[cls.project_id, cls.path, cls.is_directory, cls.size, cls.mtime]
+                ).execute()
+
+    @classmethod
+    def glob_to_regex(cls, glob: str) -> str:
+        """
+        Translates a glob into a PostgreSQL regular expression matching the whole relative path.
+        `**/` matches any number of folders, `*` any characters except `/`, `?` a single character except `/`
+        and `[...]` a character class.
+
+        Parameters
+        ----------
+        glob : str
+            Glob, e.g. `results/**/*.bam`
+
+        Returns
+        -------
+        str
+            Regular expression
+        """
+        regex = "^"
+        position = 0
+        while position < len(glob):
+            if glob.startswith("**/", position):
+                regex += "(.*/)?"
+                position += 3
+            elif glob.startswith("**", position):
+                regex += ".*"
+                position += 2
+            elif glob[position] == "*":
+                regex += "[^/]*"
+                position += 1
+            elif glob[position] == "?":
+                regex += "[^/]"
+                position += 1
+            elif glob[position] == "[" and "]" in glob[position + 2:]:
+                end = glob.index("]", position + 2)
+                character_class = glob[position + 1:end].replace("\\", "\\\\")
+                if character_class.startswith("!"):
+                    character_class = "^" + character_class[1:]
+                regex += f"[{character_class}]"
+                position = end + 1
+            else:
+                regex += re.escape(glob[position])
+                position += 1
+        return regex + "$"
+
+    @classmethod
+    def search(cls, project_id: int, glob: str, after: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Searches the index by glob, ordered by path.
+        The literal prefix of the glob narrows the search by index before the regular expression is applied.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        glob : str
+            Glob, relative to the project's file directory, see `glob_to_regex`
+        after : Optional[str], optional
+            Last path of the previous page, by default None
+        limit : int, optional
+            Page size, by default 100
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Matching paths with `path`, `is_directory`, `size` and `mtime`
+        """
+        glob = glob.lstrip("/")
+        query = cls.select(
+            cls.path,
+            cls.is_directory,
+            cls.size,
+            cls.mtime
+        ).where(
+            cls.project_id == project_id,
+            cls.path.regexp(cls.glob_to_regex(glob))
+        )
+        special_character_match = cls.GLOB_SPECIAL_CHARACTERS.search(glob)
+        literal_prefix = glob[:special_character_match.start()] if special_character_match else glob
+        if len(literal_prefix) > 0:
+            query = query.where(cls.path % f"{cls.__escape_like(literal_prefix)}%")
+        if after is not None:
+            query = query.where(cls.path > after)
+        return list(query.order_by(cls.path).limit(limit).dicts())
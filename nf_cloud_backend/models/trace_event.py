@@ -0,0 +1,120 @@
+# std imports
+from datetime import datetime, timezone
+from typing import Any, ClassVar, Dict, List, Tuple
+
+# 3rd party imports
+from peewee import BigAutoField, \
+    BigIntegerField, \
+    CharField, \
+    DateTimeField, \
+    IntegerField
+from playhouse.postgres_ext import BinaryJSONField
+
+# internal import
+from nf_cloud_backend import db_wrapper as db
+
+class TraceEvent(db.Model):
+    """
+    Process trace reported by Nextflow's weblog.
+    The table is hash partitioned by project, see migration `004_create trace events`.
+    """
+
+    id = BigAutoField(primary_key=True)
+    project_id = BigIntegerField(null=False)
+    event = CharField(max_length=64, null=False)
+    run_id = CharField(max_length=64, null=True)
+    run_name = CharField(max_length=255, null=True)
+    task_id = IntegerField(null=True)
+    process = CharField(max_length=512, null=True)
+    name = CharField(max_length=1024, null=True)
+    status = CharField(max_length=32, null=True)
+    reported_at = DateTimeField(null=False)
+    trace = BinaryJSONField(null=False, default={})
+
+    WEBLOG_EVENTS: ClassVar[Tuple[str, ...]] = (
+        "process_submitted",
+        "process_started",
+        "process_completed"
+    )
+    """Weblog events which are stored
+    """
+
+    INSERT_CHUNK_SIZE: ClassVar[int] = 1000
+    """Maximum number of rows per INSERT statement
+    """
+
+    class Meta:
+        db_table="project_trace_events"
+
+    @staticmethod
+    def from_weblog(project_id: int, workflow_log: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Converts a weblog message into a row for insertion.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        workflow_log : Dict[str, Any]
+            Weblog message containing `event` and `trace`
+
+        Returns
+        -------
+        Dict[str, Any]
+            Row
+        """
+        trace = workflow_log["trace"]
+        try:
+            reported_at = datetime.fromisoformat(
+                workflow_log.get("utcTime", "").replace("Z", "+00:00")
+            ).astimezone(timezone.utc).replace(tzinfo=None)
+        except ValueError:
+            reported_at = datetime.utcnow()
+        return {
+            "project_id": project_id,
+            "event": workflow_log["event"],
+            "run_id": workflow_log.get("runId", None),
+            "run_name": workflow_log.get("runName", None),
+            "task_id": trace.get("task_id", None),
+            "process": trace.get("process", None),
+            "name": trace.get("name", None),
+            "status": trace.get("status", None),
+            "reported_at": reported_at,
+            "trace": trace
+        }
+
+    @classmethod
+    def insert_batch(cls, rows: List[Dict[str, Any]]):
+        """
+        Inserts the given rows with multi-row INSERTs in one transaction.
+
+        Parameters
+        ----------
+        rows : List[Dict[str, Any]]
+            Rows as returned by `from_weblog`
+        """
+        with db.database.atomic():
+            for chunk_start in range(0, len(rows), cls.INSERT_CHUNK_SIZE):
+                cls.insert_many(
+                    rows[chunk_start:chunk_start + cls.INSERT_CHUNK_SIZE]
+                ).execute()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns
+        -------
+        Dict[str, Any]
+            Trace event as dictionary
+        """
+        return {
+            "id": self.id,
+            "event": self.event,
+            "run_id": self.run_id,
+            "run_name": self.run_name,
+            "task_id": self.task_id,
+            "process": self.process,
+            "name": self.name,
+            "status": self.status,
+            "reported_at": self.reported_at.isoformat(),
+            "trace": self.trace
+        }
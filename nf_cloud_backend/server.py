@@ -1,12 +1,19 @@
 # std imports
+import os
 from typing import Optional
 
 # 3rd party imports
 from flask import Flask
 
 # internal imports
-from nf_cloud_backend import app, socketio
+from nf_cloud_backend import app, socketio, matomo_tracker
+from nf_cloud_backend.controllers.api.projects_controller import (
+    trace_event_writer,
+    resource_rollup_writer,
+    outbox_relay
+)
 from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.rabbit_mq import RabbitMQ
 
 def get_app() -> Flask:
     """
@@ -17,6 +24,7 @@ def get_app() -> Flask:
     Flask
         Flask application
     """
+    Server.start_background_tasks()
     return app
 
 class Server:
@@ -24,11 +32,28 @@ class Server:
     Flask web server control.
     """
 
+    @classmethod
+    def start_background_tasks(cls):
+        """
+        Starts the background tasks of this process, e.g. the buffered trace writers, the outbox relay
+        and the heartbeats of the RabbitMQ publisher.
+        Only called when serving, so CLI commands like `database migrate` do not start them.
+        """
+        trace_event_writer.start(socketio.start_background_task, socketio.sleep)
+        resource_rollup_writer.start(socketio.start_background_task, socketio.sleep)
+        outbox_relay.start(socketio.start_background_task)
+        RabbitMQ.start_heartbeats(socketio.start_background_task, socketio.sleep)
+        if Configuration.values()["matomo"]["enabled"]:
+            matomo_tracker.start(socketio.start_background_task)
+
     @classmethod
     def start(cls, interface: Optional[str] = None, port: Optional[int] = None):
         """
         Starts the flask web server.
         """
+        # In debug mode the reloader serves from a child process, the parent only watches the files
+        if not Configuration.values()['debug'] or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            cls.start_background_tasks()
         socketio.run(
             app,
             interface if interface is not None else Configuration.values()['interface'],
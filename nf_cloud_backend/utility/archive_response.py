@@ -0,0 +1,106 @@
+# std imports
+import itertools
+import pathlib
+from typing import ClassVar, Dict, Iterable, Optional, Tuple
+
+# 3rd party imports
+from flask import Response
+
+# internal imports
+from nf_cloud_backend import thread_pool
+from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.file_response import FileResponse
+from nf_cloud_backend.utility.tar_stream import TarStream
+from nf_cloud_backend.utility.zip_stream import ZipStream
+
+class ArchiveResponse:
+    """
+    Builds streamed archive responses for folder downloads.
+    """
+
+    FORMATS: ClassVar[Dict[str, str]] = {
+        "zip": "application/zip",
+        "tar": "application/x-tar",
+        "tar.zst": "application/zstd"
+    }
+    """Supported formats and their mimetypes
+    """
+
+    @classmethod
+    def stream(cls, entries: Iterable[Tuple[pathlib.Path, str]], archive_format: str) -> Tuple[Iterable[bytes], Optional[int]]:
+        """
+        Creates the archive stream.
+        * `zip` is compressed in parallel, see `ZipStream`
+        * `tar` is not compressed. Up to `archives.tar_size_max_files` files, the size is computed before streaming,
+          larger archives are streamed without a known size, so the members are never held in memory at once
+        * `tar.zst` is compressed by multithreaded zstd
+
+        Parameters
+        ----------
+        entries : Iterable[Tuple[pathlib.Path, str]]
+            Files and their names within the archive
+        archive_format : str
+            One of `FORMATS`
+
+        Returns
+        -------
+        Tuple[Iterable[bytes], Optional[int]]
+            Archive stream and its size, if known in advance
+
+        Raises
+        ------
+        ValueError
+            If the format is not supported
+        """
+        archive_config = Configuration.values()["archives"]
+        if archive_format == "zip":
+            return ZipStream(
+                entries,
+                thread_pool,
+                archive_config["compression_level"],
+                archive_config["block_size"],
+                thread_pool.size * 2
+            ), None
+        if archive_format == "tar":
+            max_files = archive_config["tar_size_max_files"]
+            entries = iter(entries)
+            # Folders are walked while taking the entries, so it is done on the thread pool
+            first_entries = thread_pool.execute(list, itertools.islice(entries, max_files + 1))
+            if len(first_entries) <= max_files:
+                stream = TarStream(first_entries, thread_pool, archive_config["block_size"], precompute_size=True)
+                return stream, stream.size
+            return TarStream(itertools.chain(first_entries, entries), thread_pool, archive_config["block_size"]), None
+        if archive_format == "tar.zst":
+            return TarStream.compress_zstd(
+                TarStream(entries, thread_pool, archive_config["block_size"]),
+                archive_config["zstd_level"],
+                archive_config["zstd_threads"],
+                thread_pool
+            ), None
+        raise ValueError(f"format must be one of {', '.join(cls.FORMATS)}")
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[pathlib.Path, str]], archive_format: str, filename: str) -> Response:
+        """
+        Builds the response, see `stream`.
+
+        Parameters
+        ----------
+        entries : Iterable[Tuple[pathlib.Path, str]]
+            Files and their names within the archive
+        archive_format : str
+            One of `FORMATS`
+        filename : str
+            Filename without extension
+
+        Returns
+        -------
+        Response
+            Streamed archive
+        """
+        stream, size = cls.stream(entries, archive_format)
+        response = Response(stream, mimetype=cls.FORMATS[archive_format])
+        if size is not None:
+            response.content_length = size
+        FileResponse.set_attachment(response, f"{filename}.{archive_format}")
+        return response
@@ -0,0 +1,124 @@
+# std imports
+import atexit
+import threading
+import traceback
+from typing import Any, Callable, List, Optional
+
+# 3rd party imports
+from flask import Flask
+from peewee import Database
+
+class BufferedWriter:
+    """
+    Collects items in memory and writes them in batches, so high frequency
+    events result in one multi-row statement instead of one statement per item.
+    A batch is written as soon as `batch_size` items are buffered or
+    `flush_interval` seconds are passed, whatever comes first.
+    Remaining items are written on shutdown.
+
+    Attributes
+    ----------
+    __write_batch : Callable[[List[Any]], None]
+        Function which writes a list of items to the database
+    __batch_size : int
+        Number of items which trigger a write
+    __flush_interval : float
+        Seconds between periodic writes
+    __database : Database
+        Database for opening connections outside of requests
+    __app : Flask
+        Flask application for logging
+    __buffer : List[Any]
+        Buffered items
+    __lock : threading.Lock
+        Lock for the buffer
+    __is_started : bool
+        True if the periodic flush is running
+    """
+
+    def __init__(self, write_batch: Callable[[List[Any]], None], batch_size: int, flush_interval: float,
+        database: Database, app: Flask):
+        self.__write_batch: Callable[[List[Any]], None] = write_batch
+        self.__batch_size: int = batch_size
+        self.__flush_interval: float = flush_interval
+        self.__database: Database = database
+        self.__app: Flask = app
+        self.__buffer: List[Any] = []
+        self.__lock: threading.Lock = threading.Lock()
+        self.__is_started: bool = False
+
+    def add(self, item: Any):
+        """
+        Adds an item to the buffer. If the buffer is full, the batch is written
+        within the current request, using its database connection.
+
+        Parameters
+        ----------
+        item : Any
+            Item to write
+        """
+        batch: Optional[List[Any]] = None
+        with self.__lock:
+            self.__buffer.append(item)
+            if len(self.__buffer) >= self.__batch_size:
+                batch = self.__swap_buffer()
+        if batch is not None:
+            self.__write_batch(batch)
+
+    def flush(self):
+        """
+        Writes all buffered items using a separate database connection.
+        """
+        with self.__lock:
+            batch = self.__swap_buffer()
+        if len(batch) == 0:
+            return
+        try:
+            with self.__database.connection_context():
+                self.__write_batch(batch)
+        except Exception: # pylint: disable=broad-except
+            self.__app.logger.error(traceback.format_exc()) # pylint: disable=no-member
+
+    def start(self, start_background_task: Callable[..., Any], sleep: Callable[[float], Any]):
+        """
+        Starts the periodic flush and registers a final flush on shutdown.
+        Does nothing if already started.
+
+        Parameters
+        ----------
+        start_background_task : Callable[..., Any]
+            Function to start a background task, e.g. `SocketIO.start_background_task` which respects the async mode
+        sleep : Callable[[float], Any]
+            Sleep function matching the background task, e.g. `SocketIO.sleep`
+        """
+        if self.__is_started:
+            return
+        self.__is_started = True
+        start_background_task(self.__flush_periodically, sleep)
+        atexit.register(self.flush)
+
+    def __flush_periodically(self, sleep: Callable[[float], Any]):
+        """
+        Flushes the buffer every `flush_interval` seconds.
+
+        Parameters
+        ----------
+        sleep : Callable[[float], Any]
+            Sleep function
+        """
+        while True:
+            sleep(self.__flush_interval)
+            self.flush()
+
+    def __swap_buffer(self) -> List[Any]:
+        """
+        Replaces the buffer with an empty one. Must be called with acquired lock.
+
+        Returns
+        -------
+        List[Any]
+            Previous buffer
+        """
+        batch = self.__buffer
+        self.__buffer = []
+        return batch
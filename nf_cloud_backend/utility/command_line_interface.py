@@ -22,6 +22,7 @@ class ComandLineInterface:
         local_subparsers: argparse._SubParsersAction = parser.add_subparsers()
         cls.add_rabbitmq_cli_arguments(local_subparsers)
         cls.add_configuration_cli_arguments(local_subparsers)
+        cls.add_file_index_cli_arguments(local_subparsers)
 
     @classmethod
     def add_rabbitmq_cli_arguments(cls, subparsers: argparse._SubParsersAction):
@@ -52,4 +53,42 @@ class ComandLineInterface:
 
         print_configuration_parser = local_subparsers.add_parser("print", help="Prints default config in given folder.")
         print_configuration_parser.set_defaults(func=Configuration.print_default_config_by_cli)
-        
\ No newline at end of file
+
+    @classmethod
+    def add_file_index_cli_arguments(cls, subparsers: argparse._SubParsersAction):
+        """
+        Defines the CLI parameters for managing the file index.
+
+        Parameters
+        ----------
+        subparser : argparse._SubParsersAction
+            Subparser of main CLI parser
+        """
+        parser = subparsers.add_parser("files", help="Helper for managing the project file index")
+        parser.set_defaults(func=lambda args: parser.print_help())
+        local_subparsers: argparse._SubParsersAction = parser.add_subparsers()
+
+        reindex_parser = local_subparsers.add_parser("reindex", help="Rebuilds the file index from disk, e.g. for projects created before the index existed.")
+        reindex_parser.add_argument("--project-id", "-p", type=int, required=False, help="Only reindex the given project")
+        reindex_parser.set_defaults(func=cls.reindex_files_by_cli)
+
+    @staticmethod
+    def reindex_files_by_cli(cli_args):
+        """
+        Rebuilds the file index of all or the given project.
+
+        Parameters
+        ----------
+        cli_args : Any
+            CLI arguments
+        """
+        # Import models here, as they need an initialized app
+        from nf_cloud_backend import db_wrapper      # pylint: disable=import-outside-toplevel
+        from nf_cloud_backend.models.project import Project     # pylint: disable=import-outside-toplevel
+        query = Project.select()
+        if cli_args.project_id is not None:
+            query = query.where(Project.id == cli_args.project_id)
+        with db_wrapper.database.connection_context():
+            for project in query:
+                project.reconcile_file_index()
+                print(f"Reindexed project {project.id}")
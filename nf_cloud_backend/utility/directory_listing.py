@@ -0,0 +1,198 @@
+# std imports
+import base64
+import heapq
+import json
+import os
+import pathlib
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+class DirectoryListing:
+    """
+    Lists a directory with `os.scandir` in a single pass, with server side sorting and cursor pagination.
+    Folders are always listed before files. Only the entries of the requested page are kept in memory,
+    which makes paging through directories with 100k+ entries cheap.
+    """
+
+    SORT_KEYS: ClassVar[Tuple[str, ...]] = ("name", "size", "mtime")
+    """Supported sort keys
+    """
+
+    MAX_LIMIT: ClassVar[int] = 10000
+    """Maximum page size
+    """
+
+    @staticmethod
+    def stat_entry(entry: os.DirEntry) -> Optional[os.stat_result]:
+        """
+        Stats the entry. Falls back to the link itself for broken symbolic links.
+
+        Parameters
+        ----------
+        entry : os.DirEntry
+            Directory entry
+
+        Returns
+        -------
+        Optional[os.stat_result]
+            Stat result or None if the entry vanished or is not accessible
+        """
+        try:
+            return entry.stat()
+        except OSError:
+            try:
+                return entry.stat(follow_symlinks=False)
+            except OSError:
+                return None
+
+    @staticmethod
+    def etag(directory: pathlib.Path) -> str:
+        """
+        ETag for the directory, derived from inode and modification time, which changes
+        when entries are added, removed or renamed.
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            Directory
+
+        Returns
+        -------
+        str
+            ETag
+        """
+        stat = directory.stat()
+        return f"{stat.st_ino:x}-{stat.st_mtime_ns:x}"
+
+    @staticmethod
+    def encode_cursor(sort_value: Tuple[Any, ...]) -> str:
+        """
+        Encodes the sort value of the last entry of a page as URL safe cursor.
+
+        Parameters
+        ----------
+        sort_value : Tuple[Any, ...]
+            Sort value
+
+        Returns
+        -------
+        str
+            Cursor
+        """
+        return base64.urlsafe_b64encode(json.dumps(sort_value).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+        """
+        Decodes a cursor created by `encode_cursor`.
+
+        Parameters
+        ----------
+        cursor : str
+            Cursor
+
+        Returns
+        -------
+        Tuple[Any, ...]
+            Sort value
+
+        Raises
+        ------
+        ValueError
+            If the cursor is invalid
+        """
+        try:
+            return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii"))))
+        except Exception as error: # pylint: disable=broad-except
+            raise ValueError("invalid cursor") from error
+
+    @classmethod
+    def list(cls, directory: pathlib.Path, sort_key: str = "name", descending: bool = False,
+        cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lists the given directory.
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            Directory to list
+        sort_key : str, optional
+            One of `SORT_KEYS`, by default "name"
+        descending : bool, optional
+            Sort descending, folders are still listed first, by default False
+        cursor : Optional[str], optional
+            Cursor returned for the previous page, by default None
+        limit : Optional[int], optional
+            Page size (1 - `MAX_LIMIT`), by default None (all entries)
+
+        Returns
+        -------
+        Tuple[List[Dict[str, Any]], Optional[str]]
+            Entries (`name`, `type`, `size`, `mtime`) and cursor of the next page or None if this is the last page.
+            Entries which vanish while listing or are not accessible are skipped.
+
+        Raises
+        ------
+        ValueError
+            If sort key, cursor or limit is invalid
+        """
+        if sort_key not in cls.SORT_KEYS:
+            raise ValueError(f"sort key must be one of {', '.join(cls.SORT_KEYS)}")
+        if limit is not None and not 1 <= limit <= cls.MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {cls.MAX_LIMIT}")
+        after = cls.decode_cursor(cursor) if cursor is not None else None
+        if after is not None:
+            expected_types = (int, str) if sort_key == "name" else (int, int, str)
+            if len(after) != len(expected_types) \
+                or not all(isinstance(value, value_type) for value, value_type in zip(after, expected_types)):
+                raise ValueError("cursor does not match sort key")
+
+        def sort_value(entry: os.DirEntry) -> Optional[Tuple[Any, ...]]:
+            # Folders first, regardless of the order
+            folder_rank = 0 if entry.is_dir() else 1
+            if descending:
+                folder_rank = -folder_rank
+            if sort_key == "name":
+                return (folder_rank, entry.name)
+            stat = cls.stat_entry(entry)
+            if stat is None:
+                return None
+            value = stat.st_size if sort_key == "size" else stat.st_mtime_ns
+            return (folder_rank, value, entry.name)
+
+        with os.scandir(directory) as entries:
+            candidates = (
+                candidate
+                for candidate in ((sort_value(entry), entry) for entry in entries)
+                if candidate[0] is not None
+            )
+            if after is not None:
+                if descending:
+                    candidates = (candidate for candidate in candidates if candidate[0] < after)
+                else:
+                    candidates = (candidate for candidate in candidates if candidate[0] > after)
+            # Fetch one more to detect if there is a next page
+            if limit is None:
+                page = sorted(candidates, key=lambda candidate: candidate[0], reverse=descending)
+            elif descending:
+                page = heapq.nlargest(limit + 1, candidates, key=lambda candidate: candidate[0])
+            else:
+                page = heapq.nsmallest(limit + 1, candidates, key=lambda candidate: candidate[0])
+
+        next_cursor = None
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            next_cursor = cls.encode_cursor(page[-1][0])
+
+        listing = []
+        for _, entry in page:
+            # For name sorting, only the entries of this page are stat'ed
+            stat = cls.stat_entry(entry)
+            if stat is None:
+                continue
+            listing.append({
+                "name": entry.name,
+                "type": "folder" if entry.is_dir() else "file",
+                "size": stat.st_size,
+                "mtime": stat.st_mtime
+            })
+        return listing, next_cursor
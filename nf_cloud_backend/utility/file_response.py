@@ -0,0 +1,315 @@
+# std imports
+import mimetypes
+import os
+import pathlib
+import unicodedata
+import uuid
+from datetime import datetime
+from urllib.parse import quote
+from typing import BinaryIO, ClassVar, Iterator, List, Optional, Tuple
+
+# 3rd party imports
+from flask import Request, Response
+from werkzeug.wsgi import wrap_file
+
+class FileResponse:
+    """
+    Builds responses for file downloads with conditional requests (`If-None-Match`, `If-Modified-Since`)
+    and byte ranges (`Range`, `If-Range`), including multiple ranges as `multipart/byteranges`,
+    so clients can resume downloads or fetch slices of large files.
+    """
+
+    MAX_RANGES: ClassVar[int] = 64
+    """Maximum number of ranges per request, more are answered with the complete file
+    """
+
+    @staticmethod
+    def etag(stat: os.stat_result) -> str:
+        """
+        Strong ETag derived from inode, size and modification time.
+
+        Parameters
+        ----------
+        stat : os.stat_result
+            File stat
+
+        Returns
+        -------
+        str
+            ETag
+        """
+        return f"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+    @staticmethod
+    def set_attachment(response: Response, download_name: str):
+        """
+        Sets `Content-Disposition: attachment` with the given filename. Non-ASCII names are sent as `filename*` (RFC 5987)
+        with an ASCII approximation as `filename` for older clients, as headers must be encodable as latin-1.
+
+        Parameters
+        ----------
+        response : Response
+            Response
+        download_name : str
+            Filename for the client
+        """
+        try:
+            download_name.encode("ascii")
+            filenames = {"filename": download_name}
+        except UnicodeEncodeError:
+            filenames = {
+                "filename": unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii"),
+                "filename*": f"UTF-8''{quote(download_name, safe='')}"
+            }
+        response.headers.set("Content-Disposition", "attachment", **filenames)
+
+    @classmethod
+    def is_not_modified(cls, request: Request, etag: str, last_modified: datetime) -> bool:
+        """
+        Evaluates `If-None-Match` or, if not present, `If-Modified-Since`.
+
+        Parameters
+        ----------
+        request : Request
+            Request
+        etag : str
+            Current ETag
+        last_modified : datetime
+            Current modification time (UTC, without time zone, second precision)
+
+        Returns
+        -------
+        bool
+            True if the client's copy is up to date
+        """
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(etag)
+        if request.if_modified_since is not None:
+            return last_modified <= request.if_modified_since.replace(tzinfo=None)
+        return False
+
+    @classmethod
+    def is_range_applicable(cls, request: Request, etag: str, last_modified: datetime) -> bool:
+        """
+        Evaluates `If-Range`. Ranges are only applicable if the file was not changed.
+
+        Parameters
+        ----------
+        request : Request
+            Request
+        etag : str
+            Current ETag
+        last_modified : datetime
+            Current modification time (UTC, without time zone, second precision)
+
+        Returns
+        -------
+        bool
+            True if no `If-Range` is given or it matches the current file
+        """
+        if_range = request.if_range
+        if if_range.etag is not None:
+            # Strong comparison, weak ETags never match
+            return if_range.etag == etag
+        if if_range.date is not None:
+            return last_modified == if_range.date.replace(tzinfo=None)
+        return True
+
+    @classmethod
+    def satisfiable_ranges(cls, request: Request, size: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        Resolves the requested ranges against the file size.
+        Overlapping or adjacent ranges are coalesced.
+
+        Parameters
+        ----------
+        request : Request
+            Request
+        size : int
+            File size
+
+        Returns
+        -------
+        Optional[List[Tuple[int, int]]]
+            Ranges as start (inclusive) and end (exclusive), empty if no range is satisfiable
+            or None if the complete file should be sent
+        """
+        requested_range = request.range
+        if requested_range is None or requested_range.units != "bytes" \
+            or len(requested_range.ranges) > cls.MAX_RANGES:
+            return None
+        ranges = []
+        for start, end in requested_range.ranges:
+            if start < 0:
+                # Suffix range, e.g. `-500`
+                start = max(size + start, 0)
+                end = size
+            elif end is None or end > size:
+                end = size
+            if start < end:
+                ranges.append((start, end))
+        ranges.sort()
+        coalesced_ranges: List[Tuple[int, int]] = []
+        for start, end in ranges:
+            if len(coalesced_ranges) > 0 and start <= coalesced_ranges[-1][1]:
+                coalesced_ranges[-1] = (coalesced_ranges[-1][0], max(end, coalesced_ranges[-1][1]))
+            else:
+                coalesced_ranges.append((start, end))
+        return coalesced_ranges
+
+    @staticmethod
+    def read_range(file: BinaryIO, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+        """
+        Reads the given range in chunks.
+
+        Parameters
+        ----------
+        file : BinaryIO
+            Opened file
+        start : int
+            Start (inclusive)
+        end : int
+            End (exclusive)
+        chunk_size : int
+            Maximum bytes per chunk
+
+        Yields
+        ------
+        Iterator[bytes]
+            Chunks
+        """
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = file.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+    @classmethod
+    def build(cls, request: Request, path: pathlib.Path, chunk_size: int, as_attachment: bool = True,
+        download_name: Optional[str] = None) -> Response:
+        """
+        Builds the response for the given file.
+
+        Parameters
+        ----------
+        request : Request
+            Request
+        path : pathlib.Path
+            File to send
+        chunk_size : int
+            Maximum bytes read at once
+        as_attachment : bool, optional
+            Send `Content-Disposition: attachment`, by default True
+        download_name : Optional[str], optional
+            Filename for the client, by default None (name of the file)
+
+        Returns
+        -------
+        Response
+            200, 206, 304 or 416 response
+        """
+        stat = path.stat()
+        etag = cls.etag(stat)
+        last_modified = datetime.utcfromtimestamp(int(stat.st_mtime))
+        if download_name is None:
+            download_name = path.name
+        mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+
+        response = Response(mimetype=mimetype)
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.accept_ranges = "bytes"
+        if as_attachment:
+            cls.set_attachment(response, download_name)
+
+        if cls.is_not_modified(request, etag, last_modified):
+            response.status_code = 304
+            return response
+
+        ranges = None
+        if cls.is_range_applicable(request, etag, last_modified):
+            ranges = cls.satisfiable_ranges(request, stat.st_size)
+
+        if ranges is None:
+            file = path.open("rb")
+            response.response = wrap_file(request.environ, file, chunk_size)
+            response.direct_passthrough = True
+            response.content_length = stat.st_size
+            return response
+
+        if len(ranges) == 0:
+            response.status_code = 416
+            response.headers["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+        response.status_code = 206
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{stat.st_size}"
+            response.content_length = end - start
+
+            def read_single_range():
+                with path.open("rb") as file:
+                    yield from cls.read_range(file, start, end, chunk_size)
+
+            response.response = read_single_range()
+            return response
+
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {mimetype}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{stat.st_size}\r\n"
+                "\r\n"
+            ).encode("ascii")
+            for start, end in ranges
+        ]
+        closing_boundary = f"--{boundary}--\r\n".encode("ascii")
+
+        def read_multiple_ranges():
+            with path.open("rb") as file:
+                for part_header, (start, end) in zip(part_headers, ranges):
+                    yield part_header
+                    yield from cls.read_range(file, start, end, chunk_size)
+                    yield b"\r\n"
+            yield closing_boundary
+
+        response.content_type = f"multipart/byteranges; boundary={boundary}"
+        response.content_length = sum(len(part_header) + end - start + 2 for part_header, (start, end) in zip(part_headers, ranges)) \
+            + len(closing_boundary)
+        response.response = read_multiple_ranges()
+        return response
+
+    @classmethod
+    def accel_redirect(cls, path: pathlib.Path, root: pathlib.Path, location: str, download_name: Optional[str] = None) -> Response:
+        """
+        Builds a response, which lets NginX send the file via `X-Accel-Redirect`, so the transfer
+        does not occupy a backend worker. NginX handles conditional and range requests itself.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            File to send
+        root : pathlib.Path
+            Directory served by the internal NginX location
+        location : str
+            URL prefix of the internal NginX location, e.g. `/protected-uploads/`
+        download_name : Optional[str], optional
+            Filename for the client, by default None (name of the file)
+
+        Returns
+        -------
+        Response
+            Empty response with `X-Accel-Redirect`
+        """
+        if download_name is None:
+            download_name = path.name
+        relative_path = path.relative_to(root).as_posix()
+        response = Response(mimetype=mimetypes.guess_type(download_name)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = f"{location.rstrip('/')}/{quote(relative_path)}"
+        cls.set_attachment(response, download_name)
+        return response
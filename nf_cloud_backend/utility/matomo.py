@@ -1,32 +1,191 @@
+# std imports
+import atexit
+import threading
+import time
 import traceback
+from typing import Any, Callable, ClassVar, Dict, List
+from urllib.parse import urlencode
 
+# 3rd party imports
 from flask import Flask
-from piwikapi.tracking import PiwikTracker
-from piwikapi.tests.request import FakeRequest
+import requests
 
+# internal imports
 from nf_cloud_backend.utility.headers.accept_language import AcceptLanguage
 
-def track_request(user_agent: str, client_ip: str, referer: str, accept_language_header: str, server_name: str, url_path: str, query_string: str, is_https: bool, matomo_url: str, matomo_site_id: int, matomo_auth_token: str, app: Flask, is_debug: bool):
-    try:
-        accept_languages = AcceptLanguage.parse(accept_language_header)
-        accept_language_code = ""
-        if len(accept_languages):
-            accept_language_code = accept_languages[0].language_code
-        matomo_request = FakeRequest({
-            'HTTP_USER_AGENT': user_agent,
-            'REMOTE_ADDR': client_ip,
-            'HTTP_REFERER': referer,
-            'HTTP_ACCEPT_LANGUAGE': accept_language_code,
-            'SERVER_NAME': server_name,
-            'PATH_INFO': url_path,
-            'QUERY_STRING': query_string,
-            'HTTPS': is_https
-        })
-        piwiktracker = PiwikTracker(matomo_site_id, matomo_request)
-        piwiktracker.set_api_url(f"{matomo_url}/matomo.php")
-        piwiktracker.set_ip(client_ip) # Optional, to override the IP
-        piwiktracker.set_token_auth(matomo_auth_token)  # Optional, to override the IP
-        piwiktracker.do_track_page_view('API')
-    except:
-        if is_debug:
-            app.logger.error(traceback.format_exc()) # pylint: disable=no-member
+class MatomoTracker:
+    """
+    Tracks requests in Matomo without delaying the responses.
+    Tracking only appends the event to a bounded in-memory queue. A background task sends the queued events
+    with Matomo's bulk tracking API over a keep-alive session, every `flush_interval` seconds
+    or as soon as `batch_size` events are queued. If the queue is full, e.g. when Matomo is not reachable,
+    new events are dropped and counted. Remaining events are sent on shutdown.
+
+    Attributes
+    ----------
+    __matomo_url : str
+        Matomo URL
+    __site_id : int
+        Matomo site ID
+    __auth_token : str
+        Matomo auth token, necessary to set the client IP and time
+    __queue_size : int
+        Maximum number of queued events
+    __batch_size : int
+        Maximum number of events per bulk request
+    __flush_interval : float
+        Seconds between two sends
+    __app : Flask
+        Flask application for logging
+    __is_debug : bool
+        Logs failed sends if True
+    __queue : List[Dict[str, Any]]
+        Queued events (tracking parameters)
+    __dropped_events : int
+        Number of events dropped because the queue was full
+    __reported_dropped_events : int
+        Number of dropped events which were already logged
+    __lock : threading.Lock
+        Lock for the queue and counters
+    __wakeup : threading.Event
+        Set to send immediately
+    __session : requests.Session
+        Keep-alive session
+    __is_started : bool
+        True if the background task is running
+    """
+
+    REQUEST_TIMEOUT: ClassVar[int] = 10
+    """Seconds until a bulk request times out
+    """
+
+    def __init__(self, matomo_url: str, site_id: int, auth_token: str, queue_size: int, batch_size: int,
+        flush_interval: float, app: Flask, is_debug: bool):
+        self.__matomo_url: str = matomo_url
+        self.__site_id: int = site_id
+        self.__auth_token: str = auth_token
+        self.__queue_size: int = queue_size
+        self.__batch_size: int = batch_size
+        self.__flush_interval: float = flush_interval
+        self.__app: Flask = app
+        self.__is_debug: bool = is_debug
+        self.__queue: List[Dict[str, Any]] = []
+        self.__dropped_events: int = 0
+        self.__reported_dropped_events: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+        self.__wakeup: threading.Event = threading.Event()
+        self.__session: requests.Session = requests.Session()
+        self.__is_started: bool = False
+
+    @property
+    def dropped_events(self) -> int:
+        """
+        Number of events dropped because the queue was full
+        """
+        return self.__dropped_events
+
+    def track(self, user_agent: str, client_ip: str, referer: str, accept_language_header: str, url: str):
+        """
+        Queues a page view of the API.
+
+        Parameters
+        ----------
+        user_agent : str
+            Client's user agent
+        client_ip : str
+            Client's IP
+        referer : str
+            Referer
+        accept_language_header : str
+            Client's `Accept-Language` header
+        url : str
+            Requested URL
+        """
+        event = {
+            "idsite": self.__site_id,
+            "rec": 1,
+            "apiv": 1,
+            "send_image": 0,
+            "action_name": "API",
+            "url": url,
+            "urlref": referer,
+            "ua": user_agent,
+            "lang": accept_language_header,
+            "cip": client_ip,
+            "cdt": int(time.time())
+        }
+        with self.__lock:
+            if len(self.__queue) >= self.__queue_size:
+                self.__dropped_events += 1
+                return
+            self.__queue.append(event)
+            is_batch_complete = len(self.__queue) >= self.__batch_size
+        if is_batch_complete:
+            self.__wakeup.set()
+
+    def flush(self):
+        """
+        Sends all queued events.
+        """
+        while True:
+            with self.__lock:
+                batch = self.__queue[:self.__batch_size]
+                del self.__queue[:self.__batch_size]
+                dropped_events = self.__dropped_events - self.__reported_dropped_events
+                self.__reported_dropped_events = self.__dropped_events
+            if dropped_events > 0:
+                self.__app.logger.warning(f"Dropped {dropped_events} Matomo events, the queue was full.") # pylint: disable=no-member
+            if len(batch) == 0:
+                return
+            self.__send(batch)
+
+    def start(self, start_background_task: Callable[..., Any]):
+        """
+        Starts sending in the background and registers a final flush on shutdown.
+        Does nothing if already started.
+
+        Parameters
+        ----------
+        start_background_task : Callable[..., Any]
+            Function to start a background task, e.g. `SocketIO.start_background_task` which respects the async mode
+        """
+        if self.__is_started:
+            return
+        self.__is_started = True
+        start_background_task(self.__flush_periodically)
+        atexit.register(self.flush)
+
+    def __flush_periodically(self):
+        """
+        Flushes the queue every `flush_interval` seconds or when a batch is complete.
+        """
+        while True:
+            self.__wakeup.wait(self.__flush_interval)
+            self.__wakeup.clear()
+            self.flush()
+
+    def __send(self, batch: List[Dict[str, Any]]):
+        """
+        Sends the events with a single bulk request. Failed batches are discarded.
+
+        Parameters
+        ----------
+        batch : List[Dict[str, Any]]
+            Events
+        """
+        try:
+            for event in batch:
+                # Matomo expects a single language code
+                accept_languages = AcceptLanguage.parse(event["lang"]) if event["lang"] else []
+                event["lang"] = accept_languages[0].language_code if len(accept_languages) else ""
+            self.__session.post(
+                f"{self.__matomo_url}/matomo.php",
+                json={
+                    "requests": [f"?{urlencode(event)}" for event in batch],
+                    "token_auth": self.__auth_token
+                },
+                timeout=self.REQUEST_TIMEOUT
+            ).raise_for_status()
+        except Exception: # pylint: disable=broad-except
+            if self.__is_debug:
+                self.__app.logger.error(traceback.format_exc()) # pylint: disable=no-member
@@ -0,0 +1,98 @@
+# std imports
+import threading
+import traceback
+from typing import Any, Callable
+
+# 3rd party imports
+from flask import Flask
+from peewee import Database
+
+# internal imports
+from nf_cloud_backend.models.outbox_message import OutboxMessage
+from nf_cloud_backend.utility.rabbit_mq import RabbitMQ
+
+class OutboxRelay:
+    """
+    Publishes the messages of the outbox to RabbitMQ in batches. A batch is locked, published with confirms
+    and deleted in one transaction, so messages are only removed after the broker accepted them.
+    If the process crashes between publishing and commit, the batch is published again (at least once delivery).
+    The relay runs every `poll_interval` seconds or immediately when notified.
+
+    Attributes
+    ----------
+    __batch_size : int
+        Maximum number of messages per batch
+    __poll_interval : float
+        Seconds between two runs
+    __database : Database
+        Database for opening connections outside of requests
+    __app : Flask
+        Flask application for logging
+    __wakeup : threading.Event
+        Set to run immediately
+    __is_started : bool
+        True if the relay is running
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float, database: Database, app: Flask):
+        self.__batch_size: int = batch_size
+        self.__poll_interval: float = poll_interval
+        self.__database: Database = database
+        self.__app: Flask = app
+        self.__wakeup: threading.Event = threading.Event()
+        self.__is_started: bool = False
+
+    def notify(self):
+        """
+        Lets the relay run immediately, e.g. after a message was committed.
+        """
+        self.__wakeup.set()
+
+    def relay_batch(self) -> int:
+        """
+        Publishes one batch.
+
+        Returns
+        -------
+        int
+            Number of published messages
+        """
+        with self.__database.connection_context():
+            with self.__database.atomic():
+                messages = OutboxMessage.claim_batch(self.__batch_size)
+                if len(messages) == 0:
+                    return 0
+                for queue, bodies in OutboxMessage.group_by_queue(messages).items():
+                    RabbitMQ.publisher().publish(queue, bodies)
+                OutboxMessage.delete().where(
+                    OutboxMessage.id.in_([message.id for message in messages])
+                ).execute()
+                return len(messages)
+
+    def start(self, start_background_task: Callable[..., Any]):
+        """
+        Starts the relay. Does nothing if already started.
+
+        Parameters
+        ----------
+        start_background_task : Callable[..., Any]
+            Function to start a background task, e.g. `SocketIO.start_background_task` which respects the async mode
+        """
+        if self.__is_started:
+            return
+        self.__is_started = True
+        start_background_task(self.__relay_periodically)
+
+    def __relay_periodically(self):
+        """
+        Publishes batches until the outbox is empty, then waits for the next interval or notification.
+        """
+        while True:
+            self.__wakeup.wait(self.__poll_interval)
+            self.__wakeup.clear()
+            try:
+                while self.relay_batch() == self.__batch_size:
+                    pass
+            except Exception: # pylint: disable=broad-except
+                # Retry in the next run
+                self.__app.logger.error(traceback.format_exc()) # pylint: disable=no-member
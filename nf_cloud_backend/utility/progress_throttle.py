@@ -0,0 +1,98 @@
+# std imports
+import threading
+import time
+from typing import Any, Dict
+
+# 3rd party imports
+from flask_socketio import SocketIO
+
+class ProgressThrottle:
+    """
+    Coalesces Socket.IO events per room, so each room receives at most
+    `max_per_second` events per backend process. Events which arrive
+    while a room is throttled replace the pending one, which is emitted
+    by a background task at the end of the interval. As progress counters
+    only increase, the last event always contains the most recent state.
+
+    Attributes
+    ----------
+    __socketio : SocketIO
+        SocketIO instance for emitting
+    __event : str
+        Name of the emitted event
+    __interval : float
+        Minimum seconds between two events in the same room
+    __last_emits : Dict[str, float]
+        Monotonic timestamp of the last emit per room
+    __pending : Dict[str, Any]
+        Data waiting to be emitted per room
+    __lock : threading.Lock
+        Lock for the state above
+    """
+
+    def __init__(self, socketio: SocketIO, event: str, max_per_second: int):
+        self.__socketio: SocketIO = socketio
+        self.__event: str = event
+        self.__interval: float = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.__last_emits: Dict[str, float] = {}
+        self.__pending: Dict[str, Any] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def emit(self, room: str, data: Any):
+        """
+        Emits the data to the given room or defers it, if the room was notified recently.
+
+        Parameters
+        ----------
+        room : str
+            Socket.IO room
+        data : Any
+            Event data
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if room in self.__pending:
+                # A deferred emit is already scheduled, just replace its data
+                self.__pending[room] = data
+                return
+            delay = self.__last_emits.get(room, 0.0) + self.__interval - now
+            if delay <= 0:
+                self.__last_emits[room] = now
+            else:
+                self.__pending[room] = data
+        if delay <= 0:
+            self.__socketio.emit(self.__event, data, to=room)
+        else:
+            self.__socketio.start_background_task(self.__emit_deferred, room, delay)
+
+    def discard(self, room: str):
+        """
+        Drops pending data and emit history of the given room, e.g. when a project is finished.
+
+        Parameters
+        ----------
+        room : str
+            Socket.IO room
+        """
+        with self.__lock:
+            self.__pending.pop(room, None)
+            self.__last_emits.pop(room, None)
+
+    def __emit_deferred(self, room: str, delay: float):
+        """
+        Waits for the given delay and emits the pending data of the room.
+
+        Parameters
+        ----------
+        room : str
+            Socket.IO room
+        delay : float
+            Seconds to wait
+        """
+        self.__socketio.sleep(delay)
+        with self.__lock:
+            data = self.__pending.pop(room, None)
+            if data is None:
+                return
+            self.__last_emits[room] = time.monotonic()
+        self.__socketio.emit(self.__event, data, to=room)
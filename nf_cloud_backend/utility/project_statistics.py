@@ -0,0 +1,244 @@
+# std imports
+from datetime import datetime, timedelta
+from typing import Any, ClassVar, Dict, Optional, Tuple
+
+# 3rd party imports
+from peewee import fn
+from redis.commands.core import Script
+
+# internal imports
+from nf_cloud_backend import cache, redis_client
+from nf_cloud_backend.models.project import Project
+from nf_cloud_backend.models.trace_event import TraceEvent
+from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.rabbit_mq import RabbitMQ
+
+class ProjectStatistics:
+    """
+    Project statistics materialized in the cache (Redis), so reading them does not query the database.
+    The counters are updated incrementally when projects are created, deleted, scheduled or finished
+    and recomputed from the database when the snapshot expires (`statistics.ttl`).
+    """
+
+    CACHE_PREFIX: ClassVar[str] = "PROJECT_STATISTICS_"
+    """Prefix for cache keys
+    """
+
+    SNAPSHOT_KEY: ClassVar[str] = f"{CACHE_PREFIX}snapshot"
+    """Marks an unexpired snapshot
+    """
+
+    TOTAL_KEY: ClassVar[str] = f"{CACHE_PREFIX}total"
+    """Number of projects
+    """
+
+    SCHEDULED_KEY: ClassVar[str] = f"{CACHE_PREFIX}scheduled"
+    """Number of scheduled projects
+    """
+
+    QUEUE_KEY: ClassVar[str] = f"{CACHE_PREFIX}queue"
+    """Consumer and message count of the project queue
+    """
+
+    AVERAGE_RUN_DURATION_KEY: ClassVar[str] = f"{CACHE_PREFIX}average_run_duration"
+    """Average duration of the recent runs
+    """
+
+    INCREMENT_IF_EXISTS: ClassVar[Script] = redis_client.register_script(
+        """
+        if redis.call("EXISTS", KEYS[1]) == 1 then
+            return redis.call("INCRBY", KEYS[1], ARGV[1])
+        end
+        return false
+        """
+    )
+    """Increments an existing counter, keeping its expiration, in one step. Missing counters are not created.
+    """
+
+    @classmethod
+    def completed_processes_key(cls) -> str:
+        """
+        Returns
+        -------
+        str
+            Key for the number of processes completed today (UTC)
+        """
+        return f"{cls.CACHE_PREFIX}completed_processes_{datetime.utcnow().date().isoformat()}"
+
+    @classmethod
+    def get(cls) -> Dict[str, Any]:
+        """
+        Returns the statistics. Recomputes the snapshot if expired.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Statistics
+        """
+        completed_processes_key = cls.completed_processes_key()
+        is_snapshot, total, scheduled, completed_processes = cache.get_many(
+            cls.SNAPSHOT_KEY,
+            cls.TOTAL_KEY,
+            cls.SCHEDULED_KEY,
+            completed_processes_key
+        )
+        if is_snapshot is None or total is None or scheduled is None or completed_processes is None:
+            total, scheduled, completed_processes = cls.refresh()
+        total = int(total)
+        scheduled = int(scheduled)
+        consumers, queued = cls.get_queue_statistics()
+        return {
+            "total": total,
+            "scheduled": scheduled,
+            "queued": queued,
+            "running": max(scheduled - queued, 0) if queued is not None else None,
+            "workers": consumers,
+            "completed_processes_today": int(completed_processes)
+        }
+
+    @classmethod
+    def get_queue_statistics(cls) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Consumer and message count of the project queue, cached for `statistics.queue_ttl` seconds.
+
+        Returns
+        -------
+        Tuple[Optional[int], Optional[int]]
+            Consumer and message count, both None if RabbitMQ is not reachable.
+        """
+        queue_statistics = cache.get(cls.QUEUE_KEY)
+        if queue_statistics is None:
+            queue_statistics = RabbitMQ.get_queue_statistics(
+                Configuration.values()["rabbit_mq"]["project_workflow_queue"]
+            )
+            if queue_statistics is None:
+                return None, None
+            cache.set(cls.QUEUE_KEY, queue_statistics, timeout=Configuration.values()["statistics"]["queue_ttl"])
+        return tuple(queue_statistics)
+
+    @classmethod
+    def get_average_run_duration(cls) -> Optional[float]:
+        """
+        Average duration in seconds of the last `statistics.run_duration_window` finished runs,
+        cached for `statistics.ttl` seconds.
+
+        Returns
+        -------
+        Optional[float]
+            Average duration or None if no run was finished yet
+        """
+        average_run_duration = cache.get(cls.AVERAGE_RUN_DURATION_KEY)
+        if average_run_duration is None:
+            recent_runs = Project.select(Project.last_run_duration).where(
+                Project.finished_at.is_null(False),
+                Project.last_run_duration.is_null(False)
+            ).order_by(
+                Project.finished_at.desc()
+            ).limit(
+                Configuration.values()["statistics"]["run_duration_window"]
+            ).alias("recent_runs")
+            average_run_duration = Project.select(
+                fn.AVG(recent_runs.c.last_run_duration)
+            ).from_(recent_runs).scalar()
+            if average_run_duration is None:
+                return None
+            average_run_duration = float(average_run_duration)
+            cache.set(cls.AVERAGE_RUN_DURATION_KEY, average_run_duration, timeout=Configuration.values()["statistics"]["ttl"])
+        return average_run_duration
+
+    @classmethod
+    def refresh(cls) -> Tuple[int, int, int]:
+        """
+        Recomputes the counters from the database and stores them in the cache.
+
+        Returns
+        -------
+        Tuple[int, int, int]
+            Total projects, scheduled projects and processes completed today
+        """
+        today = datetime.utcnow().date()
+        total = Project.select().count()
+        scheduled = Project.select().where(Project.is_scheduled == True).count()  # pylint: disable=singleton-comparison
+        # Answered by the partial index on the reported time of completed processes, not by scanning the traces
+        completed_processes = TraceEvent.select().where(
+            TraceEvent.event == "process_completed",
+            TraceEvent.reported_at >= datetime(today.year, today.month, today.day)
+        ).count()
+        timeout = Configuration.values()["statistics"]["ttl"]
+        cache.set_many(
+            {
+                cls.TOTAL_KEY: total,
+                cls.SCHEDULED_KEY: scheduled,
+                cls.SNAPSHOT_KEY: 1
+            },
+            timeout=timeout
+        )
+        # Keep the daily counter until the day is over, even if the snapshot expires before
+        cache.set(
+            cls.completed_processes_key(),
+            completed_processes,
+            timeout=int((datetime(today.year, today.month, today.day) + timedelta(days=1) - datetime.utcnow()).total_seconds()) + 1
+        )
+        return total, scheduled, completed_processes
+
+    @classmethod
+    def __increment(cls, key: str, delta: int):
+        """
+        Increments the given counter if it is part of the current snapshot, checked and incremented atomically in Redis,
+        so a counter expiring in between is not recreated without expiration. Otherwise the next `get` recomputes it anyway.
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+        delta : int
+            Value to add
+        """
+        cls.INCREMENT_IF_EXISTS(keys=[f"{cache.cache.key_prefix}{key}"], args=[delta])
+
+    @classmethod
+    def on_created(cls):
+        """
+        Updates the counters after a project was created.
+        """
+        cls.__increment(cls.TOTAL_KEY, 1)
+
+    @classmethod
+    def on_deleted(cls, was_scheduled: bool):
+        """
+        Updates the counters after a project was deleted.
+
+        Parameters
+        ----------
+        was_scheduled : bool
+            True if the deleted project was scheduled
+        """
+        cls.__increment(cls.TOTAL_KEY, -1)
+        if was_scheduled:
+            cls.__increment(cls.SCHEDULED_KEY, -1)
+
+    @classmethod
+    def on_scheduled(cls, count: int = 1):
+        """
+        Updates the counters after projects were scheduled.
+
+        Parameters
+        ----------
+        count : int, optional
+            Number of scheduled projects, by default 1
+        """
+        cls.__increment(cls.SCHEDULED_KEY, count)
+
+    @classmethod
+    def on_finished(cls):
+        """
+        Updates the counters after a project was finished.
+        """
+        cls.__increment(cls.SCHEDULED_KEY, -1)
+
+    @classmethod
+    def on_process_completed(cls):
+        """
+        Updates the counters after a Nextflow process was completed.
+        """
+        cls.__increment(cls.completed_processes_key(), 1)
@@ -0,0 +1,134 @@
+# std imports
+from __future__ import annotations
+from collections import defaultdict
+import math
+from typing import Any, ClassVar, Dict, Optional
+
+class QuantileSketch:
+    """
+    Mergeable sketch for approximating quantiles of non-negative values (similar to DDSketch).
+    Values are counted in logarithmic buckets, so each returned quantile is within
+    `RELATIVE_ACCURACY` of the exact value. Two sketches are merged by adding their bucket counts,
+    which allows to aggregate them incrementally and in any order.
+
+    Attributes
+    ----------
+    __buckets : Dict[int, int]
+        Value count per bucket index
+    __zero_count : int
+        Number of values too small for the logarithmic buckets
+    """
+
+    RELATIVE_ACCURACY: ClassVar[float] = 0.01
+    """Relative accuracy of the quantiles
+    """
+
+    GAMMA: ClassVar[float] = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    """Ratio between the upper bounds of two consecutive buckets
+    """
+
+    LOG_GAMMA: ClassVar[float] = math.log(GAMMA)
+    """Natural logarithm of GAMMA
+    """
+
+    MIN_VALUE: ClassVar[float] = 1e-9
+    """Values below are counted as zero
+    """
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None, zero_count: int = 0):
+        self.__buckets: Dict[int, int] = defaultdict(int, buckets if buckets is not None else {})
+        self.__zero_count: int = zero_count
+
+    @property
+    def count(self) -> int:
+        return self.__zero_count + sum(self.__buckets.values())
+
+    def add(self, value: float):
+        """
+        Adds a value.
+
+        Parameters
+        ----------
+        value : float
+            Non-negative value
+        """
+        if value < self.__class__.MIN_VALUE:
+            self.__zero_count += 1
+        else:
+            self.__buckets[math.ceil(math.log(value) / self.__class__.LOG_GAMMA)] += 1
+
+    def merge(self, other: QuantileSketch):
+        """
+        Adds the values of the other sketch to this one.
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            Sketch to merge
+        """
+        self.__zero_count += other.__zero_count
+        for key, bucket_count in other.__buckets.items():
+            self.__buckets[key] += bucket_count
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        """
+        Returns the approximated quantile.
+
+        Parameters
+        ----------
+        quantile : float
+            Quantile between 0 and 1, e.g. 0.95
+
+        Returns
+        -------
+        Optional[float]
+            Approximated value or None if the sketch is empty
+        """
+        count = self.count
+        if count == 0:
+            return None
+        rank = quantile * (count - 1)
+        cumulative_count = self.__zero_count
+        if rank < cumulative_count:
+            return 0.0
+        for key in sorted(self.__buckets.keys()):
+            cumulative_count += self.__buckets[key]
+            if cumulative_count > rank:
+                # Center of the bucket, which keeps the relative error below RELATIVE_ACCURACY
+                return 2 * self.__class__.GAMMA ** key / (self.__class__.GAMMA + 1)
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns
+        -------
+        Dict[str, Any]
+            Sketch as JSON serializable dictionary
+        """
+        return {
+            "zero_count": self.__zero_count,
+            "buckets": {
+                str(key): bucket_count for key, bucket_count in self.__buckets.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> QuantileSketch:
+        """
+        Creates a sketch from a dictionary created by `to_dict`.
+
+        Parameters
+        ----------
+        data : Dict[str, Any]
+            Sketch as dictionary
+
+        Returns
+        -------
+        QuantileSketch
+        """
+        return cls(
+            {
+                int(key): bucket_count for key, bucket_count in data.get("buckets", {}).items()
+            },
+            data.get("zero_count", 0)
+        )
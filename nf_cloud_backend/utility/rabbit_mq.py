@@ -1,12 +1,189 @@
+import os
 import pika
+import threading
 import time
 import traceback
-from typing import Tuple
+from typing import Any, Callable, ClassVar, List, Optional, Tuple
+
+from pika.adapters.blocking_connection import BlockingChannel
 
 from nf_cloud_backend import app
 from nf_cloud_backend.utility.configuration import Configuration
 
+class RabbitMQPublisher:
+    """
+    Publishes messages over a long-lived connection and channel with publisher confirms,
+    instead of connecting for every message. The connection is not thread safe, so all operations are serialized
+    by a lock (a green lock when eventlet is used). Lost connections or closed channels are re-established
+    and the operation is retried once.
+    A `BlockingConnection` only answers heartbeats while it is used, so an idle connection would be closed
+    by the broker after the heartbeat timeout. Heartbeats are kept enabled, to detect dead connections, and serviced
+    by `process_data_events`, which `RabbitMQ.start_heartbeats` calls periodically in the background.
+
+    Attributes
+    ----------
+    __url : str
+        RabbitMQ URL
+    __connection : Optional[pika.BlockingConnection]
+        Connection
+    __channel : Optional[BlockingChannel]
+        Channel with enabled publisher confirms
+    __lock : threading.Lock
+        Serializes the usage of the connection
+    """
+
+    RETRIABLE_ERRORS: ClassVar[Tuple[type, ...]] = (
+        pika.exceptions.AMQPConnectionError,
+        pika.exceptions.AMQPChannelError,
+        ConnectionError
+    )
+    """Errors after which the connection is re-established
+    """
+
+    HEARTBEAT_INTERVAL: ClassVar[float] = 5.0
+    """Seconds between two calls of `process_data_events` by the background task.
+    Must be less than half of the negotiated heartbeat timeout (60 seconds by default, `heartbeat` parameter of the URL).
+    """
+
+    def __init__(self, url: str):
+        self.__url: str = url
+        self.__connection: Optional[pika.BlockingConnection] = None
+        self.__channel: Optional[BlockingChannel] = None
+        self.__lock: threading.Lock = threading.Lock()
+
+    def __get_channel(self) -> BlockingChannel:
+        """
+        Returns
+        -------
+        BlockingChannel
+            Open channel, connects if necessary
+        """
+        if self.__connection is None or self.__connection.is_closed \
+            or self.__channel is None or self.__channel.is_closed:
+            self.__close()
+            self.__connection = pika.BlockingConnection(pika.URLParameters(self.__url))
+            self.__channel = self.__connection.channel()
+            self.__channel.confirm_delivery()
+        return self.__channel
+
+    def __close(self):
+        """
+        Closes the connection, ignoring errors of already lost connections.
+        """
+        if self.__connection is not None and self.__connection.is_open:
+            try:
+                self.__connection.close()
+            except Exception: # pylint: disable=broad-except
+                pass
+        self.__connection = None
+        self.__channel = None
+
+    def __execute(self, operation: Callable[[BlockingChannel], Any]) -> Any:
+        """
+        Executes the operation on the channel, reconnects and retries once on connection or channel errors.
+
+        Parameters
+        ----------
+        operation : Callable[[BlockingChannel], Any]
+            Operation
+
+        Returns
+        -------
+        Any
+            Result of the operation
+        """
+        with self.__lock:
+            try:
+                return operation(self.__get_channel())
+            except self.RETRIABLE_ERRORS:
+                self.__close()
+            return operation(self.__get_channel())
+
+    def publish(self, queue: str, bodies: List[str]):
+        """
+        Publishes the messages persistently to the given queue and waits for the broker's confirmations.
+
+        Parameters
+        ----------
+        queue : str
+            Queue name
+        bodies : List[str]
+            Message bodies
+
+        Raises
+        ------
+        pika.exceptions.UnroutableError
+            If a message could not be routed to the queue
+        pika.exceptions.NackError
+            If the broker rejected a message
+        """
+        properties = pika.BasicProperties(delivery_mode=2)
+
+        def publish_bodies(channel: BlockingChannel):
+            for body in bodies:
+                channel.basic_publish(
+                    exchange="",
+                    routing_key=queue,
+                    body=body,
+                    properties=properties,
+                    mandatory=True
+                )
+
+        self.__execute(publish_bodies)
+
+    def queue_statistics(self, queue: str) -> Tuple[int, int]:
+        """
+        Get the consumer and message count of the given queue.
+
+        Parameters
+        ----------
+        queue : str
+            Queue name
+
+        Returns
+        -------
+        Tuple[int, int]
+            Consumer count and message count
+        """
+        queue_state = self.__execute(
+            lambda channel: channel.queue_declare(queue=queue, durable=True, passive=True)
+        )
+        return queue_state.method.consumer_count, queue_state.method.message_count
+
+    def process_data_events(self):
+        """
+        Sends and receives pending frames, including heartbeats, without blocking.
+        Does not connect, a lost connection is closed and re-established by the next operation.
+        """
+        with self.__lock:
+            if self.__connection is None or not self.__connection.is_open:
+                return
+            try:
+                self.__connection.process_data_events(time_limit=0)
+            except self.RETRIABLE_ERRORS:
+                self.__close()
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        with self.__lock:
+            self.__close()
+
+
 class RabbitMQ:
+    __publisher: ClassVar[Optional[RabbitMQPublisher]] = None
+    """Publisher of this process
+    """
+
+    __publisher_pid: ClassVar[Optional[int]] = None
+    """Process ID of the publisher's creator, connections must not be shared with forked processes
+    """
+
+    __are_heartbeats_started: ClassVar[bool] = False
+    """True if the heartbeats of the publisher are serviced in the background
+    """
+
     @staticmethod
     def prepare_queues():
         """
@@ -20,7 +197,7 @@ class RabbitMQ:
 
                 # Create main queue
                 channel.queue_declare(
-                    queue=Configuration.values()['rabbit_mq']['project_workflow_queue'], 
+                    queue=Configuration.values()['rabbit_mq']['project_workflow_queue'],
                     durable=True
                 )
 
@@ -32,8 +209,58 @@ class RabbitMQ:
             except:
                 raise BaseException(traceback.format_exc())
 
-    @staticmethod
-    def get_queue_statistics(queue: str) -> Tuple[int, int]:
+    @classmethod
+    def publisher(cls) -> RabbitMQPublisher:
+        """
+        Returns the publisher of the current process, created on first use.
+
+        Returns
+        -------
+        RabbitMQPublisher
+            Publisher
+        """
+        if cls.__publisher is None or cls.__publisher_pid != os.getpid():
+            cls.__publisher = RabbitMQPublisher(Configuration.values()['rabbit_mq']['url'])
+            cls.__publisher_pid = os.getpid()
+        return cls.__publisher
+
+    @classmethod
+    def start_heartbeats(cls, start_background_task: Callable[..., Any], sleep: Callable[[float], Any]):
+        """
+        Services the heartbeats of this process's publisher in the background, see `RabbitMQPublisher`.
+        Does nothing if already started.
+
+        Parameters
+        ----------
+        start_background_task : Callable[..., Any]
+            Function to start a background task, e.g. `SocketIO.start_background_task` which respects the async mode
+        sleep : Callable[[float], Any]
+            Sleep function matching the background task, e.g. `SocketIO.sleep`
+        """
+        if cls.__are_heartbeats_started:
+            return
+        cls.__are_heartbeats_started = True
+        start_background_task(cls.__service_heartbeats_periodically, sleep)
+
+    @classmethod
+    def __service_heartbeats_periodically(cls, sleep: Callable[[float], Any]):
+        """
+        Lets the publisher process heartbeats every `RabbitMQPublisher.HEARTBEAT_INTERVAL` seconds.
+
+        Parameters
+        ----------
+        sleep : Callable[[float], Any]
+            Sleep function
+        """
+        while True:
+            sleep(RabbitMQPublisher.HEARTBEAT_INTERVAL)
+            try:
+                cls.publisher().process_data_events()
+            except Exception: # pylint: disable=broad-except
+                app.logger.error(traceback.format_exc()) # pylint: disable=no-member
+
+    @classmethod
+    def get_queue_statistics(cls, queue: str) -> Optional[Tuple[int, int]]:
         """
         Get the consumer and message count of the given queue.
 
@@ -44,21 +271,9 @@ class RabbitMQ:
 
         Returns
         -------
-        Returns a tuple with consumer count and message count
+        Returns a tuple with consumer count and message count or None if RabbitMQ is not reachable
         """
         try:
-            # Establish connection
-            connection = pika.BlockingConnection(pika.URLParameters(Configuration.values()['rabbit_mq']['url'] ))
-            channel = connection.channel()
-
-            # Get queue statistics
-            queue_state = channel.queue_declare(
-                queue=Configuration.values()['rabbit_mq']['project_workflow_queue'], 
-                durable=True,
-                passive=True
-            )
-            connection.close()
-
-            return queue_state.method.consumer_count, queue_state.method.message_count
-        except:
+            return cls.publisher().queue_statistics(queue)
+        except Exception: # pylint: disable=broad-except
             return None
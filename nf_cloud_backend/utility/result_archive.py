@@ -0,0 +1,235 @@
+# std imports
+import hashlib
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import BinaryIO, ClassVar, Iterable, Optional
+
+# internal imports
+from nf_cloud_backend import thread_pool
+from nf_cloud_backend.models.project_file import ProjectFile
+from nf_cloud_backend.utility.configuration import Configuration
+
+class ResultArchive:
+    """
+    Cache of pre-built archives of project folders, e.g. the results of a finished run, so they are not
+    built again for every download. Archives are stored per project and folder outside the project's file directory
+    and keyed by a fingerprint of the folder's content (paths, sizes and modification times), so changed folders
+    never serve outdated archives. File operations invalidate the archives of all folders containing the changed path.
+    """
+
+    ENTRIES_BATCH_SIZE: ClassVar[int] = 1000
+    """Files taken at once from the folder walk when building an archive
+    """
+
+    WRITE_SIZE: ClassVar[int] = 1048576
+    """Minimum bytes written at once when storing an archive
+    """
+
+    @staticmethod
+    def directory(project_id: int) -> pathlib.Path:
+        """
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+
+        Returns
+        -------
+        pathlib.Path
+            Archive cache of the project
+        """
+        return pathlib.Path(Configuration.values()["upload_path"]).joinpath(".archives", str(project_id)).absolute()
+
+    @classmethod
+    def folder_directory(cls, project_id: int, file_directory: pathlib.Path, folder: pathlib.Path) -> pathlib.Path:
+        """
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        folder : pathlib.Path
+            Absolute folder within the file directory
+
+        Returns
+        -------
+        pathlib.Path
+            Archive cache of the folder
+        """
+        relative_folder = folder.relative_to(file_directory).as_posix()
+        return cls.directory(project_id).joinpath(hashlib.sha1(relative_folder.encode("utf-8")).hexdigest())
+
+    @staticmethod
+    def fingerprint(folder: pathlib.Path) -> str:
+        """
+        Fingerprint of the folder's files, derived from relative paths, sizes and modification times.
+        Walks the whole folder, call it on the thread pool.
+
+        Parameters
+        ----------
+        folder : pathlib.Path
+            Folder
+
+        Returns
+        -------
+        str
+            Fingerprint
+        """
+        files = sorted(
+            (path, size, mtime)
+            for path, is_directory, size, mtime in ProjectFile.walk(folder)
+            if not is_directory
+        )
+        fingerprint = hashlib.sha256()
+        for path, size, mtime in files:
+            fingerprint.update(f"{path}\0{size}\0{mtime!r}\n".encode("utf-8", "surrogateescape"))
+        return fingerprint.hexdigest()
+
+    @classmethod
+    def get(cls, project_id: int, file_directory: pathlib.Path, folder: pathlib.Path, archive_format: str) -> Optional[pathlib.Path]:
+        """
+        Returns the cached archive of the folder, if it matches the folder's current content.
+        The folder is only walked for the fingerprint if an archive is cached. Blocking, call it on the thread pool.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        folder : pathlib.Path
+            Absolute folder within the file directory
+        archive_format : str
+            Archive format
+
+        Returns
+        -------
+        Optional[pathlib.Path]
+            Archive or None
+        """
+        folder_directory = cls.folder_directory(project_id, file_directory, folder)
+        if not folder_directory.is_dir() or next(folder_directory.glob(f"*.{archive_format}"), None) is None:
+            return None
+        archive_path = folder_directory.joinpath(f"{cls.fingerprint(folder)}.{archive_format}")
+        if archive_path.is_file():
+            return archive_path
+        return None
+
+    @classmethod
+    def store(cls, project_id: int, file_directory: pathlib.Path, folder: pathlib.Path, archive_format: str,
+        fingerprint: str, chunks: Iterable[bytes]) -> pathlib.Path:
+        """
+        Writes the archive to the cache, replacing older archives of the folder.
+        The archive is written to a temporary file first, so readers never see a partial archive.
+        Chunks are taken in the calling thread, as the archive streams use the thread pool themselves,
+        but the file operations are done by the thread pool.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        folder : pathlib.Path
+            Absolute folder within the file directory
+        archive_format : str
+            Archive format
+        fingerprint : str
+            Fingerprint of the folder taken before the archive was built
+        chunks : Iterable[bytes]
+            Archive
+
+        Returns
+        -------
+        pathlib.Path
+            Archive
+        """
+        folder_directory = cls.folder_directory(project_id, file_directory, folder)
+        archive_path = folder_directory.joinpath(f"{fingerprint}.{archive_format}")
+        temporary_file = thread_pool.execute(cls.__create_temporary_file, folder_directory)
+        try:
+            with temporary_file:
+                # Collect small chunks, e.g. tar headers, to reduce the number of calls
+                buffer = bytearray()
+                for chunk in chunks:
+                    buffer += chunk
+                    if len(buffer) >= cls.WRITE_SIZE:
+                        thread_pool.execute(temporary_file.write, bytes(buffer))
+                        buffer.clear()
+                thread_pool.execute(temporary_file.write, bytes(buffer))
+            thread_pool.execute(os.replace, temporary_file.name, archive_path)
+        except BaseException:
+            pathlib.Path(temporary_file.name).unlink(missing_ok=True)
+            raise
+        thread_pool.execute(cls.__remove_outdated_archives, folder_directory, archive_format, archive_path)
+        return archive_path
+
+    @staticmethod
+    def __create_temporary_file(folder_directory: pathlib.Path) -> BinaryIO:
+        """
+        Parameters
+        ----------
+        folder_directory : pathlib.Path
+            Archive cache of the folder, created if missing
+
+        Returns
+        -------
+        BinaryIO
+            Temporary file within the archive cache, which is not deleted on close
+        """
+        folder_directory.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(mode="wb", dir=folder_directory, suffix=".part", delete=False)
+
+    @staticmethod
+    def __remove_outdated_archives(folder_directory: pathlib.Path, archive_format: str, archive_path: pathlib.Path):
+        """
+        Removes the archives of the folder in the given format, except the current one.
+
+        Parameters
+        ----------
+        folder_directory : pathlib.Path
+            Archive cache of the folder
+        archive_format : str
+            Archive format
+        archive_path : pathlib.Path
+            Current archive
+        """
+        for outdated_archive in folder_directory.glob(f"*.{archive_format}"):
+            if outdated_archive != archive_path:
+                outdated_archive.unlink(missing_ok=True)
+
+    @classmethod
+    def invalidate(cls, project_id: int, file_directory: pathlib.Path, path: pathlib.Path):
+        """
+        Removes the archives of all folders containing the given path.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        file_directory : pathlib.Path
+            Project's file directory
+        path : pathlib.Path
+            Absolute, changed path within the file directory
+        """
+        if not cls.directory(project_id).is_dir():
+            return
+        for folder in [path] + list(path.parents):
+            if folder != file_directory and file_directory not in folder.parents:
+                break
+            shutil.rmtree(cls.folder_directory(project_id, file_directory, folder), ignore_errors=True)
+
+    @classmethod
+    def delete(cls, project_id: int):
+        """
+        Removes all archives of the project.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        """
+        shutil.rmtree(cls.directory(project_id), ignore_errors=True)
@@ -0,0 +1,223 @@
+# std imports
+import pathlib
+import tarfile
+from typing import Any, ClassVar, Iterable, Iterator, List, Optional, Tuple
+
+# 3rd party imports
+import zstandard
+
+class TarStream:
+    """
+    Streams a tar archive (PAX format) of the given files.
+    If the size is precomputed, all files are stat'ed before streaming and each file is sent with exactly the size
+    it had at that time (truncated or padded with zeros), so the archive size is known in advance, e.g. for `Content-Length`.
+    Otherwise files are stat'ed lazily while streaming. Files are stat'ed, opened and read on the thread pool,
+    so slow disks do not block the event loop.
+
+    Attributes
+    ----------
+    __entries : Iterable[Tuple[pathlib.Path, str]]
+        Files and their names within the archive
+    __thread_pool : Any
+        Pool to stat, open and read files, `execute(function, *args)` must return the function's result
+    __block_size : int
+        Maximum bytes read at once
+    __members : Optional[List[Tuple[pathlib.Path, tarfile.TarInfo]]]
+        Precomputed members
+    """
+
+    BLOCK_SIZE: ClassVar[int] = tarfile.BLOCKSIZE
+    """Tar block size
+    """
+
+    RECORD_SIZE: ClassVar[int] = tarfile.RECORDSIZE
+    """Tar record size, the archive is padded to a multiple of it
+    """
+
+    ZSTD_INPUT_SIZE: ClassVar[int] = 1048576
+    """Minimum bytes passed to the zstd compressor at once
+    """
+
+    def __init__(self, entries: Iterable[Tuple[pathlib.Path, str]], thread_pool: Any, block_size: int,
+        precompute_size: bool = False):
+        self.__entries: Iterable[Tuple[pathlib.Path, str]] = entries
+        self.__thread_pool: Any = thread_pool
+        self.__block_size: int = block_size
+        self.__members: Optional[List[Tuple[pathlib.Path, tarfile.TarInfo]]] = None
+        if precompute_size:
+            self.__members = thread_pool.execute(self.__precompute_members, entries)
+
+    @classmethod
+    def __precompute_members(cls, entries: Iterable[Tuple[pathlib.Path, str]]) -> List[Tuple[pathlib.Path, tarfile.TarInfo]]:
+        """
+        Parameters
+        ----------
+        entries : Iterable[Tuple[pathlib.Path, str]]
+            Files and their names within the archive
+
+        Returns
+        -------
+        List[Tuple[pathlib.Path, tarfile.TarInfo]]
+            Members of the existing files
+        """
+        return [
+            member for member in (cls.__member(path, arcname) for path, arcname in entries)
+            if member is not None
+        ]
+
+    @staticmethod
+    def __member(path: pathlib.Path, arcname: str) -> Optional[Tuple[pathlib.Path, tarfile.TarInfo]]:
+        """
+        Creates the tar info for the given file.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            File
+        arcname : str
+            Name within the archive
+
+        Returns
+        -------
+        Optional[Tuple[pathlib.Path, tarfile.TarInfo]]
+            File and tar info or None if the file does not exist anymore
+        """
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        tar_info = tarfile.TarInfo(arcname.lstrip("/"))
+        tar_info.size = stat.st_size
+        tar_info.mtime = int(stat.st_mtime)
+        tar_info.mode = stat.st_mode & 0o7777
+        tar_info.type = tarfile.REGTYPE
+        return path, tar_info
+
+    @staticmethod
+    def __header(tar_info: tarfile.TarInfo) -> bytes:
+        """
+        Parameters
+        ----------
+        tar_info : tarfile.TarInfo
+            Tar info
+
+        Returns
+        -------
+        bytes
+            Header, including PAX headers for long names or large files
+        """
+        return tar_info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+    @classmethod
+    def __padding(cls, size: int) -> int:
+        """
+        Parameters
+        ----------
+        size : int
+            File size
+
+        Returns
+        -------
+        int
+            Number of bytes to pad the file to the next block
+        """
+        return -size % cls.BLOCK_SIZE
+
+    @property
+    def size(self) -> Optional[int]:
+        """
+        Size of the archive or None if not precomputed
+        """
+        if self.__members is None:
+            return None
+        size = sum(
+            len(self.__header(tar_info)) + tar_info.size + self.__padding(tar_info.size)
+            for _, tar_info in self.__members
+        ) + 2 * self.BLOCK_SIZE
+        return size + (-size % self.RECORD_SIZE)
+
+    def __iter_members(self) -> Iterator[Tuple[pathlib.Path, tarfile.TarInfo]]:
+        """
+        Yields
+        ------
+        Iterator[Tuple[pathlib.Path, tarfile.TarInfo]]
+            Precomputed members or members stat'ed lazily
+        """
+        if self.__members is not None:
+            yield from self.__members
+        else:
+            for path, arcname in self.__entries:
+                member = self.__thread_pool.execute(self.__member, path, arcname)
+                if member is not None:
+                    yield member
+
+    def __iter__(self) -> Iterator[bytes]:
+        size = 0
+        for path, tar_info in self.__iter_members():
+            try:
+                file = self.__thread_pool.execute(path.open, "rb")
+            except (FileNotFoundError, IsADirectoryError, PermissionError):
+                if self.__members is None:
+                    continue
+                # The size was already promised, send zeros
+                file = None
+            header = self.__header(tar_info)
+            yield header
+            size += len(header)
+            remaining = tar_info.size
+            if file is not None:
+                with file:
+                    while remaining > 0:
+                        data = self.__thread_pool.execute(file.read, min(self.__block_size, remaining))
+                        if not data:
+                            break
+                        remaining -= len(data)
+                        yield data
+            # Pad files which shrunk in the meantime
+            while remaining > 0:
+                zeros = min(self.__block_size, remaining)
+                remaining -= zeros
+                yield bytes(zeros)
+            padding = self.__padding(tar_info.size)
+            size += tar_info.size + padding
+            if padding > 0:
+                yield bytes(padding)
+        # End of archive: two empty blocks, padded to a full record
+        end_size = 2 * self.BLOCK_SIZE
+        size += end_size
+        end_size += -size % self.RECORD_SIZE
+        yield bytes(end_size)
+
+    @staticmethod
+    def compress_zstd(chunks: Iterable[bytes], level: int, threads: int, thread_pool: Any) -> Iterator[bytes]:
+        """
+        Compresses the chunks with zstd. Compression is done by zstd's own worker threads,
+        the calls are executed on the thread pool, so they do not block the event loop.
+
+        Parameters
+        ----------
+        chunks : Iterable[bytes]
+            Chunks to compress
+        level : int
+            Compression level
+        threads : int
+            Number of zstd worker threads, -1 for the number of CPUs
+        thread_pool : Any
+            Pool, `execute(function, *args)` must return the function's result
+
+        Yields
+        ------
+        Iterator[bytes]
+            Compressed chunks
+        """
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads).compressobj()
+        # Collect small chunks, e.g. headers, to reduce the number of calls
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= TarStream.ZSTD_INPUT_SIZE:
+                compressed_chunk = thread_pool.execute(compressor.compress, bytes(buffer))
+                buffer.clear()
+                if compressed_chunk:
+                    yield compressed_chunk
+        yield thread_pool.execute(lambda: compressor.compress(bytes(buffer)) + compressor.flush())
@@ -0,0 +1,132 @@
+# std imports
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+from typing import Any, Callable, Iterable, Iterator
+
+# 3rd party imports
+import eventlet
+from eventlet import tpool
+
+class ThreadPool:
+    """
+    Runs blocking or CPU heavy functions, e.g. compression, in native threads.
+    When eventlet is used, the regular thread pool would only run green threads, so the functions
+    are passed to eventlet's native thread pool (tpool) and awaited by a green thread, which does not block the hub.
+    Otherwise a `ThreadPoolExecutor` is used.
+
+    Attributes
+    ----------
+    __size : int
+        Number of native threads
+    __use_eventlet : bool
+        True if eventlet's native thread pool is used
+    __executor : ThreadPoolExecutor
+        Executor if eventlet is not used
+    """
+
+    class GreenFuture:
+        """
+        Future-like wrapper of a green thread.
+
+        Attributes
+        ----------
+        __green_thread : eventlet.greenthread.GreenThread
+            Green thread waiting for the result
+        """
+
+        def __init__(self, green_thread: eventlet.greenthread.GreenThread):
+            self.__green_thread: eventlet.greenthread.GreenThread = green_thread
+
+        def result(self) -> Any:
+            """
+            Waits for the result.
+
+            Returns
+            -------
+            Any
+                Return value of the function, exceptions are re-raised
+            """
+            return self.__green_thread.wait()
+
+    def __init__(self, size: int, use_eventlet: bool):
+        self.__size: int = size
+        self.__use_eventlet: bool = use_eventlet
+        self.__executor: ThreadPoolExecutor = None
+        if use_eventlet:
+            tpool.set_num_threads(size)
+        else:
+            self.__executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="nf_cloud_pool")
+
+    @property
+    def size(self) -> int:
+        """
+        Number of native threads
+        """
+        return self.__size
+
+    def submit(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Schedules the function.
+
+        Parameters
+        ----------
+        function : Callable
+            Function to execute
+        *args
+            Positional arguments
+        **kwargs
+            Keyword arguments
+
+        Returns
+        -------
+        Any
+            Future, `result()` returns the function's return value
+        """
+        if self.__use_eventlet:
+            return self.GreenFuture(eventlet.spawn(tpool.execute, function, *args, **kwargs))
+        return self.__executor.submit(function, *args, **kwargs)
+
+    def execute(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Executes the function and waits for the result.
+
+        Parameters
+        ----------
+        function : Callable
+            Function to execute
+        *args
+            Positional arguments
+        **kwargs
+            Keyword arguments
+
+        Returns
+        -------
+        Any
+            Return value of the function
+        """
+        if self.__use_eventlet:
+            return tpool.execute(function, *args, **kwargs)
+        return self.__executor.submit(function, *args, **kwargs).result()
+
+    def iterate(self, iterable: Iterable[Any], batch_size: int) -> Iterator[Any]:
+        """
+        Iterates a blocking iterable, e.g. a lazy folder walk, in batches on the thread pool.
+
+        Parameters
+        ----------
+        iterable : Iterable[Any]
+            Iterable
+        batch_size : int
+            Number of items taken at once
+
+        Yields
+        ------
+        Iterator[Any]
+            Items
+        """
+        iterator = iter(iterable)
+        while True:
+            batch = self.execute(list, itertools.islice(iterator, batch_size))
+            yield from batch
+            if len(batch) < batch_size:
+                return
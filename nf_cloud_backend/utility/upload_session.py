@@ -0,0 +1,425 @@
+# std imports
+import errno
+import json
+import math
+import os
+import pathlib
+import time
+import uuid
+from typing import Any, BinaryIO, ClassVar, Dict, List, Optional, Tuple
+
+# internal imports
+from nf_cloud_backend import redis_client, thread_pool
+from nf_cloud_backend.models.project import Project
+from nf_cloud_backend.models.project_file import ProjectFile
+from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.result_archive import ResultArchive
+
+class UploadSession:
+    """
+    Resumable upload of a single file in chunks of `uploads.session_chunk_size` bytes.
+    Chunks can be sent in any order and in parallel. They are written at their offset
+    into a sparse file in `PARTIAL_FILE_DIRECTORY` of the upload path, outside of the project directories,
+    which is renamed to the target when the upload is finalized.
+    The session is stored in Redis, the indexes of the received chunks in a set next to it,
+    so concurrent chunk requests on different backend processes do not override each other.
+    Sessions expire after `uploads.session_ttl` seconds without a received chunk,
+    their partial files are removed when the next session is created.
+    """
+
+    CACHE_PREFIX: ClassVar[str] = "UPLOAD_SESSION_"
+    """Prefix for Redis keys
+    """
+
+    PARTIAL_FILE_DIRECTORY: ClassVar[str] = ".uploads"
+    """Directory for partial files within the upload path
+    """
+
+    FINALIZE_LOCK_TIMEOUT: ClassVar[int] = 300
+    """Seconds until the lock of a finalization expires, e.g. if the process died while finalizing
+    """
+
+    @classmethod
+    def __session_key(cls, upload_id: str) -> str:
+        """
+        Parameters
+        ----------
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        str
+            Cache key of the session
+        """
+        return f"{cls.CACHE_PREFIX}{upload_id}"
+
+    @classmethod
+    def __chunks_key(cls, upload_id: str) -> str:
+        """
+        Parameters
+        ----------
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        str
+            Redis key of the set of received chunk indexes
+        """
+        return f"{cls.CACHE_PREFIX}{upload_id}_CHUNKS"
+
+    @classmethod
+    def __finalize_lock_key(cls, upload_id: str) -> str:
+        """
+        Parameters
+        ----------
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        str
+            Redis key of the lock, which is set while the upload is finalized
+        """
+        return f"{cls.CACHE_PREFIX}{upload_id}_FINALIZING"
+
+    @classmethod
+    def partial_file_directory(cls) -> pathlib.Path:
+        """
+        Returns
+        -------
+        pathlib.Path
+            Directory of the partial files, on the same filesystem as the project directories
+        """
+        return pathlib.Path(Configuration.values()["upload_path"]).absolute().joinpath(cls.PARTIAL_FILE_DIRECTORY)
+
+    @classmethod
+    def partial_file_path(cls, upload_id: str) -> pathlib.Path:
+        """
+        Parameters
+        ----------
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        pathlib.Path
+            Path of the partial file
+        """
+        return cls.partial_file_directory().joinpath(f"{upload_id}.part")
+
+    @staticmethod
+    def chunk_count(session: Dict[str, Any]) -> int:
+        """
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+
+        Returns
+        -------
+        int
+            Number of chunks of the upload
+        """
+        return math.ceil(session["size"] / session["chunk_size"])
+
+    @staticmethod
+    def to_dict(session: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Public representation of the session, without internal paths.
+
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+
+        Returns
+        -------
+        Dict[str, Any]
+            Session
+        """
+        return {
+            "id": session["id"],
+            "directory": session["directory"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "chunk_size": session["chunk_size"]
+        }
+
+    @classmethod
+    def create(cls, project: Project, directory: str, filename: str, size: int) -> Dict[str, Any]:
+        """
+        Creates a new upload session and allocates the sparse file.
+        Removes the partial files of expired sessions beforehand.
+
+        Parameters
+        ----------
+        project : Project
+            Project
+        directory : str
+            Target directory
+        filename : str
+            Filename
+        size : int
+            File size in bytes
+
+        Returns
+        -------
+        Dict[str, Any]
+            Session
+
+        Raises
+        ------
+        ValueError
+            If the size is negative, exceeds `uploads.session_max_size` or can not be allocated or the filename is invalid
+        """
+        max_size = Configuration.values()["uploads"]["session_max_size"]
+        if not 0 <= size <= max_size:
+            raise ValueError(f"size must be between 0 and {max_size} bytes")
+        # Validates the target path
+        project.get_new_file_path(directory, filename)
+        thread_pool.execute(cls.remove_expired_partial_files)
+        upload_id = uuid.uuid4().hex
+        partial_file_path = cls.partial_file_path(upload_id)
+        try:
+            thread_pool.execute(cls.__allocate_partial_file, partial_file_path, size)
+        except OSError as error:
+            if error.errno in (errno.EFBIG, errno.ENOSPC):
+                raise ValueError(f"file of {size} bytes can not be stored: {error.strerror}") from error
+            raise
+        session = {
+            "id": upload_id,
+            "project_id": project.id,
+            "directory": directory,
+            "filename": filename,
+            "size": size,
+            "chunk_size": Configuration.values()["uploads"]["session_chunk_size"]
+        }
+        redis_client.set(
+            cls.__session_key(upload_id),
+            json.dumps(session),
+            ex=Configuration.values()["uploads"]["session_ttl"]
+        )
+        return session
+
+    @staticmethod
+    def __allocate_partial_file(partial_file_path: pathlib.Path, size: int):
+        """
+        Creates the partial file with the given size.
+
+        Parameters
+        ----------
+        partial_file_path : pathlib.Path
+            Path of the partial file
+        size : int
+            File size in bytes
+        """
+        partial_file_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with partial_file_path.open("wb") as partial_file:
+                # Sets the size without allocating blocks
+                partial_file.truncate(size)
+        except OSError:
+            partial_file_path.unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def remove_expired_partial_files(cls):
+        """
+        Removes partial files which were not written for `uploads.session_ttl` seconds.
+        Each received chunk refreshes the session, so their sessions are expired as well.
+        """
+        expired_before = time.time() - Configuration.values()["uploads"]["session_ttl"]
+        try:
+            with os.scandir(cls.partial_file_directory()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.name.endswith(".part") and entry.stat().st_mtime < expired_before:
+                            os.unlink(entry.path)
+                    except FileNotFoundError:
+                        # Removed concurrently
+                        continue
+        except FileNotFoundError:
+            return
+
+    @classmethod
+    def get(cls, project_id: int, upload_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the session.
+
+        Parameters
+        ----------
+        project_id : int
+            Project ID
+        upload_id : str
+            Upload ID
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            Session or None if the session does not exist, is expired or belongs to another project
+        """
+        session = redis_client.get(cls.__session_key(upload_id))
+        if session is None:
+            return None
+        session = json.loads(session)
+        if session["project_id"] != project_id:
+            return None
+        return session
+
+    @classmethod
+    def received_chunks(cls, session: Dict[str, Any]) -> List[int]:
+        """
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+
+        Returns
+        -------
+        List[int]
+            Indexes of the received chunks, ascending
+        """
+        return sorted(int(index) for index in redis_client.smembers(cls.__chunks_key(session["id"])))
+
+    @classmethod
+    def received_ranges(cls, session: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """
+        Received byte ranges, merged from adjacent chunks.
+
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            Start (inclusive) and end (exclusive) of each range
+        """
+        ranges = []
+        for index in cls.received_chunks(session):
+            start = index * session["chunk_size"]
+            end = min(start + session["chunk_size"], session["size"])
+            if len(ranges) > 0 and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    @classmethod
+    def write_chunk(cls, session: Dict[str, Any], offset: int, stream: BinaryIO):
+        """
+        Writes the chunk at the given offset from the stream, which is read in pieces of `uploads.chunk_size` bytes.
+        Only complete chunks are marked as received.
+
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+        offset : int
+            Offset of the chunk, multiple of the session's chunk size
+        stream : BinaryIO
+            Chunk content
+
+        Raises
+        ------
+        ValueError
+            If the offset is invalid or the stream does not contain exactly one chunk
+        """
+        if offset < 0 or offset >= session["size"] or offset % session["chunk_size"] != 0:
+            raise ValueError(f"offset must be a multiple of {session['chunk_size']} and less than {session['size']}")
+        expected_length = min(session["chunk_size"], session["size"] - offset)
+        read_size = Configuration.values()["uploads"]["chunk_size"]
+        received_length = 0
+        partial_file = os.open(cls.partial_file_path(session["id"]), os.O_WRONLY)
+        try:
+            while True:
+                data = stream.read(read_size)
+                if not data:
+                    break
+                if received_length + len(data) > expected_length:
+                    raise ValueError(f"chunk must not be longer than {expected_length} bytes")
+                # Write in a native thread, so slow disks do not block the event loop
+                thread_pool.execute(os.pwrite, partial_file, data, offset + received_length)
+                received_length += len(data)
+        finally:
+            os.close(partial_file)
+        if received_length != expected_length:
+            raise ValueError(f"chunk is incomplete, received {received_length} of {expected_length} bytes")
+        timeout = Configuration.values()["uploads"]["session_ttl"]
+        # Marks the chunk and refreshes the expiration of the session and all marks at once
+        with redis_client.pipeline() as pipeline:
+            pipeline.sadd(cls.__chunks_key(session["id"]), offset // session["chunk_size"])
+            pipeline.expire(cls.__chunks_key(session["id"]), timeout)
+            pipeline.expire(cls.__session_key(session["id"]), timeout)
+            pipeline.execute()
+
+    @classmethod
+    def finalize(cls, project: Project, session: Dict[str, Any]) -> Optional[pathlib.Path]:
+        """
+        Moves the completely received file to its target and removes the session.
+        Concurrent finalizations of the same session are prevented by a lock in Redis.
+
+        Parameters
+        ----------
+        project : Project
+            Project
+        session : Dict[str, Any]
+            Session
+
+        Returns
+        -------
+        Optional[pathlib.Path]
+            Path of the uploaded file or None if the session is already being finalized
+
+        Raises
+        ------
+        ValueError
+            If chunks are missing
+        FileNotFoundError
+            If the session was finalized or aborted in the meantime
+        """
+        lock_key = cls.__finalize_lock_key(session["id"])
+        if not redis_client.set(lock_key, 1, nx=True, ex=cls.FINALIZE_LOCK_TIMEOUT):
+            return None
+        try:
+            if not redis_client.exists(cls.__session_key(session["id"])):
+                raise FileNotFoundError(f"upload {session['id']} does not exist anymore")
+            missing_chunks = cls.chunk_count(session) - len(cls.received_chunks(session))
+            if missing_chunks > 0:
+                raise ValueError(f"{missing_chunks} chunks are missing")
+            file_path = project.get_new_file_path(session["directory"], session["filename"])
+            os.replace(cls.partial_file_path(session["id"]), file_path)
+            ProjectFile.add_path(project.id, project.file_directory, file_path)
+            thread_pool.execute(ResultArchive.invalidate, project.id, project.file_directory, file_path)
+            cls.__delete(session)
+            return file_path
+        finally:
+            redis_client.delete(lock_key)
+
+    @classmethod
+    def abort(cls, session: Dict[str, Any]):
+        """
+        Removes the session and the partial file.
+
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+        """
+        cls.partial_file_path(session["id"]).unlink(missing_ok=True)
+        cls.__delete(session)
+
+    @classmethod
+    def __delete(cls, session: Dict[str, Any]):
+        """
+        Removes the session and the chunk marks from Redis.
+
+        Parameters
+        ----------
+        session : Dict[str, Any]
+            Session
+        """
+        redis_client.delete(cls.__session_key(session["id"]), cls.__chunks_key(session["id"]))
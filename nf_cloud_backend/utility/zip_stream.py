@@ -0,0 +1,400 @@
+# std imports
+import os
+import pathlib
+import struct
+import time
+import zlib
+from collections import deque
+from typing import Any, BinaryIO, ClassVar, Deque, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+class ZipStream:
+    """
+    Streams a zip archive of the given files without knowing the sizes in advance (data descriptors).
+    Files which are known to be compressed already (by extension) or whose first block does not compress
+    are stored, the others are deflated. Like pigz, files are split into blocks, which are deflated in parallel
+    on a thread pool, using the last 32 KB of the previous block as dictionary, so the concatenated blocks form a single deflate stream.
+    Blocks are read ahead up to a bound and emitted in order. ZIP64 records are written for large files and archives.
+
+    Attributes
+    ----------
+    __entries : Iterable[Tuple[pathlib.Path, str]]
+        Files and their names within the archive
+    __thread_pool : Any
+        Pool to read and deflate blocks, `submit(function, *args)` must return an object with `result()`
+    __compression_level : int
+        Deflate compression level
+    __block_size : int
+        Bytes per block
+    __read_ahead : int
+        Maximum number of pending blocks
+    __offset : int
+        Bytes emitted so far
+    __central_directory : List[bytes]
+        Central directory records of the emitted files
+    """
+
+    INCOMPRESSIBLE_SUFFIXES: ClassVar[FrozenSet[str]] = frozenset([
+        ".7z", ".bam", ".bgz", ".bz2", ".cram", ".gif", ".gz", ".jpeg", ".jpg", ".mp4", ".png",
+        ".rar", ".sra", ".tbi", ".tgz", ".webp", ".xz", ".zip", ".zst"
+    ])
+    """Suffixes of files which are already compressed and therefore stored
+    """
+
+    PROBE_SIZE: ClassVar[int] = 65536
+    """Bytes of the first block which are compressed to decide if a file is stored
+    """
+
+    PROBE_MIN_RATIO: ClassVar[float] = 0.95
+    """Files are stored if the probe compresses to more than this ratio
+    """
+
+    DICTIONARY_SIZE: ClassVar[int] = 32768
+    """Size of the deflate window, used as dictionary for the next block
+    """
+
+    ZIP64_LIMIT: ClassVar[int] = 0xFFFFFFFF
+    """Maximum size or offset without ZIP64
+    """
+
+    ZIP64_ENTRIES_LIMIT: ClassVar[int] = 0xFFFF
+    """Maximum number of entries without ZIP64
+    """
+
+    VERSION: ClassVar[int] = 45
+    """Version needed to extract (4.5, ZIP64)
+    """
+
+    FLAGS: ClassVar[int] = 0x0808
+    """Data descriptor (bit 3) and UTF-8 names (bit 11)
+    """
+
+    def __init__(self, entries: Iterable[Tuple[pathlib.Path, str]], thread_pool: Any,
+        compression_level: int, block_size: int, read_ahead: int):
+        self.__entries: Iterable[Tuple[pathlib.Path, str]] = entries
+        self.__thread_pool: Any = thread_pool
+        self.__compression_level: int = compression_level
+        self.__block_size: int = block_size
+        self.__read_ahead: int = max(read_ahead, 1)
+        self.__offset: int = 0
+        self.__central_directory: List[bytes] = []
+
+    @staticmethod
+    def deflate_block(data: bytes, dictionary: bytes, is_last: bool, compression_level: int) -> bytes:
+        """
+        Deflates a single block (raw deflate). Executed on the thread pool, zlib releases the GIL.
+
+        Parameters
+        ----------
+        data : bytes
+            Block
+        dictionary : bytes
+            Last bytes of the previous block, empty for the first block
+        is_last : bool
+            True for the last block of a file, which finishes the stream
+        compression_level : int
+            Compression level
+
+        Returns
+        -------
+        bytes
+            Deflated block, byte aligned
+        """
+        if len(dictionary) > 0:
+            compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -15, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH)
+
+    @staticmethod
+    def dos_date_time(mtime: float) -> Tuple[int, int]:
+        """
+        Converts a timestamp to MS-DOS date and time.
+
+        Parameters
+        ----------
+        mtime : float
+            Timestamp
+
+        Returns
+        -------
+        Tuple[int, int]
+            Date and time
+        """
+        local_time = time.localtime(mtime)
+        if local_time.tm_year < 1980:
+            return (1 << 5) | 1, 0
+        date = ((min(local_time.tm_year, 2107) - 1980) << 9) | (local_time.tm_mon << 5) | local_time.tm_mday
+        dos_time = (local_time.tm_hour << 11) | (local_time.tm_min << 5) | (local_time.tm_sec // 2)
+        return date, dos_time
+
+    @staticmethod
+    def __open(path: pathlib.Path) -> Tuple[BinaryIO, os.stat_result]:
+        """
+        Opens the file, executed on the thread pool.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            File
+
+        Returns
+        -------
+        Tuple[BinaryIO, os.stat_result]
+            Opened file and its stat
+        """
+        file = path.open("rb")
+        try:
+            return file, os.fstat(file.fileno())
+        except BaseException:
+            file.close()
+            raise
+
+    def __is_incompressible(self, path: pathlib.Path, first_block: bytes) -> bool:
+        """
+        Decides if the file is stored. Executed on the thread pool, as the probe is compressed.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            File
+        first_block : bytes
+            First block of the file
+
+        Returns
+        -------
+        bool
+            True if the file is stored
+        """
+        if path.suffix.lower() in self.INCOMPRESSIBLE_SUFFIXES:
+            return True
+        if len(first_block) < self.PROBE_SIZE:
+            # Small files are deflated in any case
+            return False
+        probe = first_block[:self.PROBE_SIZE]
+        return len(zlib.compress(probe, 1)) > len(probe) * self.PROBE_MIN_RATIO
+
+    class Entry:
+        """
+        State of a file while it is emitted.
+        """
+
+        def __init__(self, arcname: bytes, method: int, date: int, dos_time: int, mode: int, is_zip64: bool):
+            self.arcname: bytes = arcname
+            self.method: int = method
+            self.date: int = date
+            self.dos_time: int = dos_time
+            self.mode: int = mode
+            self.is_zip64: bool = is_zip64
+            self.header_offset: int = 0
+            self.crc: int = 0
+            self.size: int = 0
+            self.compressed_size: int = 0
+
+    def __local_header(self, entry: Entry) -> bytes:
+        """
+        Local file header, sizes and CRC follow in the data descriptor.
+        """
+        extra = b""
+        size_placeholder = 0
+        if entry.is_zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            size_placeholder = self.ZIP64_LIMIT
+        return struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034b50,
+            self.VERSION,
+            self.FLAGS,
+            entry.method,
+            entry.dos_time,
+            entry.date,
+            0,
+            size_placeholder,
+            size_placeholder,
+            len(entry.arcname),
+            len(extra)
+        ) + entry.arcname + extra
+
+    def __data_descriptor(self, entry: Entry) -> bytes:
+        """
+        Data descriptor with CRC and sizes, 64 bit sizes for ZIP64 entries.
+        """
+        if entry.is_zip64:
+            return struct.pack("<IIQQ", 0x08074b50, entry.crc, entry.compressed_size, entry.size)
+        return struct.pack("<IIII", 0x08074b50, entry.crc, entry.compressed_size, entry.size)
+
+    def __central_directory_record(self, entry: Entry) -> bytes:
+        """
+        Central directory record, values exceeding 32 bit are moved to the ZIP64 extra field.
+        """
+        zip64_values = []
+        size = entry.size
+        compressed_size = entry.compressed_size
+        header_offset = entry.header_offset
+        if size >= self.ZIP64_LIMIT:
+            zip64_values.append(size)
+            size = self.ZIP64_LIMIT
+        if compressed_size >= self.ZIP64_LIMIT:
+            zip64_values.append(compressed_size)
+            compressed_size = self.ZIP64_LIMIT
+        if header_offset >= self.ZIP64_LIMIT:
+            zip64_values.append(header_offset)
+            header_offset = self.ZIP64_LIMIT
+        extra = b""
+        if len(zip64_values) > 0:
+            extra = struct.pack(f"<HH{len(zip64_values)}Q", 0x0001, 8 * len(zip64_values), *zip64_values)
+        return struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014b50,
+            (3 << 8) | self.VERSION,   # Unix
+            self.VERSION,
+            self.FLAGS,
+            entry.method,
+            entry.dos_time,
+            entry.date,
+            entry.crc,
+            compressed_size,
+            size,
+            len(entry.arcname),
+            len(extra),
+            0,
+            0,
+            0,
+            (entry.mode & 0xFFFF) << 16,
+            header_offset
+        ) + entry.arcname + extra
+
+    def __end_of_central_directory(self, central_directory_offset: int, central_directory_size: int) -> bytes:
+        """
+        End of central directory, preceded by the ZIP64 records if necessary.
+        """
+        number_of_entries = len(self.__central_directory)
+        end = b""
+        if number_of_entries >= self.ZIP64_ENTRIES_LIMIT or central_directory_offset >= self.ZIP64_LIMIT \
+            or central_directory_size >= self.ZIP64_LIMIT:
+            zip64_end_offset = central_directory_offset + central_directory_size
+            end += struct.pack(
+                "<IQHHIIQQQQ",
+                0x06064b50,
+                44,
+                (3 << 8) | self.VERSION,
+                self.VERSION,
+                0,
+                0,
+                number_of_entries,
+                number_of_entries,
+                central_directory_size,
+                central_directory_offset
+            )
+            end += struct.pack("<IIQI", 0x07064b50, 0, zip64_end_offset, 1)
+        end += struct.pack(
+            "<IHHHHIIH",
+            0x06054b50,
+            0,
+            0,
+            min(number_of_entries, self.ZIP64_ENTRIES_LIMIT),
+            min(number_of_entries, self.ZIP64_ENTRIES_LIMIT),
+            min(central_directory_size, self.ZIP64_LIMIT),
+            min(central_directory_offset, self.ZIP64_LIMIT),
+            0
+        )
+        return end
+
+    def __read_blocks(self, file, size: int) -> Iterator[bytes]:
+        """
+        Reads the file in blocks on the thread pool, at most `size` bytes, so the sizes fit the chosen format even if the file grows.
+        """
+        remaining = size
+        while remaining > 0:
+            block = self.__thread_pool.submit(file.read, min(self.__block_size, remaining)).result()
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+    def __parts(self) -> Iterator[Tuple[Optional[Entry], str, Any]]:
+        """
+        Yields the parts of the archive lazily as tuples of entry, kind and payload.
+        Kind `header` marks the local header, `data` stored data (bytes), `block` a deflated block (future)
+        and `descriptor` the data descriptor. The payload of headers and descriptors is build when emitted.
+        """
+        for path, arcname in self.__entries:
+            try:
+                file, stat = self.__thread_pool.submit(self.__open, path).result()
+            except (FileNotFoundError, IsADirectoryError, PermissionError):
+                continue
+            with file:
+                blocks = self.__read_blocks(file, stat.st_size)
+                first_block = next(blocks, b"")
+                is_stored = self.__thread_pool.submit(self.__is_incompressible, path, first_block).result()
+                date, dos_time = self.dos_date_time(stat.st_mtime)
+                entry = self.Entry(
+                    # Names are relative, `unzip` strips and warns about absolute paths
+                    arcname.lstrip("/").encode("utf-8"),
+                    0 if is_stored else 8,
+                    date,
+                    dos_time,
+                    stat.st_mode,
+                    # Deflate may expand incompressible data slightly
+                    stat.st_size * 1.05 >= self.ZIP64_LIMIT
+                )
+                yield entry, "header", None
+                block = first_block
+                dictionary = b""
+                while True:
+                    next_block = next(blocks, None)
+                    entry.crc = zlib.crc32(block, entry.crc)
+                    entry.size += len(block)
+                    if is_stored:
+                        if len(block) > 0:
+                            yield entry, "data", block
+                    else:
+                        yield entry, "block", self.__thread_pool.submit(
+                            self.deflate_block,
+                            block,
+                            dictionary,
+                            next_block is None,
+                            self.__compression_level
+                        )
+                        dictionary = block[-self.DICTIONARY_SIZE:]
+                    if next_block is None:
+                        break
+                    block = next_block
+                yield entry, "descriptor", None
+
+    def __emit(self, entry: Optional[Entry], kind: str, payload: Any) -> bytes:
+        """
+        Resolves a part to bytes and updates the offsets and sizes.
+        """
+        if kind == "header":
+            entry.header_offset = self.__offset
+            data = self.__local_header(entry)
+        elif kind == "block":
+            data = payload.result()
+            entry.compressed_size += len(data)
+        elif kind == "data":
+            data = payload
+            entry.compressed_size += len(data)
+        else:
+            data = self.__data_descriptor(entry)
+            self.__central_directory.append(self.__central_directory_record(entry))
+        self.__offset += len(data)
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        pending: Deque[Tuple[Optional[ZipStream.Entry], str, Any]] = deque()
+        pending_blocks = 0
+        for part in self.__parts():
+            pending.append(part)
+            if part[1] in ["block", "data"]:
+                pending_blocks += 1
+            # Emit in order, once the read ahead is exhausted
+            while pending_blocks > self.__read_ahead:
+                emitted_part = pending.popleft()
+                if emitted_part[1] in ["block", "data"]:
+                    pending_blocks -= 1
+                yield self.__emit(*emitted_part)
+        while len(pending) > 0:
+            yield self.__emit(*pending.popleft())
+        central_directory_offset = self.__offset
+        central_directory = b"".join(self.__central_directory)
+        yield central_directory + self.__end_of_central_directory(central_directory_offset, len(central_directory))
@@ -0,0 +1,155 @@
+# std imports
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+from typing import Any, Dict, Iterator
+from urllib.parse import parse_qs, urlparse
+
+# 3rd party imports
+from oauthlib.oauth2 import WebApplicationClient
+import pytest
+
+# internal imports
+import nf_cloud_backend
+from nf_cloud_backend.authorization.openid_connect import OpenIdConnect
+from nf_cloud_backend.models.user import User
+from nf_cloud_backend.utility.configuration import Configuration
+
+
+class StubProvider(ThreadingHTTPServer):
+    """
+    Local OpenID Connect provider with keep-alive connections,
+    counts the connections and the requests per path.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cache_control: str):
+        self.cache_control: str = cache_control
+        self.connections: int = 0
+        self.requests: Dict[str, int] = {}
+        self.lock: threading.Lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), StubProviderHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def discovery_document(self) -> Dict[str, Any]:
+        return {
+            "issuer": self.url,
+            "authorization_endpoint": f"{self.url}/authorize",
+            "token_endpoint": f"{self.url}/token",
+            "userinfo_endpoint": f"{self.url}/userinfo"
+        }
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    """
+    Serves the discovery document, token and userinfo endpoint of `StubProvider`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self): # pylint: disable=invalid-name
+        self.respond({
+            "/.well-known/openid-configuration": self.server.discovery_document,
+            "/userinfo": lambda: {"sub": "stub-user", "email": "stub-user@example.com"}
+        })
+
+    def do_POST(self): # pylint: disable=invalid-name
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.respond({
+            "/token": lambda: {"access_token": "access", "token_type": "Bearer", "expires_in": 3600}
+        })
+
+    def respond(self, routes: Dict[str, Any]):
+        path = urlparse(self.path).path
+        with self.server.lock:
+            self.server.requests[path] = self.server.requests.get(path, 0) + 1
+        body = json.dumps(routes[path]()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if path == "/.well-known/openid-configuration":
+            self.send_header("Cache-Control", self.server.cache_control)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+
+def start_provider(cache_control: str, monkeypatch) -> StubProvider:
+    """
+    Starts a stub provider and configures it as OpenID Connect provider `stub`.
+    """
+    provider = StubProvider(cache_control)
+    threading.Thread(target=provider.serve_forever, daemon=True).start()
+    monkeypatch.setitem(
+        Configuration.values()["login_providers"]["openid"],
+        "stub",
+        {
+            "client_id": "client",
+            "client_secret": "secret",
+            "discovery_url": f"{provider.url}/.well-known/openid-configuration",
+            "scope": "openid"
+        }
+    )
+    monkeypatch.setitem(nf_cloud_backend.openid_clients, "stub", WebApplicationClient("client"))
+    # The stub provider is plain HTTP
+    monkeypatch.setenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+    return provider
+
+
+@pytest.fixture
+def stub_provider(monkeypatch) -> Iterator[StubProvider]:
+    provider = start_provider("max-age=300", monkeypatch)
+    yield provider
+    provider.shutdown()
+    provider.server_close()
+
+
+@pytest.fixture
+def uncacheable_stub_provider(monkeypatch) -> Iterator[StubProvider]:
+    provider = start_provider("no-store", monkeypatch)
+    yield provider
+    provider.shutdown()
+    provider.server_close()
+
+
+def test_login_flow_fetches_discovery_once_over_one_connection(client, database, stub_provider):
+    for _ in range(3):
+        response = client.get("/api/users/openid/stub/login")
+        assert response.status_code == 302
+        assert response.headers["Location"].startswith(f"{stub_provider.url}/authorize?")
+
+    try:
+        for _ in range(2):
+            response = client.get("/api/users/openid/stub/callback?code=code")
+            assert response.status_code == 302
+            token = parse_qs(urlparse(response.headers["Location"]).query)["token"][0]
+            assert token
+    finally:
+        with database.connection_context():
+            User.delete().where(User.provider == "stub").execute()
+
+    assert stub_provider.requests == {
+        "/.well-known/openid-configuration": 1,
+        "/token": 2,
+        "/userinfo": 2
+    }
+    assert stub_provider.connections == 1
+
+
+def test_uncacheable_discovery_is_fetched_again_over_same_connection(uncacheable_stub_provider):
+    provider_client_config = Configuration.values()["login_providers"]["openid"]["stub"]
+    for _ in range(3):
+        assert OpenIdConnect.get_autodicovery(provider_client_config) == uncacheable_stub_provider.discovery_document()
+    assert uncacheable_stub_provider.requests == {"/.well-known/openid-configuration": 3}
+    assert uncacheable_stub_provider.connections == 1
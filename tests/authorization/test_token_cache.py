@@ -0,0 +1,68 @@
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.authorization import token_cache as token_cache_module
+from nf_cloud_backend.authorization.token_cache import TokenCache
+
+
+class FakeClock:
+    """
+    Monotonic clock which only advances when told to.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(token_cache_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_get_returns_cached_user(clock):
+    cache = TokenCache(2, 60)
+    assert cache.get("token") is None
+    cache.set("token", "user", 1234)
+    assert cache.get("token") == ("user", 1234)
+
+
+def test_least_recently_used_token_is_evicted(clock):
+    cache = TokenCache(2, 60)
+    cache.set("token1", "user1", 1)
+    cache.set("token2", "user2", 2)
+    # Use token1, so token2 is the least recently used one
+    assert cache.get("token1") == ("user1", 1)
+    cache.set("token3", "user3", 3)
+    assert cache.get("token2") is None
+    assert cache.get("token1") == ("user1", 1)
+    assert cache.get("token3") == ("user3", 3)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TokenCache(2, 60)
+    cache.set("token", "user", 1234)
+    clock.now += 59
+    assert cache.get("token") == ("user", 1234)
+    clock.now += 1
+    assert cache.get("token") is None
+
+
+def test_size_zero_disables_cache(clock):
+    cache = TokenCache(0, 60)
+    cache.set("token", "user", 1234)
+    assert cache.get("token") is None
+
+
+def test_clear_removes_all_entries(clock):
+    cache = TokenCache(2, 60)
+    cache.set("token1", "user1", 1)
+    cache.set("token2", "user2", 2)
+    cache.clear()
+    assert cache.get("token1") is None
+    assert cache.get("token2") is None
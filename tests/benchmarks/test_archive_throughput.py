@@ -0,0 +1,75 @@
+# std imports
+import gzip
+import os
+import pathlib
+import time
+from typing import List, Tuple
+import zipfile
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.utility.thread_pool import ThreadPool
+from nf_cloud_backend.utility.zip_stream import ZipStream
+
+FILE_SIZE: int = 8 * 1024 ** 2
+"""Bytes per file of the synthetic tree
+"""
+
+
+class CountingSink:
+    """
+    Writable which only counts the bytes, for `zipfile` in streaming mode.
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture(scope="module")
+def mixed_tree(tmp_path_factory) -> List[Tuple[pathlib.Path, str]]:
+    """
+    Synthetic result folder: tables (compressible), raw data (random) and gzipped reads, 8 MiB each.
+    """
+    directory = tmp_path_factory.mktemp("mixed_tree")
+    line = b"sp|P12345|PROTEIN_HUMAN\t0.0012\t1234.5678\tPEPTIDEK\n"
+    for index in range(4):
+        directory.joinpath(f"table_{index}.tsv").write_bytes(line * (FILE_SIZE // len(line)))
+        directory.joinpath(f"raw_{index}.bin").write_bytes(os.urandom(FILE_SIZE))
+        directory.joinpath(f"reads_{index}.fastq.gz").write_bytes(
+            gzip.compress(os.urandom(FILE_SIZE // 2), compresslevel=1) + os.urandom(FILE_SIZE // 2)
+        )
+    return [(path, path.name) for path in sorted(directory.iterdir())]
+
+
+@pytest.mark.benchmark
+def test_zip_throughput(mixed_tree):
+    input_size = sum(path.stat().st_size for path, _ in mixed_tree)
+
+    started_at = time.perf_counter()
+    sink = CountingSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zip_file:
+        for path, arcname in mixed_tree:
+            zip_file.write(path, arcname)
+    zipfile_duration = time.perf_counter() - started_at
+
+    thread_pool = ThreadPool(4, False)
+    started_at = time.perf_counter()
+    output_size = sum(len(chunk) for chunk in ZipStream(mixed_tree, thread_pool, 6, 1048576, 8))
+    zip_stream_duration = time.perf_counter() - started_at
+
+    print(
+        f"\nzip of {input_size / 1024 ** 2:.0f} MiB mixed files on {os.cpu_count()} CPUs: "
+        f"zipfile (deflate all, single thread) {input_size / 1024 ** 2 / zipfile_duration:.1f} MB/s, {sink.size / 1024 ** 2:.1f} MiB, "
+        f"ZipStream {input_size / 1024 ** 2 / zip_stream_duration:.1f} MB/s, {output_size / 1024 ** 2:.1f} MiB"
+    )
+    # Incompressible files are stored, so the output is barely larger than the compressed tables
+    assert output_size < sink.size * 1.01
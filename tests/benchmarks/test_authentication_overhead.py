@@ -0,0 +1,117 @@
+# std imports
+import datetime
+import time
+from typing import Callable, Dict
+
+# 3rd party imports
+import pytest
+
+# internal imports
+import nf_cloud_backend
+from nf_cloud_backend import app, load_user_from_request
+from nf_cloud_backend.authorization.jwt import JWT
+from nf_cloud_backend.authorization.token_cache import TokenCache
+from nf_cloud_backend.constants import ACCESS_TOKEN_HEADER
+from nf_cloud_backend.models.user import User
+
+
+@pytest.fixture
+def user(database):
+    """
+    Creates a user which is deleted after the test.
+
+    Yields
+    ------
+    User
+        User
+    """
+    with database.connection_context():
+        new_user = User.create(
+            provider_type="local",
+            provider="benchmark",
+            login_id="benchmark",
+            email="benchmark@example.com",
+            provider_data={}
+        )
+    yield new_user
+    with database.connection_context():
+        new_user.delete_instance()
+
+
+@pytest.fixture
+def backend_calls(database, redis_cache, monkeypatch) -> Dict[str, int]:
+    """
+    Counts database queries and Redis cache lookups.
+
+    Returns
+    -------
+    Dict[str, int]
+        `queries` and `cache_lookups`
+    """
+    calls = {"queries": 0, "cache_lookups": 0}
+    execute_sql = database.execute_sql
+    def count_execute_sql(*args, **kwargs):
+        calls["queries"] += 1
+        return execute_sql(*args, **kwargs)
+    monkeypatch.setattr(database, "execute_sql", count_execute_sql)
+    cache_get = nf_cloud_backend.cache.get
+    def count_cache_get(*args, **kwargs):
+        calls["cache_lookups"] += 1
+        return cache_get(*args, **kwargs)
+    monkeypatch.setattr(nf_cloud_backend.cache, "get", count_cache_get)
+    return calls
+
+
+def median_duration(authenticate: Callable[[], User], request_count: int) -> float:
+    """
+    Median duration of authenticating a request in seconds.
+    """
+    durations = []
+    for _ in range(request_count):
+        started_at = time.perf_counter()
+        assert authenticate() is not None
+        durations.append(time.perf_counter() - started_at)
+    return sorted(durations)[len(durations) // 2]
+
+
+@pytest.mark.benchmark
+def test_token_authentication_overhead(user, backend_calls, database, monkeypatch):
+    request_count = 1000
+    expires_at = int((datetime.datetime.utcnow() + datetime.timedelta(hours=1)).timestamp())
+    headers = {ACCESS_TOKEN_HEADER: JWT.create_auth_token(app.config["SECRET_KEY"], user, expires_at)}
+
+    def authenticate() -> User:
+        with app.test_request_context("/api/projects", headers=headers) as context:
+            return load_user_from_request(context.request)
+
+    with database.connection_context():
+        monkeypatch.setattr(nf_cloud_backend, "token_cache", TokenCache(0, 60))
+        uncached_duration = median_duration(authenticate, request_count)
+        assert backend_calls == {"queries": request_count, "cache_lookups": 0}
+
+        monkeypatch.setattr(nf_cloud_backend, "token_cache", TokenCache(16, 60))
+        backend_calls["queries"] = 0
+        cached_duration = median_duration(authenticate, request_count)
+    # Only the first request decodes the token and queries the user
+    assert backend_calls == {"queries": 1, "cache_lookups": 0}
+
+    print(
+        f"\ntoken authentication (median, {request_count} requests): "
+        f"uncached {uncached_duration * 1e6:.1f} µs, cached {cached_duration * 1e6:.1f} µs"
+    )
+    assert cached_duration < uncached_duration
+
+
+@pytest.mark.benchmark
+def test_worker_authentication_overhead(backend_calls, worker_headers):
+    request_count = 1000
+
+    def authenticate() -> User:
+        with app.test_request_context("/api/projects/1/workflow-log", method="POST", headers=worker_headers) as context:
+            return load_user_from_request(context.request)
+
+    duration = median_duration(authenticate, request_count)
+    # Neither the database nor Redis are asked
+    assert backend_calls == {"queries": 0, "cache_lookups": 0}
+
+    print(f"\nworker authentication (median, {request_count} requests): {duration * 1e6:.1f} µs")
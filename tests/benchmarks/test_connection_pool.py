@@ -0,0 +1,114 @@
+# std imports
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+from typing import Dict, List
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend import app
+
+UPLOAD_SIZE: int = 1024 ** 2
+"""Bytes per upload
+"""
+
+
+class BlockingBody:
+    """
+    Seekable request body which blocks on its first read until `gate` is set,
+    like a slow client. Records whether the receiving thread holds a connection.
+    """
+
+    def __init__(self, size: int, gate: threading.Event, database):
+        self.size = size
+        self.position = 0
+        self.gate = gate
+        self.database = database
+        self.is_receiving = threading.Event()
+        self.holds_connection_while_receiving = None
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self.position = offset if whence == os.SEEK_SET else self.size + offset
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.is_receiving.is_set():
+            self.holds_connection_while_receiving = not self.database.is_closed()
+            self.is_receiving.set()
+            self.gate.wait(30)
+        remaining = self.size - self.position
+        if size < 0 or size > remaining:
+            size = remaining
+        self.position += size
+        return b"\0" * size
+
+    def readline(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+
+@pytest.mark.benchmark
+def test_slow_uploads_do_not_exhaust_pool(client, database, worker_headers, project):
+    pool_size = database.metrics()["max_connections"]
+    timeouts_before = database.metrics()["timeouts"]
+    # More slow uploads than connections
+    upload_count = pool_size + 2
+    request_count = 50
+    gate = threading.Event()
+    bodies = [BlockingBody(UPLOAD_SIZE, gate, database) for _ in range(upload_count)]
+
+    def upload(index: int) -> int:
+        with app.test_client() as upload_client:
+            return upload_client.put(
+                f"/api/projects/{project.id}/upload-stream?directory=/&filename=slow{index}.bin",
+                input_stream=bodies[index],
+                headers={
+                    **worker_headers,
+                    "Content-Length": str(UPLOAD_SIZE),
+                    "Content-Type": "application/octet-stream"
+                }
+            ).status_code
+
+    def list_projects(_) -> Dict[str, float]:
+        with app.test_client() as list_client:
+            started_at = time.perf_counter()
+            status_code = list_client.get("/api/projects", headers=worker_headers).status_code
+            return {"status_code": status_code, "duration": time.perf_counter() - started_at}
+
+    with ThreadPoolExecutor(upload_count) as upload_executor:
+        uploads = [upload_executor.submit(upload, index) for index in range(upload_count)]
+        try:
+            for body in bodies:
+                assert body.is_receiving.wait(10), "upload did not start receiving"
+            # All uploads are receiving their bodies now, none holds a connection
+            assert [body.holds_connection_while_receiving for body in bodies] == [False] * upload_count
+            assert database.metrics()["in_use"] == 0
+            metrics_before_listings = database.metrics()
+            with ThreadPoolExecutor(pool_size * 2) as request_executor:
+                listings: List[Dict[str, float]] = list(request_executor.map(list_projects, range(request_count)))
+            metrics_after_listings = database.metrics()
+        finally:
+            gate.set()
+        upload_status_codes = [upload.result() for upload in uploads]
+
+    durations = sorted(listing["duration"] for listing in listings)
+    created_connections = metrics_after_listings["created_connections"] - metrics_before_listings["created_connections"]
+    checkouts = metrics_after_listings["checkouts"] - metrics_before_listings["checkouts"]
+    print(
+        f"\n{request_count} project listings during {upload_count} slow uploads with {pool_size} connections: "
+        f"median {durations[len(durations) // 2] * 1000:.1f} ms, max {durations[-1] * 1000:.1f} ms, "
+        f"{created_connections} new connections for {checkouts} checkouts"
+    )
+    assert [listing["status_code"] for listing in listings] == [200] * request_count
+    assert upload_status_codes == [200] * upload_count
+    # The burst of listings opens at most one connection per pool slot and reuses them for the other listings
+    assert created_connections <= pool_size
+    assert checkouts >= request_count
+    assert checkouts - created_connections >= request_count - pool_size
+    assert database.metrics()["timeouts"] == timeouts_before
+    assert database.metrics()["in_use"] == 0
@@ -0,0 +1,110 @@
+# std imports
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+# 3rd party imports
+import pytest
+
+FILE_COUNT: int = 30000
+"""Files in the deleted folder
+"""
+
+MEASUREMENT_SCRIPT: str = """
+import json
+import sys
+import time
+
+import eventlet
+
+# Production configuration, monkey patches with eventlet
+import nf_cloud_backend
+from nf_cloud_backend import app, db_wrapper
+from nf_cloud_backend.models import project as project_module
+from nf_cloud_backend.models.project import Project
+
+file_count = int(sys.argv[1])
+headers = json.loads(sys.argv[2])
+
+
+class InlinePool:
+    \"\"\"
+    Runs the functions in the calling green thread, like before the thread pool was used.
+    \"\"\"
+
+    def execute(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+
+def measure(project):
+    folder = project.file_directory.joinpath("large")
+    for index in range(file_count):
+        subfolder = folder.joinpath(str(index // 1000))
+        if index % 1000 == 0:
+            subfolder.mkdir(parents=True)
+        subfolder.joinpath(f"{index}.txt").write_bytes(b"content")
+
+    def delete():
+        with app.test_client() as client:
+            return client.post(f"/api/projects/{project.id}/delete-path", json={"path": "large/"}, headers=headers).status_code
+
+    completions = []
+    started_at = time.perf_counter()
+    deletion = eventlet.spawn(delete)
+    with app.test_client() as client:
+        while not deletion.dead:
+            assert client.get("/api/projects", headers=headers).status_code == 200
+            completions.append(time.perf_counter())
+            eventlet.sleep(0)
+    assert deletion.wait() == 200
+    finished_at = time.perf_counter()
+    assert not folder.exists()
+    timeline = [started_at] + completions + [finished_at]
+    return {
+        "deletion_duration": finished_at - started_at,
+        "max_request_gap": max(later - earlier for earlier, later in zip(timeline, timeline[1:])),
+        "requests": len(completions)
+    }
+
+
+with db_wrapper.database.connection_context():
+    project = Project.create(name="folder deletion benchmark")
+try:
+    results = {"thread_pool": measure(project)}
+    project_module.thread_pool = InlinePool()
+    results["inline"] = measure(project)
+finally:
+    with db_wrapper.database.connection_context():
+        project.delete_instance()
+print(json.dumps(results))
+"""
+"""Creates and deletes a large folder twice, with and without the thread pool,
+while `/api/projects` is requested in another green thread
+"""
+
+
+@pytest.mark.benchmark
+def test_folder_deletion_does_not_delay_requests(database, redis_cache, worker_headers, production_directory):
+    # Eventlet is only used in production mode
+    result = subprocess.run(
+        [sys.executable, "-c", MEASUREMENT_SCRIPT, str(FILE_COUNT), json.dumps(worker_headers)],
+        cwd=production_directory,
+        env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
+        capture_output=True,
+        check=True,
+        text=True,
+        timeout=300
+    )
+    results = json.loads(result.stdout.strip().splitlines()[-1])
+
+    for mode, measurement in results.items():
+        print(
+            f"\ndeletion of {FILE_COUNT} files ({mode}): {measurement['deletion_duration'] * 1000:.0f} ms, "
+            f"{measurement['requests']} concurrent project listings, "
+            f"longest wait for a listing {measurement['max_request_gap'] * 1000:.1f} ms"
+        )
+    with_pool = results["thread_pool"]
+    # Listings keep being answered while the folder is deleted
+    assert with_pool["max_request_gap"] < with_pool["deletion_duration"] / 4
+    assert with_pool["max_request_gap"] < results["inline"]["max_request_gap"] / 4
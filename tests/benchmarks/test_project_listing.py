@@ -0,0 +1,174 @@
+# std imports
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.models.project import Project
+
+PROJECT_COUNT: int = 50000
+"""Number of projects in the listed table
+"""
+
+PAGE_SIZE: int = 100
+"""Projects per page
+"""
+
+
+@pytest.fixture(scope="module")
+def many_projects(database) -> List[int]:
+    """
+    Inserts `PROJECT_COUNT` projects with sizeable workflow arguments and deletes them afterwards.
+
+    Yields
+    ------
+    List[int]
+        IDs of the projects, ascending
+    """
+    with database.connection_context():
+        cursor = database.execute_sql(
+            """
+            INSERT INTO projects (name, workflow, workflow_arguments)
+            SELECT 'project ' || i, 'Hello World', jsonb_build_object('inFiles', repeat('file.mzML,', 200))
+            FROM generate_series(1, %s) AS i
+            RETURNING id
+            """,
+            (PROJECT_COUNT,)
+        )
+        project_ids = sorted(row[0] for row in cursor.fetchall())
+        database.execute_sql("ANALYZE projects")
+    yield project_ids
+    with database.connection_context():
+        Project.delete().where(Project.id.in_(project_ids)).execute()
+
+
+def median_duration(request: Callable[[], None], repetitions: int = 20) -> float:
+    """
+    Returns
+    -------
+    float
+        Median duration of the request in seconds
+    """
+    durations = []
+    for _ in range(repetitions):
+        started_at = time.perf_counter()
+        request()
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations)
+
+
+@pytest.mark.benchmark
+def test_deep_page_keyset_vs_offset(client, worker_headers, database, many_projects):
+    deep_offset = len(many_projects) - PAGE_SIZE
+    # Everything in the table before the listed page, the test database may contain other projects
+    with database.connection_context():
+        deep_offset += Project.select().where(Project.id < many_projects[0]).count()
+    after = many_projects[-PAGE_SIZE - 1]
+
+    def offset_request():
+        response = client.get(f"/api/projects?offset={deep_offset}&limit={PAGE_SIZE}", headers=worker_headers)
+        assert len(response.json["projects"]) == PAGE_SIZE
+
+    def keyset_request():
+        response = client.get(f"/api/projects?after={after}&limit={PAGE_SIZE}", headers=worker_headers)
+        assert len(response.json["projects"]) == PAGE_SIZE
+
+    def projected_keyset_request():
+        response = client.get(f"/api/projects?after={after}&limit={PAGE_SIZE}&fields=name", headers=worker_headers)
+        assert set(response.json["projects"][0].keys()) == {"id", "name"}
+
+    def model_offset_query():
+        # Listing before keyset pagination: unordered offset over full model instances
+        projects = [
+            project.to_dict()
+            for project in Project.select().offset(deep_offset).limit(PAGE_SIZE)
+        ]
+        assert len(projects) == PAGE_SIZE
+
+    offset_duration = median_duration(offset_request)
+    keyset_duration = median_duration(keyset_request)
+    projected_keyset_duration = median_duration(projected_keyset_request)
+    with database.connection_context():
+        model_offset_duration = median_duration(model_offset_query)
+
+    print(
+        f"\ndeep page of {PROJECT_COUNT} projects (median): "
+        f"previous listing query (models + offset, without HTTP) {model_offset_duration * 1000:.2f} ms, "
+        f"offset request {offset_duration * 1000:.2f} ms, "
+        f"keyset request {keyset_duration * 1000:.2f} ms, "
+        f"keyset request with `fields=name` {projected_keyset_duration * 1000:.2f} ms"
+    )
+    assert keyset_duration < offset_duration
+    assert projected_keyset_duration < keyset_duration
+
+
+def test_keyset_pages_are_complete(client, worker_headers, many_projects):
+    listed_ids = []
+    after = many_projects[0] - 1
+    while after is not None and len(listed_ids) < 5 * PAGE_SIZE:
+        response = client.get(f"/api/projects?after={after}&limit={PAGE_SIZE}&fields=id", headers=worker_headers)
+        listed_ids.extend(project["id"] for project in response.json["projects"])
+        after = response.json["next"]
+    assert listed_ids == many_projects[:5 * PAGE_SIZE]
+
+
+def test_unknown_field_is_rejected(client, worker_headers, database):
+    response = client.get("/api/projects?fields=name,password", headers=worker_headers)
+    assert response.status_code == 422
+    assert "fields" in response.json["errors"]
+
+
+class FileSystemAudit:
+    """
+    Counts filesystem operations, e.g. `os.mkdir` or `open`, via audit hooks while active.
+    Audit hooks can not be removed, so the hook is installed once and switched on and off.
+    """
+
+    EVENTS = ("open", "os.mkdir", "os.listdir", "os.scandir", "os.remove", "os.rename", "os.rmdir", "shutil.rmtree")
+
+    def __init__(self):
+        self.is_active = False
+        self.events: List[str] = []
+
+    def __call__(self, event: str, args: tuple):
+        if self.is_active and event in self.EVENTS:
+            self.events.append(event)
+
+    def __enter__(self):
+        self.events = []
+        self.is_active = True
+        return self
+
+    def __exit__(self, *args):
+        self.is_active = False
+
+
+@pytest.fixture(scope="module")
+def file_system_audit() -> FileSystemAudit:
+    audit = FileSystemAudit()
+    sys.addaudithook(audit)
+    return audit
+
+
+@pytest.mark.benchmark
+def test_listing_touches_no_files(client, worker_headers, database, many_projects, file_system_audit):
+    page_size = 1000
+    started_at = time.perf_counter()
+    with file_system_audit:
+        response = client.get(f"/api/projects?after={many_projects[0] - 1}&limit={page_size}", headers=worker_headers)
+        for project_id in many_projects[:10]:
+            client.get(f"/api/projects/{project_id}", headers=worker_headers)
+        # Instantiating models must not create the project directories either
+        with database.connection_context():
+            projects = list(Project.select().where(Project.id.in_(many_projects[:page_size])))
+    duration = time.perf_counter() - started_at
+    print(
+        f"\nlisting {page_size} projects, showing 10 and instantiating {len(projects)} models: "
+        f"{len(file_system_audit.events)} filesystem operations, {duration * 1000:.2f} ms"
+    )
+    assert len(response.json["projects"]) == page_size
+    assert file_system_audit.events == []
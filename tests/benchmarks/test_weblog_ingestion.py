@@ -0,0 +1,79 @@
+# std imports
+from datetime import datetime, timezone
+import json
+import time
+from typing import Any, Dict, List
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.controllers.api import projects_controller
+from nf_cloud_backend.models.project import Project
+
+
+def record_weblog(task_count: int) -> List[Dict[str, Any]]:
+    """
+    Builds a weblog stream like Nextflow sends it for a scatter of `task_count` tasks.
+    """
+    utc_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    events = [{"event": "started", "runId": "run", "runName": "benchmark", "utcTime": utc_time}]
+    for event in ("process_submitted", "process_started", "process_completed"):
+        for task_id in range(1, task_count + 1):
+            events.append({
+                "event": event,
+                "runId": "run",
+                "runName": "benchmark",
+                "utcTime": utc_time,
+                "trace": {
+                    "task_id": task_id,
+                    "process": "scatter",
+                    "name": f"scatter ({task_id})",
+                    "status": "COMPLETED" if event == "process_completed" else "RUNNING",
+                    "realtime": 1000,
+                    "%cpu": 100.0,
+                    "peak_rss": 1048576,
+                    "rchar": 4096,
+                    "wchar": 4096
+                }
+            })
+    return events
+
+
+@pytest.mark.benchmark
+def test_weblog_replay(client, project, database, monkeypatch):
+    task_count = 500
+    weblog = [json.dumps(event) for event in record_weblog(task_count)]
+
+    round_trips = 0
+    execute_sql = database.execute_sql
+    def count_execute_sql(*args, **kwargs):
+        nonlocal round_trips
+        round_trips += 1
+        return execute_sql(*args, **kwargs)
+    monkeypatch.setattr(database, "execute_sql", count_execute_sql)
+
+    started_at = time.perf_counter()
+    for event in weblog:
+        response = client.post(f"/api/projects/{project.id}/workflow-log", data=event)
+        assert response.status_code == 200
+    # Traces are written in batches, include the final writes
+    projects_controller.trace_event_writer.flush()
+    projects_controller.resource_rollup_writer.flush()
+    duration = time.perf_counter() - started_at
+
+    print(
+        f"\nweblog replay: {len(weblog)} events, {len(weblog) / duration:.0f} events/s, "
+        f"{round_trips / len(weblog):.2f} DB round trips per event, "
+        f"{len([event for event in client.emitted_events if event[0] == 'new-progress'])} progress emits"
+    )
+
+    monkeypatch.undo()
+    with database.connection_context():
+        project = Project.get(Project.id == project.id)
+    assert project.submitted_processes == task_count
+    assert project.completed_processes == task_count
+    # One atomic UPDATE per counted event, existence checks for the others and the batched writes
+    assert round_trips / len(weblog) <= 1.1
+    # Progress events are coalesced, the replay takes far less than a second per emit
+    assert len(client.emitted_events) < len(weblog) / 10
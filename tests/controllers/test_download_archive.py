@@ -0,0 +1,83 @@
+# std imports
+import tarfile
+import tracemalloc
+from typing import Tuple
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.utility.configuration import Configuration
+
+FOLDER_COUNT: int = 8
+"""Folders in the project
+"""
+
+FILES_PER_FOLDER: int = 2000
+"""Files in each folder
+"""
+
+TAR_SIZE_MAX_FILES: int = 1000
+"""Maximum number of files of `tar` archives with precomputed size during the tests
+"""
+
+
+@pytest.fixture
+def project_with_many_files(project):
+    project.create_file_directory()
+    for folder_index in range(FOLDER_COUNT):
+        folder = project.file_directory.joinpath(f"folder{folder_index}")
+        folder.mkdir()
+        for file_index in range(FILES_PER_FOLDER):
+            folder.joinpath(f"file{file_index}.txt").write_bytes(b"content")
+    return project
+
+
+def download_tar_archive(client, worker_headers, project, folder_count: int) -> Tuple[int, int]:
+    """
+    Downloads the first folders as tar archive, discarding the chunks.
+
+    Returns
+    -------
+    Tuple[int, int]
+        Archive size and peak of the memory allocated while downloading
+    """
+    tracemalloc.start()
+    try:
+        response = client.post(
+            f"/api/projects/{project.id}/download-archive",
+            json={
+                "paths": [f"folder{folder_index}/" for folder_index in range(folder_count)],
+                "format": "tar"
+            },
+            headers=worker_headers,
+            buffered=False
+        )
+        assert response.status_code == 200
+        # Too many files to compute the size in advance
+        assert response.content_length is None
+        archive_size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Each file takes at least a header and a data block
+    assert archive_size >= folder_count * FILES_PER_FOLDER * 2 * tarfile.BLOCKSIZE
+    return archive_size, peak_memory
+
+
+def test_tar_archive_of_large_selection_keeps_memory_flat(client, worker_headers, project_with_many_files, monkeypatch):
+    monkeypatch.setitem(Configuration.values()["archives"], "tar_size_max_files", TAR_SIZE_MAX_FILES)
+    # Warm up, e.g. imports and caches
+    download_tar_archive(client, worker_headers, project_with_many_files, 1)
+
+    _, small_peak_memory = download_tar_archive(client, worker_headers, project_with_many_files, 2)
+    large_archive_size, large_peak_memory = download_tar_archive(client, worker_headers, project_with_many_files, FOLDER_COUNT)
+
+    print(
+        f"\ntar archive of {FOLDER_COUNT * FILES_PER_FOLDER} files ({large_archive_size / 1024 ** 2:.1f} MiB), "
+        f"peak allocated memory {large_peak_memory / 1024 ** 2:.1f} MiB, "
+        f"for {2 * FILES_PER_FOLDER} files {small_peak_memory / 1024 ** 2:.1f} MiB"
+    )
+    # Four times the files, but the memory does not grow with them
+    assert large_peak_memory < small_peak_memory * 1.25
@@ -0,0 +1,33 @@
+# std imports
+import os
+
+# 3rd party imports
+import pytest
+
+
+@pytest.fixture
+def project_with_files(project):
+    project.create_file_directory()
+    for index in range(3):
+        project.file_directory.joinpath(f"file{index}.txt").write_text("content")
+    os.symlink(project.file_directory.joinpath("missing"), project.file_directory.joinpath("broken_link"))
+    return project
+
+
+@pytest.mark.parametrize("limit", [0, -5])
+def test_files_rejects_too_small_limit(client, worker_headers, project_with_files, limit):
+    response = client.get(
+        f"/api/projects/{project_with_files.id}/files?mode=detailed&limit={limit}",
+        headers=worker_headers
+    )
+    assert response.status_code == 422
+
+
+def test_files_caps_large_limit(client, worker_headers, project_with_files):
+    response = client.get(
+        f"/api/projects/{project_with_files.id}/files?mode=detailed&sort=size&limit=1000000",
+        headers=worker_headers
+    )
+    assert response.status_code == 200
+    assert len(response.json["entries"]) == 4
+    assert response.json["next"] is None
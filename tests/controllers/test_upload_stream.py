@@ -0,0 +1,76 @@
+# std imports
+import os
+import resource
+
+# 3rd party imports
+import pytest
+
+UPLOAD_SIZE: int = 1024 ** 3
+"""Bytes of the streamed upload
+"""
+
+MEMORY_CEILING: int = 64 * 1024 ** 2
+"""Maximum growth of the resident memory while uploading
+"""
+
+
+def resident_memory() -> int:
+    """
+    Returns
+    -------
+    int
+        Current resident memory of this process in bytes
+    """
+    with open("/proc/self/statm", "r", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+class GeneratedBody:
+    """
+    Seekable request body of the given size, generated while it is read and sampling the resident memory after each read.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.position = 0
+        self.block = os.urandom(1024 ** 2)
+        self.peak_resident_memory = resident_memory()
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self.position = offset if whence == os.SEEK_SET else self.size + offset
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        self.peak_resident_memory = max(self.peak_resident_memory, resident_memory())
+        remaining = self.size - self.position
+        if size < 0 or size > remaining:
+            size = remaining
+        size = min(size, len(self.block))
+        self.position += size
+        return self.block[:size]
+
+    def readline(self, size: int = -1) -> bytes:
+        # Binary body without line breaks of interest
+        return self.read(size)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="requires /proc")
+def test_upload_stream_memory_stays_flat(client, worker_headers, project):
+    baseline = resident_memory()
+    body = GeneratedBody(UPLOAD_SIZE)
+    response = client.put(
+        f"/api/projects/{project.id}/upload-stream?directory=/&filename=large.bin",
+        input_stream=body,
+        headers={
+            **worker_headers,
+            "Content-Length": str(UPLOAD_SIZE),
+            "Content-Type": "application/octet-stream"
+        }
+    )
+    assert response.status_code == 200
+    assert project.file_directory.joinpath("large.bin").stat().st_size == UPLOAD_SIZE
+    print(f"\nupload of {UPLOAD_SIZE // 1024 ** 2} MiB, resident memory grew by {(body.peak_resident_memory - baseline) / 1024 ** 2:.1f} MiB")
+    assert body.peak_resident_memory - baseline < MEMORY_CEILING
@@ -0,0 +1,64 @@
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.models.process_resource_rollup import ProcessResourceRollup
+from nf_cloud_backend.utility.quantile_sketch import QuantileSketch
+
+
+@pytest.fixture
+def rollup_project(project, database):
+    """
+    Project whose rollups are deleted after the test.
+    """
+    yield project
+    with database.connection_context():
+        ProcessResourceRollup.delete().where(ProcessResourceRollup.project_id == project.id).execute()
+
+
+def trace(process: str, realtime, peak_rss) -> dict:
+    return {
+        "process": process,
+        "realtime": realtime,
+        "peak_rss": peak_rss
+    }
+
+
+def test_traces_of_same_process_are_folded_into_one_row(rollup_project, database):
+    realtimes = [1000, 2000, 3000, 4000]
+    with database.connection_context():
+        # Two batches, the second one is merged into the existing rows
+        ProcessResourceRollup.fold_traces([
+            (rollup_project.id, trace("align", realtimes[0], 100)),
+            (rollup_project.id, trace("align", realtimes[1], "-")),
+            (rollup_project.id, trace("sort", 50, 10))
+        ])
+        ProcessResourceRollup.fold_traces([
+            (rollup_project.id, trace("align", realtimes[2], 300)),
+            (rollup_project.id, trace("align", realtimes[3], None)),
+            # Without process, ignored
+            (rollup_project.id, {"realtime": 99999})
+        ])
+        rows = list(
+            ProcessResourceRollup.select().where(
+                ProcessResourceRollup.project_id == rollup_project.id,
+                ProcessResourceRollup.process == "align"
+            ).dicts()
+        )
+        summary = ProcessResourceRollup.summary(rollup_project.id)
+
+    assert sorted(row["metric"] for row in rows) == ["peak_rss", "realtime"]
+    realtime = next(row for row in rows if row["metric"] == "realtime")
+    assert realtime["count"] == 4
+    assert realtime["sum"] == sum(realtimes)
+    assert realtime["min"] == 1000
+    assert realtime["max"] == 4000
+    assert QuantileSketch.from_dict(realtime["sketch"]).count == 4
+
+    # Missing values are skipped
+    assert summary["align"]["peak_rss"]["count"] == 2
+    assert summary["align"]["peak_rss"]["mean"] == 200
+    assert summary["align"]["realtime"]["mean"] == 2500
+    assert abs(summary["align"]["realtime"]["p50"] - 2000) <= 2000 * QuantileSketch.RELATIVE_ACCURACY
+    assert summary["sort"]["realtime"]["count"] == 1
+    assert set(summary) == {"align", "sort"}
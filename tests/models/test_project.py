@@ -0,0 +1,14 @@
+def test_archive_entries_are_relative(project):
+    project.create_file_directory()
+    project.file_directory.joinpath("results/nested").mkdir(parents=True)
+    project.file_directory.joinpath("results/nested/table.tsv").write_text("content")
+    project.file_directory.joinpath("readme.txt").write_text("content")
+    arcnames = sorted(
+        arcname for _, arcname in project.archive_entries([
+            project.get_path("results"),
+            project.get_path("readme.txt"),
+            # Within the selected folder, yielded once
+            project.get_path("results/nested/table.tsv")
+        ])
+    )
+    assert arcnames == ["readme.txt", "results/nested/table.tsv"]
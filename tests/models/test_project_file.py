@@ -0,0 +1,30 @@
+# internal imports
+from nf_cloud_backend.models import project_file as project_file_module
+from nf_cloud_backend.models.project_file import ProjectFile
+
+
+def test_reconcile_walks_on_thread_pool_outside_transaction(project, database, monkeypatch):
+    project.create_file_directory()
+    project.file_directory.joinpath("results/nested").mkdir(parents=True)
+    for index in range(ProjectFile.INSERT_CHUNK_SIZE + 5):
+        project.file_directory.joinpath(f"results/nested/{index}.txt").write_text("content")
+
+    executed = []
+    execute = project_file_module.thread_pool.execute
+    def record_execute(function, *args, **kwargs):
+        executed.append((function.__name__, database.in_transaction()))
+        return execute(function, *args, **kwargs)
+    monkeypatch.setattr(project_file_module.thread_pool, "execute", record_execute)
+
+    with database.connection_context():
+        ProjectFile.create(project_id=project.id, path="vanished.txt", is_directory=False, size=1, mtime=0)
+        project.reconcile_file_index()
+        paths = {row.path for row in ProjectFile.select().where(ProjectFile.project_id == project.id)}
+        nested = ProjectFile.get(ProjectFile.project_id == project.id, ProjectFile.path == "results/nested")
+        ProjectFile.delete().where(ProjectFile.project_id == project.id).execute()
+
+    assert executed == [("walk_chunks", False)]
+    assert "vanished.txt" not in paths
+    assert len(paths) == ProjectFile.INSERT_CHUNK_SIZE + 5 + 2
+    assert "results/nested/0.txt" in paths
+    assert nested.is_directory
@@ -0,0 +1,44 @@
+# std imports
+from pathlib import Path
+import subprocess
+import sys
+
+# internal imports
+from nf_cloud_backend import socketio
+from nf_cloud_backend.server import Server
+from tests.conftest import TEST_DIRECTORY
+
+
+def test_import_starts_no_background_tasks():
+    # CLI commands like `database migrate` import the backend as well
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import threading; import nf_cloud_backend.server; print(threading.active_count())"
+        ],
+        cwd=TEST_DIRECTORY,
+        env={"PYTHONPATH": str(Path(__file__).parent.parent)},
+        capture_output=True,
+        check=True,
+        text=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "1"
+
+
+def test_start_background_tasks(monkeypatch):
+    started_tasks = []
+    monkeypatch.setattr(
+        socketio,
+        "start_background_task",
+        lambda target, *args, **kwargs: started_tasks.append(target.__qualname__)
+    )
+    Server.start_background_tasks()
+    Server.start_background_tasks()
+    # Each task is started once, Matomo is disabled in the tests
+    assert sorted(started_tasks) == [
+        "BufferedWriter.__flush_periodically",
+        "BufferedWriter.__flush_periodically",
+        "OutboxRelay.__relay_periodically",
+        "RabbitMQ.__service_heartbeats_periodically"
+    ]
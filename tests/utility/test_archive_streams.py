@@ -0,0 +1,104 @@
+# std imports
+import gzip
+import io
+import os
+import pathlib
+import tarfile
+from typing import Dict, List, Tuple
+import zipfile
+
+# 3rd party imports
+import pytest
+import zstandard
+
+# internal imports
+from nf_cloud_backend.utility.archive_response import ArchiveResponse
+from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.tar_stream import TarStream
+from nf_cloud_backend.utility.thread_pool import ThreadPool
+from nf_cloud_backend.utility.zip_stream import ZipStream
+
+
+@pytest.fixture(scope="module")
+def thread_pool() -> ThreadPool:
+    return ThreadPool(2, False)
+
+
+@pytest.fixture
+def files(tmp_path: pathlib.Path) -> Dict[str, bytes]:
+    """
+    Mixed files: compressible text spanning multiple blocks, random data, a gzip file and an empty file.
+    """
+    contents = {
+        "results/table.tsv": b"".join(f"{index}\tprotein_{index}\t{index * 0.5}\n".encode() for index in range(20000)),
+        "results/random.bin": os.urandom(200000),
+        "reads.fastq.gz": gzip.compress(b"@read\nACGT\n+\nIIII\n" * 1000),
+        "empty.txt": b""
+    }
+    for name, content in contents.items():
+        tmp_path.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.joinpath(name).write_bytes(content)
+    return contents
+
+
+def entries(directory: pathlib.Path, names: List[str]) -> List[Tuple[pathlib.Path, str]]:
+    # Leading slashes like in older archive entries, they must be stripped
+    return [(directory.joinpath(name), f"/{name}") for name in sorted(names)]
+
+
+def test_zip_stream(tmp_path, files, thread_pool):
+    archive = b"".join(ZipStream(entries(tmp_path, list(files)), thread_pool, 6, 65536, 4))
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        assert zip_file.testzip() is None
+        assert sorted(zip_file.namelist()) == sorted(files)
+        for name, content in files.items():
+            assert zip_file.read(name) == content
+        methods = {info.filename: info.compress_type for info in zip_file.infolist()}
+    assert methods["results/table.tsv"] == zipfile.ZIP_DEFLATED
+    assert methods["results/random.bin"] == zipfile.ZIP_STORED
+    assert methods["reads.fastq.gz"] == zipfile.ZIP_STORED
+
+
+def test_zip_stream_skips_vanished_files(tmp_path, files, thread_pool):
+    archive_entries = entries(tmp_path, list(files)) + [(tmp_path.joinpath("missing.txt"), "missing.txt")]
+    archive = b"".join(ZipStream(archive_entries, thread_pool, 6, 65536, 4))
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        assert sorted(zip_file.namelist()) == sorted(files)
+
+
+@pytest.mark.parametrize("precompute_size", [True, False])
+def test_tar_stream(tmp_path, files, thread_pool, precompute_size):
+    stream = TarStream(entries(tmp_path, list(files)), thread_pool, 65536, precompute_size=precompute_size)
+    archive = b"".join(stream)
+    if precompute_size:
+        assert stream.size == len(archive)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar_file:
+        assert sorted(tar_file.getnames()) == sorted(files)
+        for name, content in files.items():
+            assert tar_file.extractfile(name).read() == content
+
+
+def test_zstd_compressed_tar_stream(tmp_path, files, thread_pool):
+    archive = b"".join(TarStream.compress_zstd(TarStream(entries(tmp_path, list(files)), thread_pool, 65536), 3, 1, thread_pool))
+    with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(archive)) as reader:
+        with tarfile.open(fileobj=reader, mode="r|") as tar_file:
+            names = [member.name for member in tar_file]
+    assert sorted(names) == sorted(files)
+
+
+@pytest.mark.parametrize("max_files, has_size", [(4, True), (3, False)])
+def test_tar_archive_size_is_only_computed_up_to_max_files(tmp_path, files, monkeypatch, max_files, has_size):
+    monkeypatch.setitem(Configuration.values()["archives"], "tar_size_max_files", max_files)
+    stream, size = ArchiveResponse.stream(iter(entries(tmp_path, list(files))), "tar")
+    archive = b"".join(stream)
+    assert size == (len(archive) if has_size else None)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar_file:
+        assert sorted(tar_file.getnames()) == sorted(files)
+
+
+def test_archive_response_with_non_ascii_name(tmp_path, files):
+    response = ArchiveResponse.build(entries(tmp_path, list(files)), "zip", "Projekt größe")
+    content_disposition = response.headers["Content-Disposition"]
+    content_disposition.encode("latin-1")
+    assert "filename*=UTF-8''Projekt%20gr%C3%B6%C3%9Fe.zip" in content_disposition
+    response.close()
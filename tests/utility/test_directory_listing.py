@@ -0,0 +1,60 @@
+# std imports
+import os
+import pathlib
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.models.project_file import ProjectFile
+from nf_cloud_backend.utility.directory_listing import DirectoryListing
+
+
+@pytest.fixture
+def directory(tmp_path: pathlib.Path) -> pathlib.Path:
+    """
+    Directory with two folders, three files of different sizes and a broken symbolic link.
+    """
+    tmp_path.joinpath("b_folder").mkdir()
+    tmp_path.joinpath("a_folder").mkdir()
+    for name, size in (("c.txt", 3), ("a.txt", 1), ("b.txt", 2)):
+        tmp_path.joinpath(name).write_bytes(b"x" * size)
+    os.symlink(tmp_path.joinpath("missing"), tmp_path.joinpath("broken_link"))
+    return tmp_path
+
+
+@pytest.mark.parametrize("sort_key", DirectoryListing.SORT_KEYS)
+def test_broken_symlink_is_listed(directory, sort_key):
+    entries, _ = DirectoryListing.list(directory, sort_key)
+    assert "broken_link" in [entry["name"] for entry in entries]
+    assert len(entries) == 6
+
+
+def test_folders_first_sorted_by_name(directory):
+    entries, cursor = DirectoryListing.list(directory, "name", descending=True)
+    assert [entry["name"] for entry in entries] == ["b_folder", "a_folder", "c.txt", "broken_link", "b.txt", "a.txt"]
+    assert cursor is None
+
+
+def test_paging_by_size(directory):
+    names = []
+    cursor = None
+    while True:
+        entries, cursor = DirectoryListing.list(directory, "size", cursor=cursor, limit=2)
+        names.extend(entry["name"] for entry in entries)
+        if cursor is None:
+            break
+    assert names[:2] == ["a_folder", "b_folder"]
+    assert names[2:] == sorted(names[2:], key=lambda name: directory.joinpath(name).lstat().st_size)
+    assert len(names) == 6
+
+
+@pytest.mark.parametrize("limit", [0, -1, DirectoryListing.MAX_LIMIT + 1])
+def test_invalid_limit_is_rejected(directory, limit):
+    with pytest.raises(ValueError):
+        DirectoryListing.list(directory, limit=limit)
+
+
+def test_walk_includes_broken_symlink(directory):
+    paths = {path for path, _, _, _ in ProjectFile.walk(directory)}
+    assert paths == {"a_folder", "b_folder", "a.txt", "b.txt", "c.txt", "broken_link"}
@@ -0,0 +1,136 @@
+# std imports
+from datetime import datetime
+import pathlib
+
+# 3rd party imports
+from flask import Response
+import pytest
+
+# internal imports
+from nf_cloud_backend import app
+from nf_cloud_backend.utility.file_response import FileResponse
+
+CONTENT: bytes = bytes(range(256)) * 4
+"""Content of the downloaded file
+"""
+
+
+@pytest.fixture
+def file(tmp_path) -> pathlib.Path:
+    path = tmp_path.joinpath("data.bin")
+    path.write_bytes(CONTENT)
+    return path
+
+
+def build(file: pathlib.Path, **headers) -> Response:
+    with app.test_request_context("/", headers=headers) as context:
+        response = FileResponse.build(context.request, file, 100)
+        response.direct_passthrough = False
+        return response
+
+
+def ranges(range_header: str, size: int = len(CONTENT)):
+    with app.test_request_context("/", headers={"Range": range_header}) as context:
+        return FileResponse.satisfiable_ranges(context.request, size)
+
+
+def test_suffix_range():
+    assert ranges("bytes=-100") == [(len(CONTENT) - 100, len(CONTENT))]
+    # Longer than the file
+    assert ranges("bytes=-5000") == [(0, len(CONTENT))]
+
+
+def test_open_ended_range():
+    assert ranges("bytes=1000-") == [(1000, len(CONTENT))]
+
+
+def test_end_is_capped_at_size():
+    assert ranges("bytes=1000-99999") == [(1000, len(CONTENT))]
+
+
+def test_overlapping_and_adjacent_ranges_are_merged():
+    # The suffix covers the last 800 bytes, including 300-399
+    assert ranges("bytes=0-99,100-149,300-399,-800") == [(0, 150), (len(CONTENT) - 800, len(CONTENT))]
+
+
+def test_unordered_ranges_send_complete_file():
+    # Rejected as malformed by werkzeug
+    assert ranges("bytes=500-599,0-99") is None
+
+
+def test_unsatisfiable_range():
+    assert ranges("bytes=5000-6000") == []
+
+
+def test_without_range_complete_file_is_sent():
+    with app.test_request_context("/") as context:
+        assert FileResponse.satisfiable_ranges(context.request, len(CONTENT)) is None
+
+
+def test_too_many_ranges_send_complete_file():
+    range_header = "bytes=" + ",".join(f"{start * 10}-{start * 10 + 1}" for start in range(FileResponse.MAX_RANGES + 1))
+    assert ranges(range_header) is None
+
+
+def test_single_range_response(file):
+    response = build(file, Range="bytes=10-19")
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response.get_data() == CONTENT[10:20]
+    assert response.content_length == 10
+
+
+def test_unsatisfiable_range_response(file):
+    response = build(file, Range="bytes=5000-6000")
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_multiple_ranges_response(file):
+    response = build(file, Range="bytes=0-9,100-149,-5")
+    assert response.status_code == 206
+    assert response.mimetype == "multipart/byteranges"
+    body = response.get_data()
+    assert response.content_length == len(body)
+    boundary = response.mimetype_params["boundary"]
+    parts = body.split(f"--{boundary}".encode("ascii"))
+    # Preamble, three parts and the closing boundary
+    assert len(parts) == 5
+    assert parts[-1] == b"--\r\n"
+    for part, (start, end) in zip(parts[1:4], [(0, 10), (100, 150), (len(CONTENT) - 5, len(CONTENT))]):
+        headers, content = part.split(b"\r\n\r\n", 1)
+        assert f"Content-Range: bytes {start}-{end - 1}/{len(CONTENT)}".encode("ascii") in headers
+        assert content == CONTENT[start:end] + b"\r\n"
+
+
+def test_matching_if_range_applies_range(file):
+    response = build(file)
+    response = build(file, Range="bytes=0-9", **{"If-Range": response.headers["ETag"]})
+    assert response.status_code == 206
+
+
+def test_non_matching_if_range_sends_complete_file(file):
+    response = build(file, Range="bytes=0-9", **{"If-Range": '"outdated"'})
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
+
+
+def test_if_range_with_date():
+    with app.test_request_context("/", headers={"If-Range": "Mon, 01 Jan 2024 00:00:00 GMT"}) as context:
+        assert FileResponse.is_range_applicable(context.request, "etag", datetime(2024, 1, 1))
+        assert not FileResponse.is_range_applicable(context.request, "etag", datetime(2024, 1, 2))
+
+
+def test_non_ascii_download_name(file):
+    with app.test_request_context("/") as context:
+        response = FileResponse.build(context.request, file, 100, download_name="Ergebnisse_größe_数据.bin")
+    content_disposition = response.headers["Content-Disposition"]
+    content_disposition.encode("latin-1")
+    assert "filename=Ergebnisse_groe_.bin" in content_disposition
+    assert "filename*=UTF-8''Ergebnisse_gr%C3%B6%C3%9Fe_%E6%95%B0%E6%8D%AE.bin" in content_disposition
+    response.close()
+
+
+def test_non_ascii_accel_redirect_name(file):
+    response = FileResponse.accel_redirect(file, file.parent, "/protected-uploads/", download_name="ü.bin")
+    assert response.headers["Content-Disposition"] == "attachment; filename=u.bin; filename*=UTF-8''%C3%BC.bin"
@@ -0,0 +1,27 @@
+# std imports
+from pathlib import Path
+import subprocess
+import sys
+
+
+def test_green_threads_use_own_connections(database, redis_cache, production_directory):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "\n".join([
+                "import eventlet",
+                "from nf_cloud_backend import db_wrapper",
+                "db_wrapper.database.connect()",
+                "print(eventlet.spawn(db_wrapper.database.is_closed).wait())",
+                "db_wrapper.database.close()"
+            ])
+        ],
+        cwd=production_directory,
+        env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
+        capture_output=True,
+        check=True,
+        text=True
+    )
+    # The connection of the main green thread is not visible in another one
+    assert result.stdout.strip().splitlines()[-1] == "True"
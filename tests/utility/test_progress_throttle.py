@@ -0,0 +1,82 @@
+# std imports
+import threading
+from typing import Any, Callable, List, Tuple
+
+# internal imports
+from nf_cloud_backend.utility.progress_throttle import ProgressThrottle
+
+
+class FakeSocketIO:
+    """
+    Records emits. Background tasks run only when `run_background_tasks` is called,
+    `sleep` does not wait.
+    """
+
+    def __init__(self):
+        self.emits: List[Tuple[str, Any, str]] = []
+        self.background_tasks: List[Tuple[Callable[..., Any], tuple]] = []
+        self.lock = threading.Lock()
+
+    def emit(self, event: str, data: Any, to: str):
+        self.emits.append((event, data, to))
+
+    def start_background_task(self, target: Callable[..., Any], *args):
+        self.background_tasks.append((target, args))
+
+    def sleep(self, seconds: float):
+        pass
+
+    def run_background_tasks(self):
+        while self.background_tasks:
+            target, args = self.background_tasks.pop(0)
+            target(*args)
+
+
+def test_first_event_is_emitted_immediately():
+    socketio = FakeSocketIO()
+    throttle = ProgressThrottle(socketio, "new-progress", 2)
+    throttle.emit("project1", {"completed_processes": 1})
+    assert socketio.emits == [("new-progress", {"completed_processes": 1}, "project1")]
+    assert socketio.background_tasks == []
+
+
+def test_events_within_interval_are_coalesced_into_latest():
+    socketio = FakeSocketIO()
+    throttle = ProgressThrottle(socketio, "new-progress", 2)
+    for completed in range(1, 101):
+        throttle.emit("project1", {"completed_processes": completed})
+    # Only the first is sent directly, one deferred emit is scheduled for the rest
+    assert len(socketio.emits) == 1
+    assert len(socketio.background_tasks) == 1
+    socketio.run_background_tasks()
+    assert socketio.emits[-1] == ("new-progress", {"completed_processes": 100}, "project1")
+    assert len(socketio.emits) == 2
+
+
+def test_rooms_are_throttled_independently():
+    socketio = FakeSocketIO()
+    throttle = ProgressThrottle(socketio, "new-progress", 2)
+    throttle.emit("project1", 1)
+    throttle.emit("project2", 1)
+    assert [emit[2] for emit in socketio.emits] == ["project1", "project2"]
+
+
+def test_discard_drops_pending_event():
+    socketio = FakeSocketIO()
+    throttle = ProgressThrottle(socketio, "new-progress", 2)
+    throttle.emit("project1", 1)
+    throttle.emit("project1", 2)
+    throttle.discard("project1")
+    socketio.run_background_tasks()
+    assert socketio.emits == [("new-progress", 1, "project1")]
+    # History is dropped as well, so the next run starts unthrottled
+    throttle.emit("project1", 3)
+    assert socketio.emits[-1] == ("new-progress", 3, "project1")
+
+
+def test_zero_rate_disables_throttling():
+    socketio = FakeSocketIO()
+    throttle = ProgressThrottle(socketio, "new-progress", 0)
+    for completed in range(10):
+        throttle.emit("project1", completed)
+    assert len(socketio.emits) == 10
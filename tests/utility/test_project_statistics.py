@@ -0,0 +1,44 @@
+# std imports
+from datetime import datetime
+
+# internal imports
+from nf_cloud_backend import cache
+from nf_cloud_backend.models.trace_event import TraceEvent
+from nf_cloud_backend.utility.project_statistics import ProjectStatistics
+
+
+def test_completed_processes_of_today_use_partial_index(database):
+    today = datetime.utcnow().date()
+    query = TraceEvent.select().where(
+        TraceEvent.event == "process_completed",
+        TraceEvent.reported_at >= datetime(today.year, today.month, today.day)
+    )
+    with database.connection_context():
+        with database.atomic() as transaction:
+            # Tables of the test are small, make sure the planner considers the index at all
+            database.execute_sql("SET LOCAL enable_seqscan = off")
+            sql, params = query.sql()
+            plan = "\n".join(
+                row[0]
+                for row in database.execute_sql(f"EXPLAIN SELECT count(*) FROM ({sql}) AS completed", params).fetchall()
+            )
+            transaction.rollback()
+    # Without a matching index, the planner falls back to sequential scans of all partitions despite the penalty
+    assert "Seq Scan" not in plan
+    assert "reported_at_idx" in plan
+
+
+def test_counter_increment_keeps_expiration(redis_cache):
+    key = ProjectStatistics.completed_processes_key()
+    cache.set(key, 5, timeout=100)
+    ProjectStatistics.on_process_completed()
+    assert cache.get(key) == 6
+    assert 0 < redis_cache.ttl(f"{cache.cache.key_prefix}{key}") <= 100
+
+
+def test_expired_counter_is_not_recreated(redis_cache):
+    key = ProjectStatistics.completed_processes_key()
+    cache.delete(key)
+    ProjectStatistics.on_process_completed()
+    # Neither a bare delta without expiration nor any other value, the next `get` recomputes it
+    assert not redis_cache.exists(f"{cache.cache.key_prefix}{key}")
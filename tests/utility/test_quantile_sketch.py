@@ -0,0 +1,86 @@
+# std imports
+import math
+import random
+from typing import List
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend.utility.quantile_sketch import QuantileSketch
+
+QUANTILES: List[float] = [0.0, 0.01, 0.25, 0.5, 0.75, 0.95, 0.99, 1.0]
+"""Checked quantiles
+"""
+
+
+def exact_quantile(sorted_values: List[float], quantile: float) -> float:
+    """
+    Exact quantile with the rank definition of `QuantileSketch.quantile`.
+    """
+    return sorted_values[math.floor(quantile * (len(sorted_values) - 1))]
+
+
+def random_values(seed: int, count: int) -> List[float]:
+    """
+    Log-normal values spanning several orders of magnitude, like runtimes or memory peaks.
+    """
+    generator = random.Random(seed)
+    return [generator.lognormvariate(10, 3) for _ in range(count)]
+
+
+def assert_within_accuracy(sketch: QuantileSketch, values: List[float]):
+    sorted_values = sorted(values)
+    for quantile in QUANTILES:
+        exact = exact_quantile(sorted_values, quantile)
+        assert abs(sketch.quantile(quantile) - exact) <= QuantileSketch.RELATIVE_ACCURACY * exact, quantile
+
+
+def test_empty_sketch_has_no_quantiles():
+    assert QuantileSketch().quantile(0.5) is None
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_quantiles_are_within_relative_accuracy(seed):
+    values = random_values(seed, 10000)
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    assert sketch.count == len(values)
+    assert_within_accuracy(sketch, values)
+
+
+def test_zero_values_are_counted():
+    sketch = QuantileSketch()
+    for value in [0, 0, 0, 10]:
+        sketch.add(value)
+    assert sketch.count == 4
+    assert sketch.quantile(0.5) == 0.0
+    assert abs(sketch.quantile(1.0) - 10) <= QuantileSketch.RELATIVE_ACCURACY * 10
+
+
+def test_merge_equals_sketch_of_combined_values():
+    first_values = random_values(1, 5000)
+    second_values = random_values(2, 3000) + [0.0] * 10
+    first = QuantileSketch()
+    for value in first_values:
+        first.add(value)
+    second = QuantileSketch()
+    for value in second_values:
+        second.add(value)
+    combined = QuantileSketch()
+    for value in first_values + second_values:
+        combined.add(value)
+
+    first.merge(second)
+    assert first.to_dict() == combined.to_dict()
+    assert_within_accuracy(first, first_values + second_values)
+
+
+def test_dict_round_trip():
+    sketch = QuantileSketch()
+    for value in random_values(4, 100) + [0.0]:
+        sketch.add(value)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.to_dict() == sketch.to_dict()
+    assert restored.quantile(0.95) == sketch.quantile(0.95)
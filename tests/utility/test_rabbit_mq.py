@@ -0,0 +1,163 @@
+# std imports
+from typing import List, Tuple
+
+# 3rd party imports
+import pika
+import pytest
+
+# internal imports
+from nf_cloud_backend.utility import rabbit_mq
+from nf_cloud_backend.utility.rabbit_mq import RabbitMQPublisher
+
+
+class FakeChannel:
+    """
+    Channel of `FakeConnection`, records published messages.
+    """
+
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        self.is_closed = False
+
+    def confirm_delivery(self):
+        pass
+
+    def basic_publish(self, exchange: str, routing_key: str, body: str, properties: pika.BasicProperties,
+        mandatory: bool):
+        if self.connection.is_lost:
+            raise pika.exceptions.StreamLostError("connection lost")
+        self.connection.broker.published.append((routing_key, body))
+
+
+class FakeConnection:
+    """
+    Stand-in for `pika.BlockingConnection`.
+    """
+
+    def __init__(self, broker: "FakeBroker", parameters: pika.URLParameters):
+        self.broker = broker
+        self.is_closed = False
+        self.is_lost = False
+        """Lost without pika noticing yet, e.g. closed by the broker"""
+        self.processed_data_events = 0
+        broker.connections.append(self)
+
+    @property
+    def is_open(self) -> bool:
+        return not self.is_closed
+
+    def channel(self) -> FakeChannel:
+        return FakeChannel(self)
+
+    def process_data_events(self, time_limit: float):
+        if self.is_lost:
+            raise pika.exceptions.StreamLostError("connection lost")
+        self.processed_data_events += 1
+
+    def close(self):
+        self.is_closed = True
+
+
+class FakeBroker:
+    """
+    Creates `FakeConnection`s and records the published messages.
+    """
+
+    def __init__(self):
+        self.connections: List[FakeConnection] = []
+        self.published: List[Tuple[str, str]] = []
+
+    def connect(self, parameters: pika.URLParameters) -> FakeConnection:
+        return FakeConnection(self, parameters)
+
+
+@pytest.fixture
+def broker(monkeypatch) -> FakeBroker:
+    broker = FakeBroker()
+    monkeypatch.setattr(rabbit_mq.pika, "BlockingConnection", broker.connect)
+    return broker
+
+
+def test_publish_reuses_connection(broker):
+    publisher = RabbitMQPublisher("amqp://localhost")
+    for i in range(10):
+        publisher.publish("queue", [f"message{i}"])
+    assert len(broker.connections) == 1
+    assert len(broker.published) == 10
+
+
+def test_publish_reconnects_lost_connection(broker):
+    publisher = RabbitMQPublisher("amqp://localhost")
+    publisher.publish("queue", ["message1"])
+    broker.connections[0].is_lost = True
+    publisher.publish("queue", ["message2"])
+    assert len(broker.connections) == 2
+    assert broker.published == [("queue", "message1"), ("queue", "message2")]
+
+
+def test_process_data_events_services_open_connection(broker):
+    publisher = RabbitMQPublisher("amqp://localhost")
+    # Does not connect
+    publisher.process_data_events()
+    assert broker.connections == []
+
+    publisher.publish("queue", ["message"])
+    publisher.process_data_events()
+    publisher.process_data_events()
+    assert broker.connections[0].processed_data_events == 2
+
+
+def test_process_data_events_drops_lost_connection(broker):
+    publisher = RabbitMQPublisher("amqp://localhost")
+    publisher.publish("queue", ["message1"])
+    broker.connections[0].is_lost = True
+    publisher.process_data_events()
+    assert broker.connections[0].is_closed
+    publisher.publish("queue", ["message2"])
+    assert len(broker.connections) == 2
+    assert broker.published[-1] == ("queue", "message2")
+
+
+def test_heartbeats_are_serviced_in_background(broker, monkeypatch):
+    publisher = RabbitMQPublisher("amqp://localhost")
+    publisher.publish("queue", ["message"])
+    monkeypatch.setattr(rabbit_mq.RabbitMQ, "publisher", classmethod(lambda cls: publisher))
+
+    sleeps = []
+    def sleep(seconds: float):
+        sleeps.append(seconds)
+        if len(sleeps) > 3:
+            raise StopIteration()
+
+    background_tasks = []
+    monkeypatch.setattr(rabbit_mq.RabbitMQ, "_RabbitMQ__are_heartbeats_started", False)
+    rabbit_mq.RabbitMQ.start_heartbeats(lambda target, *args: background_tasks.append((target, args)), sleep)
+    rabbit_mq.RabbitMQ.start_heartbeats(lambda target, *args: background_tasks.append((target, args)), sleep)
+    assert len(background_tasks) == 1
+
+    target, args = background_tasks[0]
+    with pytest.raises(StopIteration):
+        target(*args)
+    assert sleeps == [RabbitMQPublisher.HEARTBEAT_INTERVAL] * 4
+    assert broker.connections[0].processed_data_events == 3
+
+
+def test_single_schedule_messages_share_connection(broker):
+    """
+    Single schedule messages, like the outbox relay publishes them for single schedules,
+    open a connection per message with a short-lived publisher but share one with a long-lived publisher.
+    """
+    message_count = 20
+    for i in range(message_count):
+        publisher = RabbitMQPublisher("amqp://localhost")
+        publisher.publish("queue", [f"message{i}"])
+        publisher.close()
+    assert len(broker.connections) == message_count
+
+    long_lived_publisher = RabbitMQPublisher("amqp://localhost")
+    for i in range(message_count):
+        long_lived_publisher.publish("queue", [f"message{i}"])
+    assert len(broker.connections) == message_count + 1
+    assert all(connection.is_closed for connection in broker.connections[:message_count])
+    assert broker.connections[-1].is_open
+    assert len(broker.published) == 2 * message_count
@@ -0,0 +1,88 @@
+# std imports
+import io
+import os
+from typing import Callable, List
+import zipfile
+
+# internal imports
+from nf_cloud_backend.controllers.api import projects_controller
+from nf_cloud_backend.controllers.api.projects_controller import build_result_archive
+from nf_cloud_backend.utility import archive_response, result_archive
+from nf_cloud_backend.utility.result_archive import ResultArchive
+from nf_cloud_backend.utility.thread_pool import ThreadPool
+
+
+class RecordingThreadPool(ThreadPool):
+    """
+    Thread pool which records the names of the executed functions.
+    """
+
+    def __init__(self):
+        super().__init__(2, False)
+        self.executed: List[str] = []
+
+    def execute(self, function: Callable, *args, **kwargs):
+        self.executed.append(function.__name__)
+        return super().execute(function, *args, **kwargs)
+
+
+def test_download_is_served_from_prebuilt_archive(client, worker_headers, project):
+    project.create_file_directory()
+    project.file_directory.joinpath("results").mkdir()
+    project.file_directory.joinpath("results/table.tsv").write_text("first")
+    build_result_archive(project)
+    cached_archive = ResultArchive.get(project.id, project.file_directory, project.file_directory, "zip")
+    assert cached_archive is not None
+
+    response = client.get(f"/api/projects/{project.id}/download?path=/", headers=worker_headers)
+    assert response.status_code == 200
+    assert response.data == cached_archive.read_bytes()
+    with zipfile.ZipFile(io.BytesIO(response.data)) as zip_file:
+        assert zip_file.read("results/table.tsv") == b"first"
+
+
+def test_changed_folder_is_not_served_from_archive(client, worker_headers, project):
+    project.create_file_directory()
+    table = project.file_directory.joinpath("table.tsv")
+    table.write_text("first")
+    build_result_archive(project)
+    # Written by the worker, which does not invalidate the archive
+    table.write_text("second")
+    os.utime(table, (0, 0))
+    assert ResultArchive.get(project.id, project.file_directory, project.file_directory, "zip") is None
+
+    response = client.get(f"/api/projects/{project.id}/download?path=/", headers=worker_headers)
+    with zipfile.ZipFile(io.BytesIO(b"".join(response.response))) as zip_file:
+        assert zip_file.read("table.tsv") == b"second"
+
+
+def test_folder_without_archive_is_not_walked(project, monkeypatch):
+    project.create_file_directory()
+    # Archive of another format
+    folder_directory = ResultArchive.folder_directory(project.id, project.file_directory, project.file_directory)
+    folder_directory.mkdir(parents=True)
+    folder_directory.joinpath("fingerprint.tar").write_bytes(b"")
+    def fail(*args):
+        raise AssertionError("fingerprint computed without cached archive")
+    monkeypatch.setattr(ResultArchive, "fingerprint", fail)
+    assert ResultArchive.get(project.id, project.file_directory, project.file_directory, "zip") is None
+
+
+def test_result_archive_is_walked_and_written_on_thread_pool(project, monkeypatch):
+    project.create_file_directory()
+    for index in range(3):
+        project.file_directory.joinpath(f"table{index}.tsv").write_text("content")
+    pool = RecordingThreadPool()
+    for module in [projects_controller, archive_response, result_archive]:
+        monkeypatch.setattr(module, "thread_pool", pool)
+    monkeypatch.setattr(ResultArchive, "ENTRIES_BATCH_SIZE", 2)
+    monkeypatch.setattr(ResultArchive, "WRITE_SIZE", 1)
+    build_result_archive(project)
+
+    cached_archive = ResultArchive.get(project.id, project.file_directory, project.file_directory, "zip")
+    with zipfile.ZipFile(cached_archive) as zip_file:
+        assert sorted(zip_file.namelist()) == [f"table{index}.tsv" for index in range(3)]
+    # Two batches of the folder walk, the writes and the replacement of the temporary file
+    assert pool.executed.count("list") == 2
+    assert pool.executed.count("write") > 1
+    assert "replace" in pool.executed
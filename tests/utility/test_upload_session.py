@@ -0,0 +1,129 @@
+# std imports
+import os
+import threading
+import time
+
+# 3rd party imports
+import pytest
+
+# internal imports
+from nf_cloud_backend import redis_client
+from nf_cloud_backend.utility.configuration import Configuration
+from nf_cloud_backend.utility.upload_session import UploadSession
+
+CHUNK_SIZE: int = 1024
+"""Chunk size of the sessions in the tests
+"""
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setitem(Configuration.values()["uploads"], "session_chunk_size", CHUNK_SIZE)
+
+
+def create_upload(client, worker_headers, project, size: int, filename: str = "upload.bin"):
+    return client.post(
+        f"/api/projects/{project.id}/uploads",
+        json={"directory": "/", "filename": filename, "size": size},
+        headers=worker_headers
+    )
+
+
+def test_upload_in_any_order(client, worker_headers, project, small_chunks):
+    content = os.urandom(3 * CHUNK_SIZE + 100)
+    upload = create_upload(client, worker_headers, project, len(content)).json["upload"]
+    partial_file_path = UploadSession.partial_file_path(upload["id"])
+    # Partial files are kept outside of the project directory
+    assert partial_file_path.is_file()
+    assert os.listdir(project.file_directory) == []
+
+    for offset in (2 * CHUNK_SIZE, 0, 3 * CHUNK_SIZE):
+        response = client.put(
+            f"/api/projects/{project.id}/uploads/{upload['id']}/{offset}",
+            data=content[offset:offset + CHUNK_SIZE],
+            headers=worker_headers
+        )
+        assert response.status_code == 200
+    status = client.get(f"/api/projects/{project.id}/uploads/{upload['id']}", headers=worker_headers).json
+    assert status["received"] == [[0, CHUNK_SIZE], [2 * CHUNK_SIZE, len(content)]]
+    response = client.post(f"/api/projects/{project.id}/uploads/{upload['id']}/finalize", headers=worker_headers)
+    assert response.status_code == 422
+
+    client.put(
+        f"/api/projects/{project.id}/uploads/{upload['id']}/{CHUNK_SIZE}",
+        data=content[CHUNK_SIZE:2 * CHUNK_SIZE],
+        headers=worker_headers
+    )
+    response = client.post(f"/api/projects/{project.id}/uploads/{upload['id']}/finalize", headers=worker_headers)
+    assert response.status_code == 200
+    assert project.file_directory.joinpath("upload.bin").read_bytes() == content
+    assert not partial_file_path.exists()
+    assert redis_client.keys(f"{UploadSession.CACHE_PREFIX}{upload['id']}*") == []
+
+
+def test_chunk_marks_expire_with_session(client, worker_headers, project, small_chunks):
+    upload = create_upload(client, worker_headers, project, 2 * CHUNK_SIZE).json["upload"]
+    client.put(f"/api/projects/{project.id}/uploads/{upload['id']}/0", data=b"x" * CHUNK_SIZE, headers=worker_headers)
+    # Shorten the remaining time of the session, the next chunk refreshes the session and all marks
+    keys = redis_client.keys(f"{UploadSession.CACHE_PREFIX}{upload['id']}*")
+    assert len(keys) == 2
+    for key in keys:
+        redis_client.expire(key, 5)
+    client.put(f"/api/projects/{project.id}/uploads/{upload['id']}/{CHUNK_SIZE}", data=b"x" * CHUNK_SIZE, headers=worker_headers)
+    ttl = Configuration.values()["uploads"]["session_ttl"]
+    assert all(redis_client.ttl(key) > ttl - 5 for key in keys)
+    client.delete(f"/api/projects/{project.id}/uploads/{upload['id']}", headers=worker_headers)
+
+
+@pytest.mark.parametrize("size", [-1, Configuration.values()["uploads"]["session_max_size"] + 1])
+def test_invalid_size_is_rejected(client, worker_headers, project, size):
+    response = create_upload(client, worker_headers, project, size)
+    assert response.status_code == 422
+    assert "upload" in response.json["errors"]
+
+
+def test_concurrent_finalize(client, worker_headers, project, small_chunks, monkeypatch):
+    upload = create_upload(client, worker_headers, project, CHUNK_SIZE).json["upload"]
+    client.put(f"/api/projects/{project.id}/uploads/{upload['id']}/0", data=b"x" * CHUNK_SIZE, headers=worker_headers)
+
+    # Hold the first finalization after it acquired the lock
+    is_finalizing = threading.Event()
+    may_continue = threading.Event()
+    received_chunks = UploadSession.received_chunks
+    def blocking_received_chunks(session):
+        is_finalizing.set()
+        may_continue.wait(5)
+        return received_chunks(session)
+    monkeypatch.setattr(UploadSession, "received_chunks", blocking_received_chunks)
+
+    responses = {}
+    def finalize():
+        with client.application.test_client() as other_client:
+            responses["first"] = other_client.post(
+                f"/api/projects/{project.id}/uploads/{upload['id']}/finalize",
+                headers=worker_headers
+            )
+    first_finalization = threading.Thread(target=finalize)
+    first_finalization.start()
+    assert is_finalizing.wait(5)
+    responses["second"] = client.post(f"/api/projects/{project.id}/uploads/{upload['id']}/finalize", headers=worker_headers)
+    may_continue.set()
+    first_finalization.join()
+
+    assert responses["first"].status_code == 200
+    assert responses["second"].status_code == 409
+    response = client.post(f"/api/projects/{project.id}/uploads/{upload['id']}/finalize", headers=worker_headers)
+    assert response.status_code == 404
+
+
+def test_expired_partial_files_are_removed(client, worker_headers, project):
+    UploadSession.partial_file_directory().mkdir(parents=True, exist_ok=True)
+    expired_partial_file = UploadSession.partial_file_directory().joinpath("expired.part")
+    expired_partial_file.write_bytes(b"x")
+    expired_at = time.time() - Configuration.values()["uploads"]["session_ttl"] - 1
+    os.utime(expired_partial_file, (expired_at, expired_at))
+    upload = create_upload(client, worker_headers, project, 10).json["upload"]
+    assert not expired_partial_file.exists()
+    assert UploadSession.partial_file_path(upload["id"]).exists()
+    client.delete(f"/api/projects/{project.id}/uploads/{upload['id']}", headers=worker_headers)
+    assert not UploadSession.partial_file_path(upload["id"]).exists()